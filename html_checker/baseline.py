@@ -0,0 +1,225 @@
+import io
+import json
+import os
+from collections import Counter, OrderedDict
+
+from .exceptions import BaselineInvalidError, PathInvalidError
+from .utils.texts import is_no_report_row, message_fingerprint
+
+
+class Baseline:
+    """
+    Messages from a previous audit to only report new and resolved messages.
+
+    Baseline is loaded from a packed audit made with the ``json`` exporter.
+    Each message is counted on its path then on a key made of its fingerprint
+    and its line, so looking up a message is done from a few hashed keys
+    whatever the baseline size is.
+
+    Matching is counted: each baseline message can only match a single
+    message, from the closest line in tolerance. So more occurences of a
+    known message than in baseline are new and fewer occurences are
+    resolved.
+
+    Arguments:
+        filepath (string): Path to the JSON audit file.
+
+    Keyword Arguments:
+        tolerance (int): Number of lines a known message can have moved to
+            still be matched. Default to ``DEFAULT_TOLERANCE``.
+
+    Attributes:
+        paths (dict): Baseline messages counted on their path then on their
+            keys, each item value is a ``collections.Counter``.
+        texts (dict): Baseline message texts indexed on their path then on
+            their keys, each item value is a list of message texts.
+        counts (dict): Counters of ``new``, ``known`` and ``resolved``
+            messages from filtered registries.
+    """
+    DEFAULT_TOLERANCE = 5
+    RESOLVED_MESSAGE = "Resolved since baseline: {}"
+
+    def __init__(self, filepath, tolerance=None):
+        self.tolerance = (
+            self.DEFAULT_TOLERANCE if tolerance is None else tolerance
+        )
+        self.paths = {}
+        self.texts = {}
+        self.counts = {
+            "new": 0,
+            "known": 0,
+            "resolved": 0,
+        }
+
+        self.load(self.read_file(filepath))
+
+    def read_file(self, path):
+        """
+        Read audit from given file.
+
+        Arguments:
+            path (string): Audit file path.
+
+        Returns:
+            dict: Audit.
+        """
+        if not os.path.exists(path):
+            msg = "Given baseline file path does not exists: {}"
+            raise PathInvalidError(msg.format(path))
+
+        with io.open(path, "r") as fp:
+            try:
+                audit = json.load(fp)
+            except ValueError as e:
+                msg = "Baseline file is not a valid JSON file: {}"
+                raise BaselineInvalidError(msg.format(e))
+
+        if not isinstance(audit, dict) or audit.get("kind") != "audit":
+            msg = "Baseline file is not a packed JSON audit: {}"
+            raise BaselineInvalidError(msg.format(path))
+
+        return audit
+
+    def normalize_type(self, row):
+        """
+        Return message type as exporters resolve it from validator message.
+
+        Arguments:
+            row (dict): Validator message.
+
+        Returns:
+            string: Message type.
+        """
+        if row["type"] in ["critical", "non-document-error"]:
+            return "error"
+        elif row["type"] == "info" and row.get("subType", None) == "warning":
+            return "warning"
+
+        return row["type"]
+
+    def get_key(self, message_type, message, line):
+        """
+        Return message key.
+
+        Arguments:
+            message_type (string): Message type.
+            message (string): Message text.
+            line (int): Line number, may be ``None`` for message without
+                position.
+
+        Returns:
+            tuple: Message key.
+        """
+        return (
+            message_fingerprint(message_type, message),
+            None if line is None else int(line),
+        )
+
+    def load(self, audit):
+        """
+        Index every messages from given audit.
+
+        Messages which were reported as resolved from a previous baseline and
+        the debug message exporters add for a path without any message are
+        not indexed.
+
+        Arguments:
+            audit (dict): Packed JSON audit.
+        """
+        for item in audit.get("paths") or []:
+            for row in (item.get("data") or {}).get("messages") or []:
+                if row.get("baseline") == "resolved":
+                    continue
+
+                if is_no_report_row(row):
+                    continue
+
+                key = self.get_key(
+                    row["type"],
+                    row["message"],
+                    (row.get("source") or {}).get("lineend"),
+                )
+                self.paths.setdefault(item["name"], Counter())[key] += 1
+                texts = self.texts.setdefault(item["name"], {})
+                texts.setdefault(key, []).append(row["message"])
+
+    def match(self, remaining, row):
+        """
+        Consume a baseline message matching given validator message.
+
+        Lines are looked up from the message line then farther and farther
+        until tolerance, so the closest baseline message is consumed.
+
+        Arguments:
+            remaining (collections.Counter): Baseline messages of message path
+                which have not been matched yet. Matched key is decremented.
+            row (dict): Validator message.
+
+        Returns:
+            tuple: Matching key or ``None`` if message is new.
+        """
+        line = row.get("lastLine")
+        if line is None:
+            offsets = [None]
+        else:
+            offsets = [0]
+            for i in range(1, self.tolerance + 1):
+                offsets.extend([-i, i])
+
+        message_type = self.normalize_type(row)
+
+        for offset in offsets:
+            key = self.get_key(
+                message_type,
+                row["message"],
+                None if offset is None else int(line) + offset,
+            )
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                return key
+
+        return None
+
+    def filter(self, registry):
+        """
+        Filter registry to only keep new messages and add resolved messages.
+
+        Resolved messages are baseline messages from a path of registry which
+        have not been matched by any message. They are added as ``info``
+        messages with an item ``baseline`` set to ``resolved``.
+
+        Arguments:
+            registry (dict): Report registry.
+
+        Returns:
+            collections.OrderedDict: Filtered registry.
+        """
+        filtered = OrderedDict()
+
+        for path, messages in registry.items():
+            rows = []
+            remaining = Counter(self.paths.get(path) or {})
+
+            for row in messages or []:
+                if self.match(remaining, row) is None:
+                    rows.append(row)
+                    self.counts["new"] += 1
+                else:
+                    self.counts["known"] += 1
+
+            texts = self.texts.get(path) or {}
+            for key, count in remaining.items():
+                if count <= 0:
+                    continue
+
+                for item in texts[key][-count:]:
+                    rows.append({
+                        "type": "info",
+                        "message": self.RESOLVED_MESSAGE.format(item),
+                        "baseline": "resolved",
+                    })
+                    self.counts["resolved"] += 1
+
+            filtered[path] = rows or None
+
+        return filtered
@@ -0,0 +1,135 @@
+import hashlib
+import io
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from .utils.paths import is_local_ressource
+from . import __pkgname__, USER_AGENT
+
+
+class BodyHasher:
+    """
+    Hash page bodies to find paths with identical content, so each distinct
+    content is only validated once.
+
+    Bodies are read by chunks which are hashed then dropped, bodies are
+    never kept in memory. Urls are requested concurrently from a pooled
+    session.
+
+    A path whose body can not be read (unreachable url, invalid status,
+    missing file, etc..) is never considered as a duplicate, so it is still
+    validated and validator reports the error.
+
+    Digests are kept for the whole run, so a path may be a duplicate of a
+    path grouped from a previous call.
+
+    Keyword Arguments:
+        user_agent (string): User agent for every requests. Default to
+            package user agent.
+        workers (int): Maximum number of bodies read at the same time.
+            Default to ``DEFAULT_WORKERS``.
+
+    Attributes:
+        origins (dict): First path for each already read body digest.
+        origin_paths (set): First paths of every already read body digest.
+    """
+    DEFAULT_WORKERS = 4
+    CHUNK_SIZE = 65536
+
+    def __init__(self, user_agent=None, workers=None):
+        self.user_agent = user_agent or USER_AGENT
+        self.workers = workers or self.DEFAULT_WORKERS
+        self.log = logging.getLogger(__pkgname__)
+        self.origins = {}
+        self.origin_paths = set()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers,
+                              pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_digest(self, path):
+        """
+        Return digest of given path body.
+
+        Arguments:
+            path (string): Page file path or url.
+
+        Returns:
+            string: Hexadecimal digest or ``None`` if body can not be read.
+        """
+        digest = hashlib.sha256()
+
+        if is_local_ressource(path):
+            if not os.path.isfile(path):
+                return None
+
+            with io.open(path, "rb") as fp:
+                for chunk in iter(lambda: fp.read(self.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        else:
+            try:
+                with self.session.get(path, stream=True, headers={
+                    "User-Agent": self.user_agent,
+                }) as r:
+                    if r.status_code != 200:
+                        return None
+
+                    for chunk in r.iter_content(chunk_size=self.CHUNK_SIZE):
+                        digest.update(chunk)
+            except RequestException as e:
+                msg = "Unable to read body to deduplicate '{}': {}"
+                self.log.debug(msg.format(path, e))
+                return None
+
+        return digest.hexdigest()
+
+    def is_origin(self, path):
+        """
+        Check if given path is the first one read for its body digest.
+
+        Arguments:
+            path (string): Page path.
+
+        Returns:
+            bool: True if path body has been read first.
+        """
+        return path in self.origin_paths
+
+    def group(self, paths):
+        """
+        Group given paths on their body digest, including paths from previous
+        calls.
+
+        Arguments:
+            paths (list): Page paths.
+
+        Returns:
+            tuple: List of paths to validate, in original order, and an
+            ordered dict of duplicated paths where each item value is the
+            first path with identical body, which may come from a previous
+            call.
+        """
+        unique = []
+        duplicates = OrderedDict()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            digests = executor.map(self.get_digest, paths)
+
+            for path, digest in zip(paths, digests):
+                if digest is None or digest not in self.origins:
+                    if digest is not None:
+                        self.origins[digest] = path
+                        self.origin_paths.add(path)
+                    unique.append(path)
+                else:
+                    duplicates[path] = self.origins[digest]
+
+        return unique, duplicates
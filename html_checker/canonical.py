@@ -0,0 +1,169 @@
+import fnmatch
+import re
+from urllib.parse import unquote_plus, urlsplit, urlunsplit
+
+from .exceptions import RuleInvalidError
+from .utils.paths import is_url
+
+
+class UrlCanonicalizer:
+    """
+    Rules to turn urls into a canonical form, so urls which only differ from
+    a tracking parameter, a fragment, etc.. are validated only once.
+
+    Available rules are:
+
+    ``fragment``
+        Remove fragment like ``#top``;
+    ``tracking``
+        Remove tracking query parameters like ``utm_source``, see
+        ``TRACKING_PARAMETERS``;
+    ``sort-query``
+        Sort query parameters on their name;
+    ``lowercase-host``
+        Lowercase scheme and host name;
+    ``strip-slash``
+        Remove trailing slash from path, except for the root path;
+    ``add-slash``
+        Add a trailing slash to path, except when its last segment looks like
+        a filename with an extension.
+
+    Only urls are changed, file paths are left untouched. Query parameters
+    are filtered and sorted without decoding them, so their encoding is
+    preserved.
+
+    Keyword Arguments:
+        rules (list): Names of rules to apply.
+        tracking (list): Additional tracking parameter names, they may be
+            Unix shell-style wildcards like ``utm_*``.
+
+    Attributes:
+        tracking (list): Every tracking parameter names.
+        regex (re.Pattern): Compiled pattern from tracking parameter names.
+    """
+    RULES = [
+        "fragment",
+        "tracking",
+        "sort-query",
+        "lowercase-host",
+        "strip-slash",
+        "add-slash",
+    ]
+    TRACKING_PARAMETERS = [
+        "utm_*",
+        "_ga",
+        "_gl",
+        "dclid",
+        "fbclid",
+        "gclid",
+        "igshid",
+        "mc_cid",
+        "mc_eid",
+        "msclkid",
+        "yclid",
+    ]
+
+    def __init__(self, rules=None, tracking=None):
+        self.rules = self.validate(list(rules or []))
+        self.tracking = self.TRACKING_PARAMETERS + list(tracking or [])
+
+        self.regex = re.compile("|".join([
+            fnmatch.translate(item) for item in self.tracking
+        ]))
+
+    def __bool__(self):
+        return len(self.rules) > 0
+
+    def validate(self, rules):
+        """
+        Ensure given rules are known and do not conflict.
+
+        Arguments:
+            rules (list): Rule names.
+
+        Returns:
+            list: Given rules.
+        """
+        for item in rules:
+            if item not in self.RULES:
+                msg = "Unknown canonicalization rule '{}', use one of: {}"
+                raise RuleInvalidError(msg.format(item, ", ".join(self.RULES)))
+
+        if "strip-slash" in rules and "add-slash" in rules:
+            msg = ("Canonicalization rules 'strip-slash' and 'add-slash' can "
+                   "not be used together.")
+            raise RuleInvalidError(msg)
+
+        return rules
+
+    def is_tracking(self, item):
+        """
+        Check if given raw query item is a tracking parameter.
+
+        Arguments:
+            item (string): Query item like ``name=value``.
+
+        Returns:
+            bool: True if item name is a tracking parameter.
+        """
+        name = unquote_plus(item.split("=", 1)[0])
+
+        return self.regex.match(name) is not None
+
+    def canonicalize(self, url):
+        """
+        Apply rules to given url.
+
+        Arguments:
+            url (string): Url to canonicalize.
+
+        Returns:
+            string: Canonical url, or unchanged value if it is not an url or
+            there is no rules.
+        """
+        if not self.rules or not is_url(url):
+            return url
+
+        scheme, netloc, path, query, fragment = urlsplit(url)
+
+        if "fragment" in self.rules:
+            fragment = ""
+
+        if "lowercase-host" in self.rules:
+            scheme = scheme.lower()
+            # Only host part is case insensitive, not user informations
+            userinfo, sep, host = netloc.rpartition("@")
+            netloc = userinfo + sep + host.lower()
+
+        if query and ("tracking" in self.rules or "sort-query" in self.rules):
+            items = [item for item in query.split("&") if item]
+
+            if "tracking" in self.rules:
+                items = [item for item in items if not self.is_tracking(item)]
+
+            if "sort-query" in self.rules:
+                items = sorted(items, key=lambda v: v.split("=", 1)[0])
+
+            query = "&".join(items)
+
+        if "strip-slash" in self.rules:
+            path = path.rstrip("/") or "/"
+        elif "add-slash" in self.rules:
+            segment = path.rsplit("/", 1)[-1]
+            if not path.endswith("/") and "." not in segment:
+                path += "/"
+
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    def iter_canonical(self, urls):
+        """
+        Lazily apply rules to given urls.
+
+        Arguments:
+            urls (iterable): Urls to canonicalize.
+
+        Returns:
+            iterator: Canonical urls.
+        """
+        for url in urls:
+            yield self.canonicalize(url)
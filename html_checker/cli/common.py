@@ -1,14 +1,62 @@
+import copy
+import datetime
 import os
 
 import click
 
+import html_checker
+from ..canonical import UrlCanonicalizer
+from ..utils.commands import get_vnu_version
+from ..utils.documents import iter_chunks, write_documents
 from ..utils.paths import is_local_ressource
 
-from ..export import EXPORTER_CHOICES
+from ..export import EXPORTER_CHOICES, get_exporter
+
+
+class ExporterParamType(click.ParamType):
+    """
+    Exporter option value made of an exporter format name and an optional
+    destination separated with a ``:``, like ``html:build/html``.
+
+    Converted value is a tuple of format name and destination (``None`` if
+    not given).
+    """
+    name = "exporter"
+
+    def convert(self, value, param, ctx):
+        if isinstance(value, tuple):
+            return value
+
+        name, separator, destination = value.partition(":")
+        name = name.lower()
+
+        if name not in EXPORTER_CHOICES:
+            choices = ", ".join(["'{}'".format(item) for item in EXPORTER_CHOICES])
+            self.fail(
+                "'{}' is not one of {}.".format(name, choices),
+                param,
+                ctx
+            )
+
+        return (name, destination or None)
 
 
 # Shared options arguments
 COMMON_OPTIONS = {
+    "dedup-bodies": {
+        "args": ("--dedup-bodies",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Read every page body before validation to only validate "
+                "once the pages with identical content. Other pages receive "
+                "a copy of messages with an info message about the page they "
+                "were copied from. Validated urls are downloaded twice, once "
+                "to be hashed then by validator, so it doubles their "
+                "traffic."
+            ),
+        }
+    },
     "destination": {
         "args": ("--destination",),
         "kwargs": {
@@ -36,6 +84,8 @@ COMMON_OPTIONS = {
                 "It is recommended to define a destination directory with "
                 "'--destination' if you don't plan to use packed export, else "
                 "every files will just be printed out in an unique output. "
+                "With a destination, each report file is written as soon as "
+                "its path has been validated. "
                 "This option has no effect with ``logging`` format."
             ),
         }
@@ -43,12 +93,163 @@ COMMON_OPTIONS = {
     "exporter": {
         "args": ("--exporter",),
         "kwargs": {
-            "type": click.Choice(EXPORTER_CHOICES, case_sensitive=False),
+            "type": ExporterParamType(),
+            "metavar": "FORMAT[:DESTINATION]",
+            "multiple": True,
+            "help": (
+                "Select exporter format, one of: {}. A destination directory "
+                "can be given after the format name, else it is the one from "
+                "'--destination'. This option can be given multiple times to "
+                "export to many formats from a single validation."
+            ).format(", ".join(EXPORTER_CHOICES)),
+            "show_default": True,
+            "default": ["logging"],
+        }
+    },
+    "aggregate": {
+        "args": ("--aggregate",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Aggregate messages by rule, where values from messages are "
+                "ignored, and add a 'rules' document which lists each rule "
+                "once with its affected paths. This option has no effect with "
+                "'logging' format."
+            ),
+        }
+    },
+    "baseline": {
+        "args": ("--baseline",),
+        "kwargs": {
+            "type": click.Path(exists=True, file_okay=True, dir_okay=False),
+            "metavar": "FILEPATH",
             "help": (
-                "Select exporter format."
+                "A packed JSON audit from a previous run. Only messages which "
+                "are not in this audit and messages from this audit which are "
+                "resolved are reported."
             ),
+        }
+    },
+    "baseline-tolerance": {
+        "args": ("--baseline-tolerance",),
+        "kwargs": {
+            "type": click.IntRange(min=0),
+            "default": 5,
             "show_default": True,
-            "default": "logging",
+            "metavar": "INTEGER",
+            "help": (
+                "Number of lines a known message from baseline can have moved "
+                "to still be matched."
+            ),
+        }
+    },
+    "cache": {
+        "args": ("--cache/--no-cache",),
+        "kwargs": {
+            "default": True,
+            "help": (
+                "Use a persistent cache in user cache directory to store "
+                "compiled templates. This option has only effect for 'html' "
+                "exporter."
+            ),
+        }
+    },
+    "canonicalize": {
+        "args": ("--canonicalize",),
+        "kwargs": {
+            "type": click.Choice(UrlCanonicalizer.RULES),
+            "multiple": True,
+            "help": (
+                "A rule to turn urls into a canonical form before removing "
+                "duplicated ones, so urls which only differ from a fragment, "
+                "a tracking parameter, etc.. are validated once. This option "
+                "can be given multiple times."
+            ),
+        }
+    },
+    "count-ignored": {
+        "args": ("--count-ignored",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Apply ignore rules from report parsing instead of validator "
+                "so ignored messages can be counted. This is slower than "
+                "letting validator filtering messages itself."
+            ),
+        }
+    },
+    "ignore": {
+        "args": ("--ignore",),
+        "kwargs": {
+            "metavar": "PATTERN",
+            "multiple": True,
+            "help": (
+                "A regular expression to ignore every message it matches. "
+                "Pattern must match the whole message text. This option can "
+                "be given multiple times."
+            ),
+        }
+    },
+    "ignore-file": {
+        "args": ("--ignore-file",),
+        "kwargs": {
+            "type": click.Path(exists=True, file_okay=True, dir_okay=False),
+            "metavar": "FILEPATH",
+            "help": (
+                "A file path of regular expressions to ignore messages, one "
+                "per line. Empty lines and lines starting with '#' are "
+                "ignored."
+            ),
+        }
+    },
+    "ignore-message": {
+        "args": ("--ignore-message",),
+        "kwargs": {
+            "metavar": "STRING",
+            "multiple": True,
+            "help": (
+                "An exact message text to ignore. This option can be given "
+                "multiple times."
+            ),
+        }
+    },
+    "jobs": {
+        "args": ("--jobs",),
+        "kwargs": {
+            "type": click.IntRange(min=1),
+            "metavar": "INTEGER",
+            "default": 1,
+            "help": (
+                "Number of processes to render report documents in parallel. "
+                "This option has only effect for 'html' exporter with "
+                "'--no-pack'."
+            ),
+        }
+    },
+    "max-errors": {
+        "args": ("--max-errors",),
+        "kwargs": {
+            "type": click.IntRange(min=0),
+            "metavar": "INTEGER",
+            "default": None,
+            "help": (
+                "Maximum number of errors, command exits with an error code "
+                "if there are more errors. This option has only effect for "
+                "'stats' exporter."
+            ),
+        }
+    },
+    "max-warnings": {
+        "args": ("--max-warnings",),
+        "kwargs": {
+            "type": click.IntRange(min=0),
+            "metavar": "INTEGER",
+            "default": None,
+            "help": (
+                "Maximum number of warnings, command exits with an error code "
+                "if there are more warnings. This option has only effect for "
+                "'stats' exporter."
+            ),
         }
     },
     "no-stream": {
@@ -62,6 +263,18 @@ COMMON_OPTIONS = {
             ),
         }
     },
+    "paginate": {
+        "args": ("--paginate",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Build a paginated audit where index pages only contain path "
+                "statistics and path messages are loaded on demand. This is "
+                "recommended for audits of many paths. This option has only "
+                "effect for 'html' exporter with packed export."
+            ),
+        }
+    },
     "safe": {
         "args": ("--safe",),
         "kwargs": {
@@ -74,6 +287,31 @@ COMMON_OPTIONS = {
             ),
         }
     },
+    "save-raw": {
+        "args": ("--save-raw",),
+        "kwargs": {
+            "type": click.Path(file_okay=True, dir_okay=False),
+            "metavar": "FILEPATH",
+            "help": (
+                "A file path where to save raw validation results, so exports "
+                "can be rendered again later with 'render' command without "
+                "validating paths again. Results are saved as gzip compressed "
+                "JSON lines."
+            ),
+        }
+    },
+    "search-index": {
+        "args": ("--search-index",),
+        "kwargs": {
+            "is_flag": True,
+            "help": (
+                "Add a search box to audit and summary pages to find paths "
+                "from their messages or names. A compact index of message "
+                "templates and path names is written beside documents. This "
+                "option has only effect for 'html' exporter."
+            ),
+        }
+    },
     "serve": {
         "args": ("--serve",),
         "kwargs": {
@@ -101,6 +339,18 @@ COMMON_OPTIONS = {
             ),
         }
     },
+    "stats-format": {
+        "args": ("--stats-format",),
+        "kwargs": {
+            "type": click.Choice(["text", "json"], case_sensitive=False),
+            "help": (
+                "Format of statistics summary. This option has only effect "
+                "for 'stats' exporter."
+            ),
+            "show_default": True,
+            "default": "text",
+        }
+    },
     "split": {
         "args": ("--split",),
         "kwargs": {
@@ -127,6 +377,18 @@ COMMON_OPTIONS = {
             ),
         }
     },
+    "tracking-param": {
+        "args": ("--tracking-param",),
+        "kwargs": {
+            "metavar": "NAME",
+            "multiple": True,
+            "help": (
+                "An additional query parameter name to remove with "
+                "canonicalization rule 'tracking', it may contain wildcards "
+                "like 'ref_*'. This option can be given multiple times."
+            ),
+        }
+    },
     "user-agent": {
         "args": ("--user-agent",),
         "kwargs": {
@@ -179,3 +441,155 @@ def validate_sitemap_path(logger, path):
             return False
 
     return True
+
+
+def get_export_metas():
+    """
+    Return export metas shared by every exporters of a run.
+
+    Validator version is not known yet, it is set from
+    ``update_export_version`` before anything is built.
+
+    Returns:
+        dict: Export metas with an empty ``vnu`` item.
+    """
+    return {
+        "created": datetime.datetime.now(),
+        "generator": html_checker.__version__,
+        "vnu": None,
+    }
+
+
+def update_export_version(exporters, metas, query=None):
+    """
+    Set validator version into export metas and every exporters, if not
+    already set.
+
+    This waits for the version query, so it has to be called as late as
+    possible, just before the first path is built.
+
+    Arguments:
+        exporters (list): List of exporter instance and destination as
+            returned from ``start_exporters``.
+        metas (dict): Export metas as returned from ``get_export_metas``,
+            they are updated in place.
+
+    Keyword Arguments:
+        query (html_checker.validator.ValidatorVersionQuery): Version query
+            started in background. If not given or if it has failed,
+            validator is executed to get its version.
+    """
+    if metas["vnu"] is not None:
+        return
+
+    version = query.get_version() if query else None
+    metas["vnu"] = version or get_vnu_version()
+
+    for exporter, destination in exporters:
+        exporter.update_metas({"vnu": metas["vnu"]})
+
+
+def start_exporters(logger, specs, options, destination=None):
+    """
+    Start an exporter instance for each exporter option value.
+
+    Invalid exporter is a critical error which should stop program execution.
+
+    Arguments:
+        logger (logging.logger): Logging object to output error messages.
+        specs (list): List of exporter option values, each one is a tuple of
+            format name and destination.
+        options (dict): Options to give to every exporters.
+
+    Keyword Arguments:
+        destination (string): Default destination for exporters without
+            their own destination.
+
+    Returns:
+        list: A list of exporter instance and its destination for each
+        exporter.
+    """
+    exporters = []
+
+    for name, path in specs:
+        exporter = get_exporter(name)(**options)
+
+        exporter_error = exporter.validate()
+        if exporter_error:
+            logger.critical(exporter_error)
+            raise click.Abort()
+
+        if hasattr(exporter, "template_dir"):
+            msg = "Using template directory: {}"
+            logger.debug(msg.format(exporter.template_dir))
+
+        exporters.append([exporter, path or destination])
+
+    return exporters
+
+
+def build_exporters(exporters, registry, ignored=None):
+    """
+    Build given report registry with every exporters.
+
+    Exporters update message rows while they build them, so every exporter
+    except the last one is given its own copy of registry.
+
+    Arguments:
+        exporters (list): List of exporter instance and destination as
+            returned from ``start_exporters``.
+        registry (dict): Report registry.
+
+    Keyword Arguments:
+        ignored (int): Number of messages ignored from ignore rules for
+            registry paths, added to exporter statistics. Default to ``None``
+            when ignored messages are not counted.
+    """
+    for i, item in enumerate(exporters, start=1):
+        exporter, destination = item
+        if ignored is not None:
+            exporter.add_ignored(ignored)
+        if i < len(exporters):
+            exporter.build(copy.deepcopy(registry))
+        else:
+            exporter.build(registry)
+
+
+def release_exporters(logger, exporters, pack):
+    """
+    Release every exporters then write their documents into their
+    destination or print them out.
+
+    Arguments:
+        logger (logging.logger): Logging object to output messages.
+        exporters (list): List of exporter instance and destination as
+            returned from ``start_exporters``.
+        pack (bool): Pack mode to give to exporters.
+
+    Returns:
+        int: The highest exit code from exporters.
+    """
+    exit_code = 0
+
+    for exporter, destination in exporters:
+        # Release documents if exporter supports it
+        export = exporter.release(pack=pack)
+
+        # Some exporter like logging won't return anything to output or write
+        if export:
+            if destination:
+                # Write every document to files in destination directory
+                files = write_documents(destination, export)
+                for item in files:
+                    msg = "Created file: {}"
+                    logger.info(msg.format(item))
+            else:
+                # Print out document
+                for doc in export:
+                    for chunk in iter_chunks(doc):
+                        click.echo(chunk, nl=False)
+                    click.echo()
+
+        exit_code = max(exit_code, exporter.get_exit_code())
+
+    return exit_code
@@ -16,6 +16,7 @@ else:
     from .version import version_command
     from .site import site_command
     from .page import page_command
+    from .render import render_command
 
     # Help alias on '-h' argument
     CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
@@ -69,3 +70,4 @@ else:
     cli_frontend.add_command(version_command, name="version")
     cli_frontend.add_command(site_command, name="site")
     cli_frontend.add_command(page_command, name="page")
+    cli_frontend.add_command(render_command, name="render")
@@ -12,40 +12,86 @@ else:
     CHERRYPY_AVAILABLE = True
 
 from .. import __pkgname__
+from ..baseline import Baseline
+from ..bodies import BodyHasher
+from ..canonical import UrlCanonicalizer
 from ..exceptions import HtmlCheckerUnexpectedException, HtmlCheckerBaseException
-from ..export import get_exporter
-from ..utils.documents import write_documents
+from ..raw import RawWriter
+from ..rules import IgnoreRules
 from ..utils.structures import reduce_unique
 from ..utils.server import start_live_release
 from ..validator import ValidatorInterface
-from .common import COMMON_OPTIONS
+from .common import (
+    COMMON_OPTIONS, build_exporters, get_export_metas, release_exporters,
+    start_exporters, update_export_version
+)
 
 
 @click.command()
+@click.option(*COMMON_OPTIONS["aggregate"]["args"],
+              **COMMON_OPTIONS["aggregate"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline"]["args"],
+              **COMMON_OPTIONS["baseline"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline-tolerance"]["args"],
+              **COMMON_OPTIONS["baseline-tolerance"]["kwargs"])
+@click.option(*COMMON_OPTIONS["cache"]["args"],
+              **COMMON_OPTIONS["cache"]["kwargs"])
+@click.option(*COMMON_OPTIONS["canonicalize"]["args"],
+              **COMMON_OPTIONS["canonicalize"]["kwargs"])
+@click.option(*COMMON_OPTIONS["count-ignored"]["args"],
+              **COMMON_OPTIONS["count-ignored"]["kwargs"])
+@click.option(*COMMON_OPTIONS["dedup-bodies"]["args"],
+              **COMMON_OPTIONS["dedup-bodies"]["kwargs"])
 @click.option(*COMMON_OPTIONS["destination"]["args"],
               **COMMON_OPTIONS["destination"]["kwargs"])
 @click.option(*COMMON_OPTIONS["exporter"]["args"],
               **COMMON_OPTIONS["exporter"]["kwargs"])
+@click.option(*COMMON_OPTIONS["ignore"]["args"],
+              **COMMON_OPTIONS["ignore"]["kwargs"])
+@click.option(*COMMON_OPTIONS["ignore-file"]["args"],
+              **COMMON_OPTIONS["ignore-file"]["kwargs"])
+@click.option(*COMMON_OPTIONS["ignore-message"]["args"],
+              **COMMON_OPTIONS["ignore-message"]["kwargs"])
+@click.option(*COMMON_OPTIONS["jobs"]["args"],
+              **COMMON_OPTIONS["jobs"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-errors"]["args"],
+              **COMMON_OPTIONS["max-errors"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-warnings"]["args"],
+              **COMMON_OPTIONS["max-warnings"]["kwargs"])
 @click.option(*COMMON_OPTIONS["no-stream"]["args"],
               **COMMON_OPTIONS["no-stream"]["kwargs"])
 @click.option(*COMMON_OPTIONS["pack"]["args"],
               **COMMON_OPTIONS["pack"]["kwargs"])
+@click.option(*COMMON_OPTIONS["paginate"]["args"],
+              **COMMON_OPTIONS["paginate"]["kwargs"])
 @click.option(*COMMON_OPTIONS["safe"]["args"],
               **COMMON_OPTIONS["safe"]["kwargs"])
+@click.option(*COMMON_OPTIONS["save-raw"]["args"],
+              **COMMON_OPTIONS["save-raw"]["kwargs"])
+@click.option(*COMMON_OPTIONS["search-index"]["args"],
+              **COMMON_OPTIONS["search-index"]["kwargs"])
 @click.option(*COMMON_OPTIONS["serve"]["args"],
               **COMMON_OPTIONS["serve"]["kwargs"])
 @click.option(*COMMON_OPTIONS["split"]["args"],
               **COMMON_OPTIONS["split"]["kwargs"])
+@click.option(*COMMON_OPTIONS["stats-format"]["args"],
+              **COMMON_OPTIONS["stats-format"]["kwargs"])
 @click.option(*COMMON_OPTIONS["template-dir"]["args"],
               **COMMON_OPTIONS["template-dir"]["kwargs"])
+@click.option(*COMMON_OPTIONS["tracking-param"]["args"],
+              **COMMON_OPTIONS["tracking-param"]["kwargs"])
 @click.option(*COMMON_OPTIONS["user-agent"]["args"],
               **COMMON_OPTIONS["user-agent"]["kwargs"])
 @click.option(*COMMON_OPTIONS["xss"]["args"],
               **COMMON_OPTIONS["xss"]["kwargs"])
 @click.argument('paths', nargs=-1, required=True)
 @click.pass_context
-def page_command(context, destination, exporter, no_stream, pack, safe, serve,
-                 split, template_dir, user_agent, xss, paths):
+def page_command(context, aggregate, baseline, baseline_tolerance, cache,
+                 canonicalize, count_ignored, dedup_bodies, destination,
+                 exporter, ignore, ignore_file, ignore_message, jobs,
+                 max_errors, max_warnings, no_stream, pack, paginate, safe,
+                 save_raw, search_index, serve, split, stats_format,
+                 template_dir, tracking_param, user_agent, xss, paths):
     """
     Validate given page paths.
 
@@ -57,6 +103,16 @@ def page_command(context, destination, exporter, no_stream, pack, safe, serve,
     """
     logger = logging.getLogger(__pkgname__)
 
+    # Turn urls into their canonical form
+    try:
+        canonicalizer = UrlCanonicalizer(rules=canonicalize,
+                                         tracking=tracking_param)
+    except HtmlCheckerBaseException as e:
+        logger.critical(e)
+        raise click.Abort()
+
+    paths = list(canonicalizer.iter_canonical(paths))
+
     # Ensure to always check a same path only once
     reduced_paths = reduce_unique(paths)
 
@@ -87,9 +143,33 @@ def page_command(context, destination, exporter, no_stream, pack, safe, serve,
     if no_stream:
         tool_options["--no-stream"] = None
 
+    if aggregate:
+        exporter_options["aggregate"] = True
+
     if template_dir:
         exporter_options["template_dir"] = template_dir
 
+    if jobs > 1:
+        exporter_options["jobs"] = jobs
+
+    if not cache:
+        exporter_options["cache"] = False
+
+    if paginate and pack:
+        exporter_options["paginate"] = True
+
+    if search_index:
+        exporter_options["search_index"] = True
+
+    if max_errors is not None:
+        exporter_options["max_errors"] = max_errors
+
+    if max_warnings is not None:
+        exporter_options["max_warnings"] = max_warnings
+
+    if any([name == "stats" for name, item in exporter]):
+        exporter_options["output_format"] = stats_format
+
     if user_agent:
         tool_options["--user-agent"] = user_agent
 
@@ -97,72 +177,138 @@ def page_command(context, destination, exporter, no_stream, pack, safe, serve,
         key = "-Xss{}".format(xss)
         interpreter_options[key] = None
 
-    # Start validator interface and exporter instance
-    v = ValidatorInterface(exception_class=CatchedException)
+    # Start validator in background to get its version, it is only waited
+    # for before the first path is built so it runs along the first
+    # validation. It is killed if command stops before
+    version_query = ValidatorInterface().query_version(interpreter_options)
+    context.call_on_close(version_query.release)
 
-    # Start exporter instance
-    exporter = get_exporter(exporter)(**exporter_options)
-    exporter_error = exporter.validate()
-    if exporter_error:
-        logger.critical(exporter_error)
+    # Compile ignore rules
+    try:
+        ignore_rules = IgnoreRules(
+            patterns=ignore,
+            messages=ignore_message,
+            filepath=ignore_file,
+            native=not count_ignored,
+        )
+    except HtmlCheckerBaseException as e:
+        logger.critical(e)
         raise click.Abort()
-    else:
-        if hasattr(exporter, "template_dir"):
-            logger.debug("Using template directory: {}".format(exporter.template_dir))
+
+    # Load baseline messages
+    if baseline:
+        try:
+            baseline = Baseline(baseline, tolerance=baseline_tolerance)
+        except HtmlCheckerBaseException as e:
+            logger.critical(e)
+            raise click.Abort()
+
+    # Start validator interface and exporter instance
+    hasher = None
+    if dedup_bodies and len(reduced_paths) > 1:
+        hasher = BodyHasher(user_agent=user_agent)
+    v = ValidatorInterface(exception_class=CatchedException, ignore=ignore_rules,
+                           hasher=hasher)
+
+    # Every exporters share metas, validator version is set once known
+    metas = get_export_metas()
+    exporter_options["metas"] = metas
+
+    # Start exporter instances
+    exporters = start_exporters(logger, exporter, exporter_options,
+                                destination=destination)
 
     # NOTE: The server could be started after exporter release but then the temporary
     # directory mode would have been to manage before exporter.
     if serve:
+        # Serve the first HTML exporter if any
+        served = exporters[0]
+        for item in exporters:
+            if item[0].FORMAT_NAME == "html":
+                served = item
+                break
+
         server = start_live_release(
             serve,
-            destination,
+            served[1],
             CHERRYPY_AVAILABLE,
-            exporter=exporter,
+            exporter=served[0],
             logger=logger,
             error_klass=click.Abort
         )
         # Assign created temporary directory as the export destination
-        destination = server.basedir
+        served[1] = server.basedir
     else:
         server = None
 
+    # Streamed documents are written as soon as their path is built
+    for item, item_destination in exporters:
+        if item_destination and item.can_stream(pack):
+            item.stream_destination = item_destination
+
     # Keep packed paths or split them depending 'split' option
     routines = [reduced_paths[:]]
     if split:
         routines = [[v] for v in reduced_paths]
 
+    # Raw results are written as soon as they are validated
+    raw = RawWriter(save_raw, metas=metas) if save_raw else None
+
     # Get report from validator process to build export
+    ignored = 0
+    deduplicated = 0
     for item in routines:
         try:
             report = v.validate(item, interpreter_options=interpreter_options,
                                 tool_options=tool_options)
-            exporter.build(report.registry)
+            update_export_version(exporters, metas, version_query)
+            if raw:
+                raw.write(report.registry)
+            registry = report.registry
+            if baseline:
+                registry = baseline.filter(registry)
+            # Ignored messages are only counted from report parsing
+            count = sum(report.ignored.values())
+            build_exporters(exporters, registry,
+                            ignored=count if count_ignored else None)
+            ignored += count
+            deduplicated += len(report.deduplicated)
         except CatchedException as e:
-            exporter.build({
+            update_export_version(exporters, metas, version_query)
+            build_exporters(exporters, {
                 "all": [{
                     "type": "critical",
                     "message": e,
                 }]
             })
 
-    # Release documents if exporter supports it
-    export = exporter.release(pack=pack)
-
-    # Some exporter like logging won't return anything to output or write
-    if export:
-        if destination:
-            # Write every document to files in destination directory
-            files = write_documents(destination, export)
-            for item in files:
-                msg = "Created file: {}"
-                logger.info(msg.format(item))
-        else:
-            # Print out document
-            for doc in export:
-                click.echo(doc["content"])
+    if raw:
+        raw.close()
+        msg = "Saved raw results for {} path(s) into: {}"
+        logger.info(msg.format(raw.count, save_raw))
+
+    if ignored:
+        logger.info("Ignored {} message(s) from ignore rules".format(ignored))
+
+    if deduplicated:
+        msg = "Reused validation for {} path(s) with identical content"
+        logger.info(msg.format(deduplicated))
+
+    if baseline:
+        msg = ("Baseline: {new} new message(s), {resolved} resolved message(s), "
+               "{known} known message(s) skipped")
+        logger.info(msg.format(**baseline.counts))
+
+    # Release documents from every exporters
+    update_export_version(exporters, metas, version_query)
+    exit_code = release_exporters(logger, exporters, pack)
 
     # Launch server if any then remove possible temporary content when server
     # has been stopped
     if server:
         server.run()
         server.flush()
+
+    # Exporter may fail the command, like from statistics thresholds
+    if exit_code:
+        context.exit(exit_code)
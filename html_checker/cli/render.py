@@ -0,0 +1,142 @@
+import logging
+
+import click
+
+from .. import __pkgname__
+from ..baseline import Baseline
+from ..exceptions import HtmlCheckerBaseException
+from ..raw import read_raw, read_raw_metas
+from .common import (
+    COMMON_OPTIONS, build_exporters, release_exporters, start_exporters
+)
+
+
+@click.command()
+@click.option(*COMMON_OPTIONS["aggregate"]["args"],
+              **COMMON_OPTIONS["aggregate"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline"]["args"],
+              **COMMON_OPTIONS["baseline"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline-tolerance"]["args"],
+              **COMMON_OPTIONS["baseline-tolerance"]["kwargs"])
+@click.option(*COMMON_OPTIONS["cache"]["args"],
+              **COMMON_OPTIONS["cache"]["kwargs"])
+@click.option(*COMMON_OPTIONS["destination"]["args"],
+              **COMMON_OPTIONS["destination"]["kwargs"])
+@click.option(*COMMON_OPTIONS["exporter"]["args"],
+              **COMMON_OPTIONS["exporter"]["kwargs"])
+@click.option("--from", "source", required=True,
+              type=click.Path(exists=True, file_okay=True, dir_okay=False),
+              metavar="FILEPATH",
+              help=("Raw validation results file as saved with '--save-raw' "
+                    "option from 'page' or 'site' commands."))
+@click.option(*COMMON_OPTIONS["jobs"]["args"],
+              **COMMON_OPTIONS["jobs"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-errors"]["args"],
+              **COMMON_OPTIONS["max-errors"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-warnings"]["args"],
+              **COMMON_OPTIONS["max-warnings"]["kwargs"])
+@click.option(*COMMON_OPTIONS["pack"]["args"],
+              **COMMON_OPTIONS["pack"]["kwargs"])
+@click.option(*COMMON_OPTIONS["paginate"]["args"],
+              **COMMON_OPTIONS["paginate"]["kwargs"])
+@click.option(*COMMON_OPTIONS["search-index"]["args"],
+              **COMMON_OPTIONS["search-index"]["kwargs"])
+@click.option(*COMMON_OPTIONS["stats-format"]["args"],
+              **COMMON_OPTIONS["stats-format"]["kwargs"])
+@click.option(*COMMON_OPTIONS["template-dir"]["args"],
+              **COMMON_OPTIONS["template-dir"]["kwargs"])
+@click.pass_context
+def render_command(context, aggregate, baseline, baseline_tolerance, cache,
+                   destination, exporter, source, jobs, max_errors,
+                   max_warnings, pack, paginate, search_index, stats_format,
+                   template_dir):
+    """
+    Render export from saved raw validation results.
+
+    Validator is never launched, exporter is fed with validation results
+    saved from a previous 'page' or 'site' command with '--save-raw' option
+    along with the date and validator version of this run. So you can render
+    another format or your template changes without validating paths again.
+    """
+    logger = logging.getLogger(__pkgname__)
+
+    logger.info("Rendering from raw results: {}".format(source))
+
+    exporter_options = {}
+
+    if aggregate:
+        exporter_options["aggregate"] = True
+
+    if template_dir:
+        exporter_options["template_dir"] = template_dir
+
+    if jobs > 1:
+        exporter_options["jobs"] = jobs
+
+    if not cache:
+        exporter_options["cache"] = False
+
+    if paginate and pack:
+        exporter_options["paginate"] = True
+
+    if search_index:
+        exporter_options["search_index"] = True
+
+    if max_errors is not None:
+        exporter_options["max_errors"] = max_errors
+
+    if max_warnings is not None:
+        exporter_options["max_warnings"] = max_warnings
+
+    if any([name == "stats" for name, item in exporter]):
+        exporter_options["output_format"] = stats_format
+
+    # Load baseline messages
+    if baseline:
+        try:
+            baseline = Baseline(baseline, tolerance=baseline_tolerance)
+        except HtmlCheckerBaseException as e:
+            logger.critical(e)
+            raise click.Abort()
+
+    # Metas come from the original run, validator version is unknown for
+    # files saved without them
+    try:
+        metas = read_raw_metas(source)
+    except HtmlCheckerBaseException as e:
+        logger.critical(e)
+        raise click.Abort()
+
+    metas.setdefault("vnu", None)
+    exporter_options["metas"] = metas
+
+    # Start exporter instances
+    exporters = start_exporters(logger, exporter, exporter_options,
+                                destination=destination)
+
+    # Streamed documents are written as soon as their path is built
+    for item, item_destination in exporters:
+        if item_destination and item.can_stream(pack):
+            item.stream_destination = item_destination
+
+    # Build export from every saved registries
+    try:
+        for registry in read_raw(source):
+            if baseline:
+                registry = baseline.filter(registry)
+            build_exporters(exporters, registry)
+    except HtmlCheckerBaseException as e:
+        logger.critical(e)
+        raise click.Abort()
+
+    if baseline:
+        msg = ("Baseline: {new} new message(s), {resolved} resolved message(s), "
+               "{known} known message(s) skipped")
+        logger.info(msg.format(**baseline.counts))
+
+    # Release documents from every exporters
+    exit_code = release_exporters(logger, exporters, pack)
+
+    # Exporter may fail the command, like from statistics thresholds
+    if exit_code:
+        context.exit(exit_code)
@@ -1,45 +1,186 @@
 import logging
 
 from collections import OrderedDict
+from datetime import datetime, timezone
 
 import click
 
 from .. import __pkgname__
+from ..baseline import Baseline
+from ..bodies import BodyHasher
+from ..canonical import UrlCanonicalizer
 from ..exceptions import HtmlCheckerUnexpectedException, HtmlCheckerBaseException
-from ..export import get_exporter
+from ..history import RunHistory
+from ..raw import RawWriter
+from ..rules import IgnoreRules
+from ..sampling import Sampler
 from ..sitemap import Sitemap
-from ..utils.documents import write_documents
-from ..utils.structures import reduce_unique
+from ..utils.pipeline import iter_batches, iter_prefetched
+from ..utils.structures import BloomFilter, DigestSet
 from ..validator import ValidatorInterface
-from .common import COMMON_OPTIONS, validate_sitemap_path
+from .common import (
+    COMMON_OPTIONS, build_exporters, get_export_metas, release_exporters,
+    start_exporters, update_export_version, validate_sitemap_path
+)
+
+
+def iter_sitemap_entries(parser, path):
+    """
+    Lazily parse unique canonical paths from a sitemap.
+
+    Arguments:
+        parser (html_checker.sitemap.Sitemap): Sitemap parser which
+            canonicalizes and deduplicates urls.
+        path (string): Sitemap file path or url.
+
+    Returns:
+        iterator: Tuples of canonical path and its last modification date
+        string from sitemap, if any.
+    """
+    for url in parser.iter_urls(path):
+        yield url, parser.lastmods.get(url)
+
+
+def log_sitemap_size(logger, size, seen):
+    """
+    Log the number of unique paths from a sitemap.
+
+    Arguments:
+        logger (logging.Logger): Logger to use.
+        size (int): Number of unique paths.
+        seen (object): Structure of already seen paths with its count of
+            ``duplicates``.
+    """
+    if seen.duplicates:
+        msg = "Sitemap have {reduced} paths (plus {tweens} ignored duplications)"
+        logger.info(msg.format(**{
+            "reduced": size,
+            "tweens": seen.duplicates,
+        }))
+    else:
+        logger.info("Sitemap have {} paths".format(size))
 
 
 @click.command()
+@click.option(*COMMON_OPTIONS["aggregate"]["args"],
+              **COMMON_OPTIONS["aggregate"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline"]["args"],
+              **COMMON_OPTIONS["baseline"]["kwargs"])
+@click.option(*COMMON_OPTIONS["baseline-tolerance"]["args"],
+              **COMMON_OPTIONS["baseline-tolerance"]["kwargs"])
+@click.option('--batch-size', type=click.IntRange(min=1), metavar="INTEGER",
+              help=("Validate sitemap urls by batches of this size as soon as "
+                    "they are parsed, instead of waiting for the whole "
+                    "sitemap. Without it every urls are kept in memory "
+                    "before validation. Ignored with '--sample' or "
+                    "'--sitemap-only' which need every urls first."))
+@click.option(*COMMON_OPTIONS["cache"]["args"],
+              **COMMON_OPTIONS["cache"]["kwargs"])
+@click.option(*COMMON_OPTIONS["canonicalize"]["args"],
+              **COMMON_OPTIONS["canonicalize"]["kwargs"])
+@click.option(*COMMON_OPTIONS["count-ignored"]["args"],
+              **COMMON_OPTIONS["count-ignored"]["kwargs"])
+@click.option('--dedup', type=click.Choice(["exact", "bloom"]),
+              default="exact", show_default=True,
+              help=("Method to ignore duplicated sitemap urls. 'exact' keeps "
+                    "a digest of about 90 bytes for each url, 'bloom' uses a "
+                    "fixed size Bloom filter which may wrongly ignore a few "
+                    "urls at the rate from '--dedup-error-rate'."))
+@click.option('--dedup-capacity', type=click.IntRange(min=1),
+              default=BloomFilter.DEFAULT_CAPACITY, show_default=True,
+              metavar="INTEGER",
+              help=("Expected maximum number of unique sitemap urls for "
+                    "'bloom' deduplication. Error rate grows quickly once it "
+                    "is exceeded."))
+@click.option('--dedup-error-rate', type=click.FloatRange(min=0, max=1,
+                                                          min_open=True,
+                                                          max_open=True),
+              default=BloomFilter.DEFAULT_ERROR_RATE, show_default=True,
+              metavar="FLOAT",
+              help="False positive rate for 'bloom' deduplication.")
+@click.option(*COMMON_OPTIONS["dedup-bodies"]["args"],
+              **COMMON_OPTIONS["dedup-bodies"]["kwargs"])
 @click.option(*COMMON_OPTIONS["destination"]["args"],
               **COMMON_OPTIONS["destination"]["kwargs"])
 @click.option(*COMMON_OPTIONS["exporter"]["args"],
               **COMMON_OPTIONS["exporter"]["kwargs"])
+@click.option('--history', type=click.Path(file_okay=False, dir_okay=True),
+              metavar="DIRECTORY",
+              help=("Directory where to record runs for incremental "
+                    "validations. Default to 'history' directory from "
+                    "application cache when '--since' or '--since-last-run' "
+                    "is used, else runs are not recorded."))
+@click.option(*COMMON_OPTIONS["ignore"]["args"],
+              **COMMON_OPTIONS["ignore"]["kwargs"])
+@click.option(*COMMON_OPTIONS["ignore-file"]["args"],
+              **COMMON_OPTIONS["ignore-file"]["kwargs"])
+@click.option(*COMMON_OPTIONS["ignore-message"]["args"],
+              **COMMON_OPTIONS["ignore-message"]["kwargs"])
+@click.option(*COMMON_OPTIONS["jobs"]["args"],
+              **COMMON_OPTIONS["jobs"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-errors"]["args"],
+              **COMMON_OPTIONS["max-errors"]["kwargs"])
+@click.option(*COMMON_OPTIONS["max-warnings"]["args"],
+              **COMMON_OPTIONS["max-warnings"]["kwargs"])
 @click.option(*COMMON_OPTIONS["no-stream"]["args"],
               **COMMON_OPTIONS["no-stream"]["kwargs"])
 @click.option(*COMMON_OPTIONS["pack"]["args"],
               **COMMON_OPTIONS["pack"]["kwargs"])
+@click.option(*COMMON_OPTIONS["paginate"]["args"],
+              **COMMON_OPTIONS["paginate"]["kwargs"])
 @click.option(*COMMON_OPTIONS["safe"]["args"],
               **COMMON_OPTIONS["safe"]["kwargs"])
+@click.option('--sample', type=click.IntRange(min=1), metavar="INTEGER",
+              help=("Cluster sitemap urls and only validate this number of "
+                    "representatives for each cluster, then estimate "
+                    "message counts for every urls. Statistics thresholds "
+                    "apply to estimated counts."))
+@click.option('--sample-by', type=click.Choice(Sampler.METHODS),
+              default="pattern", show_default=True,
+              help=("Clustering method for '--sample', either on url "
+                    "pattern or on document structure of fetched pages."))
+@click.option(*COMMON_OPTIONS["save-raw"]["args"],
+              **COMMON_OPTIONS["save-raw"]["kwargs"])
+@click.option(*COMMON_OPTIONS["search-index"]["args"],
+              **COMMON_OPTIONS["search-index"]["kwargs"])
+@click.option('--since', type=click.DateTime(), metavar="DATE",
+              help=("Only validate urls with a sitemap last modification "
+                    "date after given date, like '2024-09-09'. Results of "
+                    "other urls are carried over from recorded history."))
+@click.option('--since-last-run', is_flag=True,
+              help=("Only validate urls modified since the last recorded run "
+                    "for this sitemap. Results of other urls are carried "
+                    "over from recorded history."))
 @click.option('--sitemap-only', is_flag=True,
               help=("Download and parse given Sitemap ressource and output "
                     "informations but never try to valide its items."))
+@click.option('--sitemap-workers', type=click.IntRange(min=1), default=None,
+              metavar="INTEGER",
+              help=("Maximum number of child sitemaps fetched at the same "
+                    "time from a sitemap index. Default to 4."))
 @click.option(*COMMON_OPTIONS["split"]["args"],
               **COMMON_OPTIONS["split"]["kwargs"])
+@click.option(*COMMON_OPTIONS["stats-format"]["args"],
+              **COMMON_OPTIONS["stats-format"]["kwargs"])
 @click.option(*COMMON_OPTIONS["template-dir"]["args"],
               **COMMON_OPTIONS["template-dir"]["kwargs"])
+@click.option(*COMMON_OPTIONS["tracking-param"]["args"],
+              **COMMON_OPTIONS["tracking-param"]["kwargs"])
 @click.option(*COMMON_OPTIONS["user-agent"]["args"],
               **COMMON_OPTIONS["user-agent"]["kwargs"])
 @click.option(*COMMON_OPTIONS["xss"]["args"],
               **COMMON_OPTIONS["xss"]["kwargs"])
 @click.argument('path', required=True)
 @click.pass_context
-def site_command(context, destination, exporter, no_stream, pack, safe,
-                 sitemap_only, split, template_dir, user_agent, xss, path):
+def site_command(context, aggregate, baseline, baseline_tolerance,
+                 batch_size, cache, canonicalize, count_ignored, dedup,
+                 dedup_bodies, dedup_capacity, dedup_error_rate, destination,
+                 exporter, history, ignore, ignore_file, ignore_message, jobs,
+                 max_errors, max_warnings, no_stream, pack, paginate, safe,
+                 sample, sample_by, save_raw, search_index, since,
+                 since_last_run, sitemap_only, sitemap_workers, split,
+                 stats_format, template_dir, tracking_param, user_agent, xss,
+                 path):
     """
     Validate pages from given sitemap.
 
@@ -72,9 +213,43 @@ def site_command(context, destination, exporter, no_stream, pack, safe,
     if no_stream:
         tool_options["--no-stream"] = None
 
+    if aggregate:
+        exporter_options["aggregate"] = True
+
     if template_dir:
         exporter_options["template_dir"] = template_dir
 
+    if jobs > 1:
+        exporter_options["jobs"] = jobs
+
+    if not cache:
+        exporter_options["cache"] = False
+
+    if paginate and pack:
+        exporter_options["paginate"] = True
+
+    if search_index:
+        exporter_options["search_index"] = True
+
+    if max_errors is not None:
+        exporter_options["max_errors"] = max_errors
+
+    if max_warnings is not None:
+        exporter_options["max_warnings"] = max_warnings
+
+    if any([name == "stats" for name, item in exporter]):
+        exporter_options["output_format"] = stats_format
+
+    if sitemap_workers:
+        sitemap_options["workers"] = sitemap_workers
+
+    if since or since_last_run:
+        sitemap_options["keep_lastmod"] = True
+
+    # Run start is recorded so pages modified while validating are validated
+    # again on next run
+    started = datetime.now(timezone.utc)
+
     if user_agent:
         sitemap_options["user_agent"] = user_agent
         tool_options["--user-agent"] = user_agent
@@ -83,91 +258,285 @@ def site_command(context, destination, exporter, no_stream, pack, safe,
         key = "-Xss{}".format(xss)
         interpreter_options[key] = None
 
+    # Start validator in background to get its version, it is only waited
+    # for before the first path is built so it runs along sitemap parsing and
+    # first validation. It is killed if command stops before
+    version_query = None
+    if not sitemap_only:
+        version_query = ValidatorInterface().query_version(interpreter_options)
+        context.call_on_close(version_query.release)
+
     # Validate sitemap path
     sitemap_file_status = validate_sitemap_path(logger, path)
     if not sitemap_file_status:
         raise click.Abort()
 
-    # Open sitemap to get paths
+    # Ensure to always check a same path only once
+    if dedup == "bloom":
+        seen = BloomFilter(capacity=dedup_capacity,
+                           error_rate=dedup_error_rate)
+    else:
+        seen = DigestSet()
+
+    # Turn urls into their canonical form
     try:
-        parser = Sitemap(**sitemap_options)
-        paths = parser.get_urls(path)
+        canonicalizer = UrlCanonicalizer(rules=canonicalize,
+                                         tracking=tracking_param)
+    except HtmlCheckerBaseException as e:
+        logger.critical(e)
+        raise click.Abort()
+
+    # Open sitemap to get unique canonical paths as they are parsed
+    try:
+        parser = Sitemap(seen=seen, canonicalize=canonicalizer.canonicalize,
+                         **sitemap_options)
     except CatchedException as e:
         logger.critical(e)
         raise click.Abort()
 
-    # Ensure to always check a same path only once
-    reduced_paths = reduce_unique(paths)
+    entries = iter_sitemap_entries(parser, path)
 
-    if len(paths) > len(reduced_paths):
-        msg = "Sitemap have {reduced} paths (plus {tweens} ignored duplications)"
-        logger.info(msg.format(**{
-            "reduced": len(reduced_paths),
-            "tweens": len(paths) - len(reduced_paths),
-        }))
-    else:
-        logger.info("Sitemap have {} paths".format(len(reduced_paths)))
+    # Batches are validated while sitemap is still parsed, unless every
+    # paths are needed first
+    pipeline = batch_size and not sample and not sitemap_only
+
+    # Without pipeline, every unique paths are kept in memory along with
+    # deduplication structure
+    if not pipeline:
+        try:
+            entries = list(entries)
+        except CatchedException as e:
+            logger.critical(e)
+            raise click.Abort()
+
+        log_sitemap_size(logger, len(entries), seen)
 
     # Proceed to path validations
     if not sitemap_only:
         logger.debug("Launching validation for sitemap items")
 
+        # Compile ignore rules
+        try:
+            ignore_rules = IgnoreRules(
+                patterns=ignore,
+                messages=ignore_message,
+                filepath=ignore_file,
+                native=not count_ignored,
+            )
+        except HtmlCheckerBaseException as e:
+            logger.critical(e)
+            raise click.Abort()
+
+        # Load baseline messages
+        if baseline:
+            try:
+                baseline = Baseline(baseline, tolerance=baseline_tolerance)
+            except HtmlCheckerBaseException as e:
+                logger.critical(e)
+                raise click.Abort()
+
+        # Only validate paths modified since a date, carry over other ones
+        threshold = None
+        if history or since or since_last_run:
+            try:
+                history = RunHistory(history)
+
+                if since_last_run:
+                    threshold = history.get_last_run(path)
+                elif since:
+                    threshold = since.replace(tzinfo=timezone.utc)
+            except HtmlCheckerBaseException as e:
+                logger.critical(e)
+                raise click.Abort()
+
+        # Only validate representatives of path clusters
+        sampler = None
+        if sample:
+            sampler = Sampler(size=sample, method=sample_by,
+                              user_agent=user_agent)
+            total = len(entries)
+            selected = set(sampler.sample([item for item, _ in entries]))
+            entries = [entry for entry in entries if entry[0] in selected]
+
+            msg = ("Sample: {} representative path(s) from {} path(s) in {} "
+                   "cluster(s)")
+            logger.info(msg.format(len(entries), total,
+                                   len(sampler.clusters)))
+
         # Start validator interface
-        v = ValidatorInterface(exception_class=CatchedException)
+        hasher = BodyHasher(user_agent=user_agent) if dedup_bodies else None
+        v = ValidatorInterface(exception_class=CatchedException,
+                               ignore=ignore_rules, hasher=hasher)
 
-        # Start exporter instance
-        exporter = get_exporter(exporter)(**exporter_options)
-        exporter_error = exporter.validate()
-        if exporter_error:
-            logger.critical(exporter_error)
-            raise click.Abort()
+        # Every exporters share metas, validator version is set once known
+        metas = get_export_metas()
+        if sampler:
+            metas["sampling"] = {
+                "method": sampler.method,
+                "paths": total,
+                "sampled": len(entries),
+                "ratio": round(len(entries) / total, 4) if total else 0,
+            }
+        exporter_options["metas"] = metas
+
+        # Start exporter instances
+        exporters = start_exporters(logger, exporter, exporter_options,
+                                    destination=destination)
+
+        # Streamed documents are written as soon as their path is built
+        for item, item_destination in exporters:
+            if item_destination and item.can_stream(pack):
+                item.stream_destination = item_destination
+
+        # Paths from sitemap are consumed from a bounded queue, so parsing
+        # goes on while a batch is validated
+        if pipeline:
+            batches = iter_batches(
+                iter_prefetched(entries, maxsize=batch_size * 2),
+                batch_size
+            )
+        elif batch_size:
+            batches = iter_batches(entries, batch_size)
         else:
-            if hasattr(exporter, "template_dir"):
-                msg = "Using template directory: {}"
-                logger.debug(msg.format(exporter.template_dir))
+            batches = [entries] if entries else []
+
+        # Raw results are written as soon as they are validated
+        raw = RawWriter(save_raw, metas=metas) if save_raw else None
+        recorder = history.open_writer(path) if history else None
 
-        # Keep packed paths or split them depending 'split' option
-        routines = [reduced_paths[:]]
-        if split:
-            routines = [[v] for v in reduced_paths]
+        def export(registry, ignored=None):
+            update_export_version(exporters, metas, version_query)
+            if raw:
+                raw.write(registry)
+            if recorder:
+                recorder.write(registry)
+            if sampler:
+                sampler.add(registry)
+            if baseline:
+                registry = baseline.filter(registry)
+            build_exporters(exporters, registry, ignored=ignored)
 
         # Get report from validator process to build export
-        for item in routines:
-            try:
-                report = v.validate(item, interpreter_options=interpreter_options,
-                                    tool_options=tool_options)
-                exporter.build(report.registry)
-            except CatchedException as e:
-                exporter.build({
-                    "all": [{
-                        "type": "critical",
-                        "message": e,
-                    }]
-                })
-
-        # Release documents if exporter supports it
-        export = exporter.release(pack=pack)
-
-        # Some exporter like logging won't return anything to output or write
-        if export:
-            if destination:
-                # Write every document to files in destination directory
-                files = write_documents(destination, export)
-                for item in files:
-                    msg = "Created file: {}".format(item)
-                    logger.info(msg)
-            else:
-                # Print out document
-                for doc in export:
-                    click.echo(doc["content"])
+        ignored = 0
+        deduplicated = 0
+        parsed = 0
+        validated = 0
+        carried = 0
+        try:
+            for batch in batches:
+                parsed += len(batch)
+                paths = [item for item, _ in batch]
+
+                # Carried over results are exported as if they were validated
+                if history:
+                    try:
+                        paths, registry = history.split(
+                            path, paths, dict(batch), threshold
+                        )
+                    except HtmlCheckerBaseException as e:
+                        logger.critical(e)
+                        raise click.Abort()
+
+                    if registry:
+                        export(registry)
+                        carried += len(registry)
+
+                validated += len(paths)
+
+                # Keep packed paths or split them depending 'split' option
+                routines = [paths] if paths else []
+                if split:
+                    routines = [[v] for v in paths]
+
+                for item in routines:
+                    try:
+                        report = v.validate(
+                            item,
+                            interpreter_options=interpreter_options,
+                            tool_options=tool_options
+                        )
+                        # Ignored messages are only counted from report
+                        # parsing
+                        count = sum(report.ignored.values())
+                        export(report.registry,
+                               ignored=count if count_ignored else None)
+                        ignored += count
+                        deduplicated += len(report.deduplicated)
+                    except CatchedException as e:
+                        update_export_version(exporters, metas, version_query)
+                        build_exporters(exporters, {
+                            "all": [{
+                                "type": "critical",
+                                "message": e,
+                            }]
+                        })
+        # Sitemap errors from pipeline only occur while consuming batches
+        except CatchedException as e:
+            logger.critical(e)
+            raise click.Abort()
+
+        if pipeline:
+            log_sitemap_size(logger, parsed, seen)
+
+        if threshold:
+            msg = ("Incremental run since {}: {} path(s) validated, {} "
+                   "path(s) carried over")
+            logger.info(msg.format(threshold.isoformat(), validated, carried))
+
+        if raw:
+            raw.close()
+            msg = "Saved raw results for {} path(s) into: {}"
+            logger.info(msg.format(raw.count, save_raw))
+
+        if recorder:
+            history.record(path, started, recorder)
+            msg = "Recorded run for {} path(s) into history: {}"
+            logger.info(msg.format(recorder.count, history.dirpath))
+
+        if ignored:
+            msg = "Ignored {} message(s) from ignore rules"
+            logger.info(msg.format(ignored))
+
+        if deduplicated:
+            msg = "Reused validation for {} path(s) with identical content"
+            logger.info(msg.format(deduplicated))
+
+        if sampler:
+            estimates = sampler.get_estimates()
+            msg = ("Cluster '{key}': {size} path(s), {sampled} sampled, about "
+                   "{errors} error(s) and {warnings} warning(s)")
+            for item in estimates["clusters"]:
+                logger.debug(msg.format(**item))
+
+            msg = ("Estimated from sample for {} path(s): {} error(s), {} "
+                   "warning(s)")
+            logger.info(msg.format(total, estimates["errors"],
+                                   estimates["warnings"]))
+
+            # Statistics and their thresholds cover every paths
+            for item, _ in exporters:
+                item.add_estimates(estimates)
+
+        if baseline:
+            msg = ("Baseline: {new} new message(s), {resolved} resolved "
+                   "message(s), {known} known message(s) skipped")
+            logger.info(msg.format(**baseline.counts))
+
+        # Release documents from every exporters
+        update_export_version(exporters, metas, version_query)
+        exit_code = release_exporters(logger, exporters, pack)
+
+        # Exporter may fail the command, like from statistics thresholds
+        if exit_code:
+            context.exit(exit_code)
     # Don't valid anything just list paths
     else:
         logger.debug("Listing available paths from sitemap")
 
         # Count digits from total path counter
-        digits = len(str(len(reduced_paths)))
+        digits = len(str(len(entries)))
 
-        for i, item in enumerate(reduced_paths, start=1):
+        for i, (item, _) in enumerate(entries, start=1):
             # Justify indice number with zero(s)
             indice = str(i).rjust(digits, "0")
             logger.info("{}) {}".format(indice, item))
@@ -29,6 +29,20 @@ class ExportError(HtmlCheckerBaseException):
     pass
 
 
+class BaselineInvalidError(HtmlCheckerBaseException):
+    """
+    Exception to be raised when a baseline file is invalid.
+    """
+    pass
+
+
+class HistoryInvalidError(HtmlCheckerBaseException):
+    """
+    Exception to be raised when run history is invalid.
+    """
+    pass
+
+
 class PathInvalidError(HtmlCheckerBaseException):
     """
     Exception to be raised when given path is invalid.
@@ -44,6 +58,13 @@ class ReportError(HtmlCheckerBaseException):
     pass
 
 
+class RuleInvalidError(HtmlCheckerBaseException):
+    """
+    Exception to be raised when an ignore rule is invalid.
+    """
+    pass
+
+
 class SitemapInvalidError(HtmlCheckerBaseException):
     """
     Exception to be raised when sitemap ressource is invalid.
@@ -1,16 +1,20 @@
 from ..exceptions import ExportError
 from .logs import LoggingExport
 from .json import JsonExport
+from .jsonl import JsonLinesExport
+from .stats import StatsExport
 
 # We do not expose base exporters which have no specific format and able to
 # build something concrete
 __all__ = [
     "LoggingExport",
     "JsonExport",
+    "JsonLinesExport",
+    "StatsExport",
 ]
 
 
-EXPORTER_CHOICES = ["logging", "json"]
+EXPORTER_CHOICES = ["logging", "json", "jsonl", "stats"]
 
 
 # Enable HTML format if Jinja is installed
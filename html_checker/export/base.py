@@ -2,6 +2,7 @@ import json
 import logging
 
 from ..exceptions import ExportError
+from ..utils.texts import NO_REPORT_MESSAGE
 from .. import __pkgname__
 
 
@@ -15,8 +16,16 @@ class ExporterBase(object):
     documentation:
 
         https://github.com/validator/validator/wiki/Output-%C2%BB-JSON
+
+    Attributes:
+        STREAMABLE (bool): Define if exporter supports streaming mode where
+            report documents are written during build.
+        NO_REPORT_MESSAGE (string): Message for a path without any message
+            from validator.
     """
     FORMAT_NAME = None
+    STREAMABLE = False
+    NO_REPORT_MESSAGE = NO_REPORT_MESSAGE
     # Required to be paste in every exporter class
     klassname = __qualname__  # noqa: F821
 
@@ -110,12 +119,46 @@ class ExporterBase(object):
             self.log.info(path)
 
             if not messages:
-                self.log.debug("There was not any log report for this path.")
+                self.log.debug(self.NO_REPORT_MESSAGE)
                 continue
 
             for row in messages:
                 level, row = self.parse_row_level(path, row)
 
+    def add_ignored(self, count):
+        """
+        Add a number of messages ignored from ignore rules to statistics.
+
+        This base method does not keep any statistics.
+
+        Arguments:
+            count (int): Number of ignored messages.
+        """
+        pass
+
+    def update_metas(self, metas):
+        """
+        Update export metas, like with validator version once it is known.
+
+        This base method does not keep any metas.
+
+        Arguments:
+            metas (dict): Metas to update.
+        """
+        pass
+
+    def add_estimates(self, estimates):
+        """
+        Set message totals estimated from a sample to statistics.
+
+        This base method does not keep any statistics.
+
+        Arguments:
+            estimates (dict): Estimates as returned from
+                ``html_checker.sampling.Sampler.get_estimates``.
+        """
+        pass
+
     def validate(self):
         """
         A validation method for some exporter which needs to validate some
@@ -126,6 +169,28 @@ class ExporterBase(object):
         """
         return False
 
+    def can_stream(self, pack):
+        """
+        Define if exporter would work in streaming mode for given pack mode.
+
+        Arguments:
+            pack (bool): Pack mode as given to release.
+
+        Returns:
+            bool: True if exporter supports streaming and export is not packed.
+        """
+        return self.STREAMABLE and not pack
+
+    def get_exit_code(self):
+        """
+        Return exit code for the command once export has been released. This
+        base method never fails.
+
+        Returns:
+            int: Exit code, ``0`` for success.
+        """
+        return 0
+
     def release(self, *args, **kwargs):
         """
         Release export.
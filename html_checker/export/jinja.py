@@ -1,13 +1,101 @@
 import io
+import json
+import multiprocessing
 import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import (
+    Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+)
 
 import html_checker
+from ..exceptions import ExportError
+from ..utils.documents import write_documents
+from ..utils.paths import get_cache_dir, get_path_key
+from ..utils.search import SearchIndex
+from ..utils.structures import merge_compute
 from .render import ExporterRenderer
 from .jinja_filters import highlight_html_filter
 
 
+# Jinja environment of a rendering worker process
+WORKER_STATE = {}
+
+
+def build_jinjaenv(template_dir, cache_dir=None):
+    """
+    Start Jinja environment.
+
+    Arguments:
+        template_dir (string): Path to directory which contains template files.
+
+    Keyword Arguments:
+        cache_dir (string): Path to directory where to store compiled templates
+            bytecode. A template bytecode is only used as long as its source
+            is unchanged. Default to ``None`` which disables bytecode cache.
+
+    Returns:
+        jinja2.Environment: Initialized Jinja environment.
+    """
+    bytecode_cache = None
+    if cache_dir:
+        bytecode_cache = FileSystemBytecodeCache(directory=cache_dir)
+
+    env = Environment(
+        loader=FileSystemLoader(template_dir),
+        autoescape=select_autoescape(["html", "xml"]),
+        bytecode_cache=bytecode_cache,
+    )
+
+    # Add internal filters
+    env.filters["highlight_html"] = highlight_html_filter
+
+    return env
+
+
+def init_render_worker(template_dir, cache_dir=None):
+    """
+    Initialize a rendering worker process with its own Jinja environment.
+
+    Arguments:
+        template_dir (string): Path to directory which contains template files.
+
+    Keyword Arguments:
+        cache_dir (string): Path to directory where to store compiled templates
+            bytecode.
+    """
+    WORKER_STATE["env"] = build_jinjaenv(template_dir, cache_dir=cache_dir)
+
+
+def render_worker(template_name, context, destination=None):
+    """
+    Render a document from a worker process.
+
+    Arguments:
+        template_name (string): Template path to render.
+        context (dict): Document context as returned from ``modelize_***``
+            methods.
+
+    Keyword Arguments:
+        destination (string): If given, rendered document is directly written
+            into this directory.
+
+    Returns:
+        object: List of written file paths if a destination has been given,
+        else the rendered content string.
+    """
+    template = WORKER_STATE["env"].get_template(template_name)
+    content = template.render(**{"export": context["context"]})
+
+    if destination:
+        return write_documents(destination, [{
+            "document": context["document"],
+            "content": content,
+        }])
+
+    return content
+
+
 class JinjaExport(ExporterRenderer):
     """
     Exporter with Jinja to produce an HTML report.
@@ -15,12 +103,38 @@ class JinjaExport(ExporterRenderer):
     Keyword Arguments:
         template_dir (string): Path to directory which contains template files.
             Default to ``templates`` application directory.
+        jobs (int): Number of worker processes to render report documents for
+            unpacked release. Each worker has its own Jinja environment and
+            directly writes documents in streaming mode. Default to ``1``
+            which renders everything from the current process.
+        cache (bool): Enable persistent cache of compiled templates. Cache is
+            stored in application cache directory with a distinct directory
+            for each template directory. Default to ``True``.
+        paginate (bool): Enable paginated audit for packed release. Audit
+            index only contains path statistics and is splitted into pages,
+            each path messages are written in a distinct shard script which is
+            loaded on demand from the index. In streaming mode, shards are
+            written as soon as their path is built. Since path messages only
+            go to shards, release must be packed. Default to ``False``.
+        search_index (bool): Enable search index of message templates and path
+            names. Index is filled while paths are built and released as a
+            script document queried from a search box in audit and summary
+            pages. Default to ``False``.
 
     Attributes:
         TEMPLATES (dict): Each item is an available template where item key is
             the document kind (as given in render context in 'modelize_***'
             methods) and item value the template relative path from template
             directory.
+        OPTIONAL_TEMPLATES (dict): Templates which are only required when
+            a feature is enabled, item key is the template name from
+            ``TEMPLATES`` and item value the attribute name which enable the
+            feature.
+        PARALLEL_KINDS (list): Document kinds which are rendered from worker
+            processes when there is more than one job.
+        PAGINATE_BY (int): Number of paths for each page of paginated audit.
+        SEARCH_KINDS (list): Document kinds which include the search box when
+            search index is enabled.
     """
     klassname = __qualname__  # noqa: F821
     FORMAT_NAME = "html"
@@ -30,13 +144,29 @@ class JinjaExport(ExporterRenderer):
         "audit": "audit.html",
         "summary": "summary.html",
         "report": "report.html",
+        "paginated": "paginated.html",
+        "search": "fragments/search.html",
+        "rules": "rules.html",
+    }
+    OPTIONAL_TEMPLATES = {
+        "paginated": "paginate",
+        "search": "search_index",
+        "rules": "aggregate",
     }
     DOCUMENT_FILENAMES = {
         "stylesheet": "main.css",
         "audit": "index.html",
         "summary": "index.html",
         "report": "path-{}.html",
+        "paginated": "index.html",
+        "page": "index-{}.html",
+        "shard": "shards/path-{}.js",
+        "search": "search-index.js",
+        "rules": "rules.html",
     }
+    PARALLEL_KINDS = ["report"]
+    PAGINATE_BY = 500
+    SEARCH_KINDS = ["audit", "summary", "paginated"]
 
     def __init__(self, *args, **kwargs):
         template_dir = os.path.abspath(
@@ -46,10 +176,19 @@ class JinjaExport(ExporterRenderer):
             )
         )
         self.template_dir = kwargs.pop("template_dir", None) or template_dir
-        self.jinja_env = self.get_jinjaenv()
+        self.jobs = kwargs.pop("jobs", None) or 1
+        self.cache = kwargs.pop("cache", True)
+        self.paginate = kwargs.pop("paginate", False)
+        self.search_index = kwargs.pop("search_index", False)
+        self.search = SearchIndex() if self.search_index else None
+        self.pool = None
+        self.pending = []
 
         super().__init__(*args, **kwargs)
 
+        self.cache_dir = self.get_cache_dir() if self.cache else None
+        self.jinja_env = self.get_jinjaenv()
+
     def validate(self):
         """
         Ensure template directory is valid.
@@ -66,6 +205,10 @@ class JinjaExport(ExporterRenderer):
         missing_files = []
 
         for name in sorted(self.TEMPLATES.keys()):
+            if name in self.OPTIONAL_TEMPLATES:
+                if not getattr(self, self.OPTIONAL_TEMPLATES[name]):
+                    continue
+
             path = self.TEMPLATES[name]
             if not os.path.exists(os.path.join(self.template_dir, path)):
                 missing_files.append(path)
@@ -76,6 +219,25 @@ class JinjaExport(ExporterRenderer):
 
         return False
 
+    def get_cache_dir(self):
+        """
+        Return and create the bytecode cache directory for template directory.
+
+        Returns:
+            string: Path to cache directory or ``None`` if it can not be
+            created.
+        """
+        path = get_cache_dir("jinja", get_path_key(self.template_dir))
+
+        try:
+            os.makedirs(path, exist_ok=True)
+        except OSError as e:
+            msg = "Unable to create template cache directory: {}"
+            self.log.debug(msg.format(e))
+            return None
+
+        return path
+
     def get_jinjaenv(self):
         """
         Start Jinja environment.
@@ -83,15 +245,29 @@ class JinjaExport(ExporterRenderer):
         Returns:
             jinja2.Environment: Initialized Jinja environment.
         """
-        env = Environment(
-            loader=FileSystemLoader(self.template_dir),
-            autoescape=select_autoescape(["html", "xml"])
-        )
+        return build_jinjaenv(self.template_dir, cache_dir=self.cache_dir)
+
+    def get_pool(self):
+        """
+        Return the pool of rendering worker processes, it is started on first
+        call.
 
-        # Add internal filters
-        env.filters["highlight_html"] = highlight_html_filter
+        Workers are spawned instead of forked since threads may be running
+        at this time, like sitemap prefetching or body hashing, and a forked
+        child may inherit their locks in a held state.
+
+        Returns:
+            concurrent.futures.ProcessPoolExecutor: Pool of worker processes.
+        """
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_render_worker,
+                initargs=(self.template_dir, self.cache_dir),
+            )
 
-        return env
+        return self.pool
 
     def get_template(self, filepath):
         """
@@ -108,20 +284,37 @@ class JinjaExport(ExporterRenderer):
 
     def render(self, context):
         """
-        Render document to JSON.
+        Render document to HTML.
 
-        Rendered document is serialized to JSON string inside ``content``
-        item in document dict.
+        Rendered document is inside ``content`` item in document dict. When
+        there is more than one job, documents of kinds from ``PARALLEL_KINDS``
+        are submitted to worker processes and their rendering is a future
+        object inside ``future`` item.
 
         Arguments:
             context (dict): Document context as returned from
                 ``modelize_***`` methods.
 
         Returns:
-            dict: The document ``context`` with its serialization inside
-            ``content`` item.
+            dict: The document ``context`` with its rendering inside
+            ``content`` or ``future`` item.
         """
         template_name = self.TEMPLATES[context["context"]["kind"]]
+
+        if self.search is not None and context["context"]["kind"] in self.SEARCH_KINDS:
+            context["context"]["search"] = self.DOCUMENT_FILENAMES["search"]
+
+        if self.jobs > 1 and context["context"]["kind"] in self.PARALLEL_KINDS:
+            return {
+                "document": context["document"],
+                "future": self.get_pool().submit(
+                    render_worker,
+                    template_name,
+                    context,
+                    destination=self.stream_destination,
+                ),
+            }
+
         document = self.get_template(template_name)
 
         return {
@@ -129,12 +322,309 @@ class JinjaExport(ExporterRenderer):
             "content": document.render(**{"export": context["context"]}),
         }
 
+    def build_path(self, path, messages):
+        """
+        Add built path to search index if enabled.
+        """
+        name, data = super().build_path(path, messages)
+
+        if self.search is not None:
+            self.search.add(name, data["messages"])
+
+        return name, data
+
+    def get_search_targets(self, pack):
+        """
+        Return link of each path document for search index.
+
+        Arguments:
+            pack (bool): Pack mode as given to release.
+
+        Returns:
+            list: Document links in the same order than paths.
+        """
+        targets = []
+
+        for i, context in enumerate(self.store["reports"], start=1):
+            name, data = context
+            if pack and self.paginate:
+                page = (i - 1) // self.PAGINATE_BY + 1
+                target = "{}#path-{}".format(self.get_page_filepath(page), i)
+            elif pack:
+                target = "{}#path-{}".format(self.DOCUMENT_FILENAMES["audit"], i)
+            else:
+                target = self.get_report_filepath(i, name, data)
+            targets.append(target)
+
+        return targets
+
+    def modelize_search_index(self, document_path, pack):
+        """
+        Make the search index document.
+
+        Arguments:
+            document_path (string): Filepath for document to write.
+            pack (bool): Pack mode as given to release.
+
+        Returns:
+            dict: Rendered document.
+        """
+        return {
+            "document": document_path,
+            "content": self.search.dump(self.get_search_targets(pack)),
+        }
+
+    def wait_pending(self, limit=0):
+        """
+        Wait for documents written from worker processes until there is no
+        more than given limit of pending documents.
+
+        Keyword Arguments:
+            limit (int): Maximum number of pending documents to keep.
+        """
+        while len(self.pending) > limit:
+            done, not_done = wait(self.pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                for item in future.result():
+                    self.log.info("Created file: {}".format(item))
+
+            self.pending = list(not_done)
+
+    def write_document(self, document):
+        """
+        Write a document into the stream destination directory.
+
+        Document rendered from a worker process has already been written by
+        the worker, it is only awaited to limit the number of pending
+        documents.
+
+        Arguments:
+            document (dict): Rendered document.
+        """
+        if "future" not in document:
+            return super().write_document(document)
+
+        self.pending.append(document["future"])
+        self.wait_pending(limit=self.jobs * 2)
+
+    def can_stream(self, pack):
+        """
+        Paginated audit is streamed even if it is packed.
+        """
+        if pack and self.paginate:
+            return True
+
+        return super().can_stream(pack)
+
+    def get_page_filepath(self, page):
+        """
+        Return filepath for a paginated audit page document.
+
+        Arguments:
+            page (int): Page number, starting from 1.
+
+        Returns:
+            string: Document filepath.
+        """
+        if page == 1:
+            return self.DOCUMENT_FILENAMES["paginated"]
+
+        return self.DOCUMENT_FILENAMES["page"].format(page)
+
+    def modelize_shard(self, document_path, i, context):
+        """
+        Make a shard document of path messages for paginated audit.
+
+        Shard is a script which calls function ``htmlCheckerShard`` with the
+        path id and its messages, so it can be loaded from a page opened from
+        file system.
+
+        Arguments:
+            document_path (string): Filepath for document to write.
+            i (int): Path id.
+            context (tuple): Path report item with name and data.
+
+        Returns:
+            dict: Rendered document.
+        """
+        name, data = context
+
+        payload = json.dumps(
+            {"name": name, "messages": data["messages"]},
+            separators=(",", ":"),
+            default=str
+        )
+
+        return {
+            "document": document_path,
+            "content": "htmlCheckerShard({}, {});\n".format(i, payload),
+        }
+
+    def modelize_paginated_audit(self, context, metas=None, statistics=None):
+        """
+        Make paginated audit documents.
+
+        Each page display the global statistics and a part of path list with
+        their statistics.
+
+        Arguments:
+            context (list): Path report items with name and data.
+
+        Keyword Arguments:
+            metas (dict): Export metas.
+            statistics (dict): Global statistics. If not given, they are
+                computed from path statistics.
+
+        Returns:
+            list: Rendered page documents.
+        """
+        global_stats = {}
+        paths = []
+
+        for i, item in enumerate(context, start=1):
+            name, data = item
+            if statistics is None:
+                global_stats = merge_compute(data["statistics"], global_stats)
+            paths.append({
+                "id": i,
+                "name": name,
+                "shard": self.DOCUMENT_FILENAMES["shard"].format(i),
+                "statistics": data["statistics"],
+            })
+
+        pages = max(1, -(-len(paths) // self.PAGINATE_BY))
+
+        documents = []
+        for page in range(1, pages + 1):
+            start = (page - 1) * self.PAGINATE_BY
+
+            documents.append(self.render({
+                "document": self.get_page_filepath(page),
+                "context": {
+                    "kind": "paginated",
+                    "metas": metas or {},
+                    "statistics": (
+                        global_stats if statistics is None else statistics
+                    ),
+                    "path_count": len(paths),
+                    "paths": paths[start:start + self.PAGINATE_BY],
+                    "page": page,
+                    "pages": pages,
+                    "previous": (
+                        self.get_page_filepath(page - 1) if page > 1 else None
+                    ),
+                    "next": (
+                        self.get_page_filepath(page + 1) if page < pages else None
+                    ),
+                },
+            }))
+
+        return documents
+
+    def stream_report(self, context):
+        """
+        For paginated audit, write path shard instead of report document.
+
+        Arguments:
+            context (tuple): Path report item with name and data.
+        """
+        if not self.paginate:
+            return super().stream_report(context)
+
+        i = len(self.store["reports"]) + 1
+        name, data = context
+
+        self.write_document(self.modelize_shard(
+            self.DOCUMENT_FILENAMES["shard"].format(i),
+            i,
+            context
+        ))
+
+        self.store["reports"].append((
+            name,
+            {"statistics": data["statistics"]},
+        ))
+
+    def release_paginated(self):
+        """
+        Make paginated audit documents.
+
+        Returns:
+            list: Shard documents for paths which have not been streamed then
+            page documents and finally the rules document if aggregation is
+            enabled.
+        """
+        documents = []
+
+        for i, context in enumerate(self.store["reports"], start=1):
+            name, data = context
+            if "messages" in data:
+                documents.append(self.modelize_shard(
+                    self.DOCUMENT_FILENAMES["shard"].format(i),
+                    i,
+                    context
+                ))
+
+        documents.extend(self.modelize_paginated_audit(
+            self.store["reports"],
+            self.store["metas"],
+            statistics=self.get_statistics()
+        ))
+
+        if self.aggregate:
+            documents.append(self.modelize_rules(
+                self.DOCUMENT_FILENAMES["rules"],
+                self.store["rules"],
+                self.store["metas"]
+            ))
+
+        return documents
+
     def release(self, *args, **kwargs):
         """
         Override original method to include 'stylesheet' document which is the
-        CSS stylesheet used from templates.
+        CSS stylesheet used from templates and the search index document if
+        enabled.
+
+        Documents rendered from worker processes are awaited and the worker
+        pool is shutdown.
+
+        Raises:
+            html_checker.exceptions.ExportError: If paginated audit is enabled
+                for an unpacked release, since path messages have only been
+                kept for shards.
         """
-        documents = super().release(*args, **kwargs)
+        pack = kwargs.get("pack", False)
+
+        if self.paginate and not pack:
+            raise ExportError(
+                "Paginated audit is only available for packed release."
+            )
+
+        self.wait_pending()
+
+        documents = []
+        if pack and self.paginate:
+            documents = self.release_paginated()
+        else:
+            for item in super().release(*args, **kwargs):
+                if "future" in item:
+                    item = {
+                        "document": item["document"],
+                        "content": item["future"].result(),
+                    }
+                documents.append(item)
+
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+        if self.search is not None:
+            documents.append(self.modelize_search_index(
+                self.DOCUMENT_FILENAMES["search"],
+                pack
+            ))
 
         stylesheet_path = os.path.join(self.template_dir, self.TEMPLATES["stylesheet"])
         with io.open(stylesheet_path, "r") as fp:
@@ -11,13 +11,19 @@ class JsonExport(ExporterRenderer):
         indent (integer): JSON indentation length. Default is 4 spaces, set it
             to 0 for no indentation but keeping newline or ``None`` for oneline
             without spaces or newlines.
+
+    Attributes:
+        STREAMED_KINDS (list): Document kinds which are encoded on the fly while
+            they are written instead of being serialized to a string.
     """
     klassname = __qualname__  # noqa: F821
     FORMAT_NAME = "json"
+    STREAMED_KINDS = ["audit"]
     DOCUMENT_FILENAMES = {
         "audit": "audit.json",
         "summary": "summary.json",
         "report": "path-{}.json",
+        "rules": "rules.json",
     }
 
     def __init__(self, *args, **kwargs):
@@ -30,7 +36,9 @@ class JsonExport(ExporterRenderer):
         Render document to JSON.
 
         Rendered document is serialized to JSON string inside ``content``
-        item in document dict.
+        item in document dict. For document kinds from ``STREAMED_KINDS``,
+        serialization is an iterator of encoded chunks inside ``chunks`` item
+        so document is never fully serialized in memory.
 
         Arguments:
             context (dict): Document context as returned from
@@ -38,8 +46,16 @@ class JsonExport(ExporterRenderer):
 
         Returns:
             dict: The document ``context`` with its serialization inside
-            ``content`` item.
+            ``content`` or ``chunks`` item.
         """
+        if context["context"].get("kind") in self.STREAMED_KINDS:
+            encoder = json.JSONEncoder(indent=self.indent, default=str)
+
+            return {
+                "document": context["document"],
+                "chunks": encoder.iterencode(context["context"]),
+            }
+
         return {
             "document": context["document"],
             "content": json.dumps(context["context"], indent=self.indent,
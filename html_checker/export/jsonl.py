@@ -0,0 +1,142 @@
+import io
+import json
+import os
+import sys
+
+from ..utils.paths import resolve_paths
+from .render import ExporterRenderer
+
+
+class JsonLinesExport(ExporterRenderer):
+    """
+    Exporter to produce reports as JSON Lines.
+
+    Each path report is written as a compact JSON object on its own line as
+    soon as path has been built, nothing is retained except statistics from
+    statistics engine. Once released a last line is written with global statistics.
+
+    Every line object has a ``kind`` item which is ``report`` for path lines
+    and ``summary`` for the last line. With aggregation enabled, a line of
+    kind ``rule`` is written for each rule before the summary line.
+
+    There is no packed or unpacked mode, lines are written to standard output
+    or in a single ``audit.jsonl`` file in stream destination if any.
+
+    Keyword Arguments:
+        output (object): File object to write lines to. Default to standard
+            output if there is no stream destination.
+    """
+    klassname = __qualname__  # noqa: F821
+    FORMAT_NAME = "jsonl"
+    DOCUMENT_FILENAMES = {
+        "audit": "audit.jsonl",
+    }
+
+    def __init__(self, *args, **kwargs):
+        self.output = kwargs.pop("output", None)
+        self.opened = None
+
+        super().__init__(*args, **kwargs)
+
+        self.store["paths"] = 0
+
+    def can_stream(self, pack):
+        """
+        Lines are always streamed whatever pack mode is.
+        """
+        return True
+
+    def get_output(self):
+        """
+        Return file object where to write lines.
+
+        If there is a stream destination, the audit file is created on first
+        call, along with destination directory if it does not exist yet.
+        Else it fallbacks to standard output.
+
+        Returns:
+            object: File object.
+        """
+        if self.output is not None:
+            return self.output
+
+        if self.stream_destination:
+            if self.opened is None:
+                destination = resolve_paths(
+                    self.stream_destination,
+                    self.DOCUMENT_FILENAMES["audit"]
+                )
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                self.opened = io.open(destination, "w")
+                self.log.info("Created file: {}".format(destination))
+
+            return self.opened
+
+        return sys.stdout
+
+    def write_line(self, payload):
+        """
+        Write payload as a compact JSON line.
+
+        Arguments:
+            payload (dict): Object to serialize.
+        """
+        output = self.get_output()
+        output.write(
+            json.dumps(payload, separators=(",", ":"), default=str) + "\n"
+        )
+        output.flush()
+
+    def build(self, report):
+        """
+        Write a line for every reported paths.
+
+        Arguments:
+            report (dict): A dict of path messages, each item key is a path and
+                item value is a list of dictionnaries (each dict is a message
+                row).
+        """
+        for path, messages in report.items():
+            # Notify each path in progress to logger
+            self.log.info(path)
+
+            name, data = self.build_path(path, messages)
+
+            self.store["paths"] += 1
+            self.statistics.add(name, data)
+
+            if self.aggregate:
+                self.aggregate_path(self.store["paths"], (name, data))
+
+            self.write_line({
+                "kind": "report",
+                "name": name,
+                "statistics": data["statistics"],
+                "messages": data["messages"],
+            })
+
+    def release(self, *args, **kwargs):
+        """
+        Write the rule lines if aggregation is enabled then the summary line
+        with global statistics.
+
+        Returns:
+            list: Always an empty list since lines have already been written.
+        """
+        if self.aggregate:
+            rules = self.modelize_rules(None, self.store["rules"])
+            for rule in rules["context"]["rules"]:
+                self.write_line(dict({"kind": "rule"}, **rule))
+
+        self.write_line({
+            "kind": "summary",
+            "metas": self.store["metas"],
+            "paths": self.store["paths"],
+            "statistics": self.statistics.get_totals(),
+        })
+
+        if self.opened is not None:
+            self.opened.close()
+            self.opened = None
+
+        return []
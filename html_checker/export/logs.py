@@ -105,7 +105,7 @@ class LoggingExport(ExporterBase):
             self.log.info(path)
 
             if not messages:
-                self.log.debug("There was not any log report for this path.")
+                self.log.debug(self.NO_REPORT_MESSAGE)
                 continue
 
             for row in messages:
@@ -1,8 +1,14 @@
 import datetime
+from collections import OrderedDict
 
 import html_checker
+from ..statistics import StatisticsEngine
 from ..utils.commands import get_vnu_version
+from ..utils.documents import write_documents
 from ..utils.structures import merge_compute
+from ..utils.texts import (
+    is_no_report_row, message_fingerprint, normalize_message
+)
 from .base import ExporterBase
 
 
@@ -16,28 +22,56 @@ class ExporterRenderer(ExporterBase):
     Also it compute some statistic about messages and include them in builded
     context.
 
+    Keyword Arguments:
+        stream_destination (string): Directory path where to write report
+            documents. If given, exporter works in streaming mode where each
+            report document is rendered and written as soon as its path has
+            been built, then only its statistics are kept for the summary.
+            Streaming mode is only relevant for unpacked release.
+        aggregate (bool): Enable aggregation of messages by rule. Each distinct
+            rule is stored once with its affected paths and message positions,
+            then released in a ``rules`` document. Default to ``False``.
+        metas (dict): Export metas to use instead of the default ones, like
+            from a previous run. Validator is only executed to get its version
+            if there is no ``vnu`` item.
+
     Attributes:
         store (dict): A dictionnary which contain report contents to
-            export. It will be filled during build process.
+            export. It will be filled during build process. With aggregation
+            enabled, item ``rules`` holds rules indexed on their fingerprint.
+        statistics (html_checker.statistics.StatisticsEngine): Statistics
+            updated for each built path.
     """
     klassname = __qualname__  # noqa: F821
     FORMAT_NAME = None
+    STREAMABLE = True
     DOCUMENT_FILENAMES = {
         "audit": "audit.txt",
         "summary": "summary.txt",
         "report": "path-{}.txt",
+        "rules": "rules.txt",
     }
 
     def __init__(self, *args, **kwargs):
+        self.stream_destination = kwargs.pop("stream_destination", None)
+        self.aggregate = kwargs.pop("aggregate", False)
+        metas = kwargs.pop("metas", None) or {}
+
         # Initial global context
         self.store = {
             "metas": {
                 "created": datetime.datetime.now(),
                 "generator": html_checker.__version__,
-                "vnu": get_vnu_version(),
             },
             "reports": [],
         }
+        self.store["metas"].update(metas)
+        if "vnu" not in self.store["metas"]:
+            self.store["metas"]["vnu"] = get_vnu_version()
+        if self.aggregate:
+            self.store["rules"] = OrderedDict()
+
+        self.statistics = StatisticsEngine()
 
         super().__init__(*args, **kwargs)
 
@@ -90,6 +124,97 @@ class ExporterRenderer(ExporterBase):
 
         return stats
 
+    def build_path(self, path, messages):
+        """
+        Build context for a reported path.
+
+        Arguments:
+            path (string): Reported path.
+            messages (list): List of message dictionnaries, can be empty or
+                ``None`` if validator did not report anything for the path.
+
+        Returns:
+            tuple: Path context datas as a tuple of path and its data with
+            messages and statistics.
+        """
+        rows = []
+        stats = {
+            "debugs": 0,
+            "errors": 0,
+            "infos": 0,
+            "warnings": 0,
+        }
+
+        if not messages:
+            row = {
+                "type": "debug",
+                "message": self.NO_REPORT_MESSAGE,
+            }
+            stats = self.compute_row_stats(stats, row)
+            rows.append(row)
+        else:
+            for row in messages:
+                context = self.format_row(path, row)
+                stats = self.compute_row_stats(stats, row)
+                rows.append(context)
+
+        return (
+            path,
+            {
+                "messages": rows,
+                "statistics": stats,
+            },
+        )
+
+    def aggregate_path(self, i, context):
+        """
+        Aggregate path messages into rules.
+
+        Messages are grouped on their fingerprint, a rule only keeps the first
+        encountered message text, its template and for each affected path its
+        id, name and message positions. Placeholder row of a path without any
+        message is not a rule.
+
+        Arguments:
+            i (int): Path id, its position in building loop.
+            context (tuple): Path report item with name and data.
+        """
+        name, data = context
+
+        for row in data["messages"]:
+            if is_no_report_row(row):
+                continue
+
+            fingerprint = message_fingerprint(row["type"], row["message"])
+
+            rule = self.store["rules"].get(fingerprint)
+            if rule is None:
+                rule = self.store["rules"][fingerprint] = {
+                    "fingerprint": fingerprint,
+                    "type": row["type"],
+                    "template": normalize_message(row["message"]),
+                    "message": str(row["message"]),
+                    "count": 0,
+                    "paths": [],
+                }
+
+            rule["count"] += 1
+
+            # Share the same string object between identical messages
+            if row["message"] == rule["message"]:
+                row["message"] = rule["message"]
+
+            # Paths are built in order so a path can only be the last one
+            if not rule["paths"] or rule["paths"][-1]["id"] != i:
+                rule["paths"].append({"id": i, "name": name, "positions": []})
+
+            source = row.get("source") or {}
+            if "linestart" in source:
+                rule["paths"][-1]["positions"].append({
+                    "line": source["linestart"],
+                    "column": source["colstart"],
+                })
+
     def build(self, report):
         """
         Build context to pass to template rendering for every reported paths.
@@ -103,35 +228,78 @@ class ExporterRenderer(ExporterBase):
             # Notify each path in progress to logger
             self.log.info(path)
 
-            rows = []
-            stats = {
-                "debugs": 0,
-                "errors": 0,
-                "infos": 0,
-                "warnings": 0,
-            }
+            context = self.build_path(path, messages)
 
-            if not messages:
-                row = {
-                    "type": "debug",
-                    "message": "There was not any log report for this path.",
-                }
-                stats = self.compute_row_stats(stats, row)
-                rows.append(row)
+            self.statistics.add(*context)
+
+            if self.aggregate:
+                self.aggregate_path(len(self.store["reports"]) + 1, context)
+
+            if self.stream_destination:
+                self.stream_report(context)
             else:
-                for row in messages:
-                    context = self.format_row(path, row)
-                    stats = self.compute_row_stats(stats, row)
-                    rows.append(context)
-
-            # Append path context datas
-            self.store["reports"].append((
-                path,
-                {
-                    "messages": rows,
-                    "statistics": stats,
-                },
-            ))
+                # Append path context datas
+                self.store["reports"].append(context)
+
+    def add_ignored(self, count):
+        """
+        Add a number of messages ignored from ignore rules to statistics.
+
+        Arguments:
+            count (int): Number of ignored messages.
+        """
+        self.statistics.add_ignored(count)
+
+    def update_metas(self, metas):
+        """
+        Update export metas, like with validator version once it is known.
+
+        Arguments:
+            metas (dict): Metas to update.
+        """
+        self.store["metas"].update(metas)
+
+    def add_estimates(self, estimates):
+        """
+        Set message totals estimated from a sample to statistics.
+
+        Arguments:
+            estimates (dict): Estimates as returned from
+                ``html_checker.sampling.Sampler.get_estimates``.
+        """
+        self.statistics.set_estimates(estimates)
+
+    def write_document(self, document):
+        """
+        Write a document into the stream destination directory.
+
+        Arguments:
+            document (dict): Rendered document.
+        """
+        for item in write_documents(self.stream_destination, [document]):
+            self.log.info("Created file: {}".format(item))
+
+    def stream_report(self, context):
+        """
+        Render and write report document for a path context then only keep
+        its statistics in store.
+
+        Arguments:
+            context (tuple): Path report item with name and data.
+        """
+        i = len(self.store["reports"]) + 1
+        name, data = context
+
+        self.write_document(self.modelize_report(
+            self.get_report_filepath(i, name, data),
+            context,
+            self.store["metas"]
+        ))
+
+        self.store["reports"].append((
+            name,
+            {"statistics": data["statistics"]},
+        ))
 
     def get_report_filepath(self, i, name, data):
         """
@@ -208,7 +376,8 @@ class ExporterRenderer(ExporterBase):
             }
         })
 
-    def modelize_audit(self, document_path, context, metas=None):
+    def modelize_audit(self, document_path, context, metas=None,
+                       statistics=None):
         """
         Make an audit document type.
 
@@ -219,6 +388,11 @@ class ExporterRenderer(ExporterBase):
             document_path (string): Filepath for document to write.
             context (tuple): Path report item with name and data.
 
+        Keyword Arguments:
+            metas (dict): Export metas.
+            statistics (dict): Global statistics. If not given, they are
+                computed from path statistics.
+
         Returns:
             dict: Rendered document. This base method does not render anything
             really so instead it will return document context, something
@@ -255,7 +429,8 @@ class ExporterRenderer(ExporterBase):
             # Move up path stats
             stats = data.pop("statistics")
             # Merge report stats in global stats
-            global_stats = merge_compute(stats, global_stats)
+            if statistics is None:
+                global_stats = merge_compute(stats, global_stats)
             paths.append({
                 "name": name,
                 "statistics": stats,
@@ -267,13 +442,14 @@ class ExporterRenderer(ExporterBase):
             "context": {
                 "kind": "audit",
                 "metas": metas or {},
-                "statistics": global_stats,
+                "statistics": global_stats if statistics is None else statistics,
                 "paths": paths,
                 "data": global_data or None,
             }
         })
 
-    def modelize_summary(self, document_path, context, metas=None):
+    def modelize_summary(self, document_path, context, metas=None,
+                         statistics=None):
         """
         Make a summary document type.
 
@@ -284,6 +460,11 @@ class ExporterRenderer(ExporterBase):
             document_path (string): Filepath for document to write.
             context (tuple): Path report item with name and data.
 
+        Keyword Arguments:
+            metas (dict): Export metas.
+            statistics (dict): Global statistics. If not given, they are
+                computed from path statistics.
+
         Returns:
             dict: Rendered document. This base method does not render anything
             really so instead it will return document context, something
@@ -317,7 +498,8 @@ class ExporterRenderer(ExporterBase):
             # Move up path stats
             stats = data.pop("statistics")
             # Merge report stats in global stats
-            global_stats = merge_compute(stats, global_stats)
+            if statistics is None:
+                global_stats = merge_compute(stats, global_stats)
             paths.append({
                 "name": name,
                 "path": self.get_report_filepath(i, name, data),
@@ -329,11 +511,80 @@ class ExporterRenderer(ExporterBase):
             "context": {
                 "kind": "summary",
                 "metas": metas or {},
-                "statistics": global_stats,
+                "statistics": global_stats if statistics is None else statistics,
                 "paths": paths,
             }
         })
 
+    def modelize_rules(self, document_path, context, metas=None):
+        """
+        Make a rules document type.
+
+        Rules document display every aggregated rules, from the most to the
+        least occuring one, with their affected paths.
+
+        Arguments:
+            document_path (string): Filepath for document to write.
+            context (dict): Aggregated rules indexed on their fingerprint.
+
+        Returns:
+            dict: Rendered document. This base method does not render anything
+            really so instead it will return document context, something
+            like: ::
+
+                {
+                    "document": "document filepath",
+                    "context": {
+                        "kind": "rules",
+                        "rules": [
+                            {
+                                "fingerprint": "rule fingerprint",
+                                "type": "error",
+                                "template": "Duplicate ID “…”.",
+                                "message": "Duplicate ID “foo”.",
+                                "count": 2,
+                                "paths": [
+                                    {
+                                        "id": 1,
+                                        "name": "path name",
+                                        "positions": [
+                                            {"line": 1, "column": 2},
+                                        ]
+                                    },
+                                    [other paths]..
+                                ]
+                            },
+                            [other rules]..
+                        ]
+                    }
+                }
+
+        """
+        rules = sorted(context.values(), key=lambda item: -item["count"])
+
+        return self.render({
+            "document": document_path,
+            "context": {
+                "kind": "rules",
+                "metas": metas or {},
+                "rules": rules,
+            }
+        })
+
+    def get_statistics(self):
+        """
+        Return global statistics from statistics engine.
+
+        Returns:
+            dict: Global statistics or ``None`` if engine does not cover every
+            stored reports, like when store has been filled without building
+            paths, then statistics have to be computed from stored reports.
+        """
+        if self.statistics.paths != len(self.store["reports"]):
+            return None
+
+        return self.statistics.get_totals()
+
     def release(self, *args, **kwargs):
         """
         Make all export documents.
@@ -344,18 +595,28 @@ class ExporterRenderer(ExporterBase):
                 Default is ``False``.
 
         Returns:
-            list: List of documents.
+            list: List of documents. In streaming mode, report documents have
+            already been written so there is only the summary document. With
+            aggregation enabled, the rules document comes last.
         """
         pack = kwargs.pop("pack", False)
 
         documents = []
 
-        if pack:
+        if self.stream_destination and not pack:
+            documents.append(self.modelize_summary(
+                self.DOCUMENT_FILENAMES["summary"],
+                self.store["reports"],
+                self.store["metas"],
+                statistics=self.get_statistics()
+            ))
+        elif pack:
             document_path = self.DOCUMENT_FILENAMES["audit"]
             documents.append(self.modelize_audit(
                 document_path,
                 self.store["reports"],
-                self.store["metas"]
+                self.store["metas"],
+                statistics=self.get_statistics()
             ))
         else:
             for i, context in enumerate(self.store["reports"],
@@ -371,6 +632,14 @@ class ExporterRenderer(ExporterBase):
             documents.append(self.modelize_summary(
                 self.DOCUMENT_FILENAMES["summary"],
                 self.store["reports"],
+                self.store["metas"],
+                statistics=self.get_statistics()
+            ))
+
+        if self.aggregate:
+            documents.append(self.modelize_rules(
+                self.DOCUMENT_FILENAMES["rules"],
+                self.store["rules"],
                 self.store["metas"]
             ))
 
@@ -0,0 +1,216 @@
+import json
+
+from .render import ExporterRenderer
+
+
+class StatsExport(ExporterRenderer):
+    """
+    Exporter to produce only statistics, mostly for continuous integration.
+
+    Nothing is retained from built paths except statistics engine counters and
+    worst paths, so memory usage does not grow with the number of paths. Once
+    released, a single tiny summary document is produced.
+
+    Message thresholds can be given, when a threshold is exceeded the summary
+    reports it and ``get_exit_code`` returns an error code. When paths have
+    been sampled, thresholds apply to estimated totals for every paths.
+
+    Keyword Arguments:
+        output_format (string): Summary format, either ``text`` or ``json``.
+            Default to ``text``.
+        max_errors (int): Maximum number of errors before failing. Default to
+            ``None`` for no threshold.
+        max_warnings (int): Maximum number of warnings before failing. Default
+            to ``None`` for no threshold.
+        rule_limit (int): Number of most occuring rules to include in summary.
+            Default to ``RULE_LIMIT``.
+
+    Attributes:
+        THRESHOLDS (dict): Available thresholds where item key is the
+            threshold name and item value the statistic name it applies to.
+        FAILURE_EXIT_CODE (int): Exit code when a threshold is exceeded.
+    """
+    klassname = __qualname__  # noqa: F821
+    FORMAT_NAME = "stats"
+    STREAMABLE = False
+    DOCUMENT_FILENAMES = {
+        "text": "stats.txt",
+        "json": "stats.json",
+    }
+    THRESHOLDS = {
+        "max_errors": "errors",
+        "max_warnings": "warnings",
+    }
+    FAILURE_EXIT_CODE = 1
+    RULE_LIMIT = 10
+
+    def __init__(self, *args, **kwargs):
+        self.output_format = kwargs.pop("output_format", None) or "text"
+        self.thresholds = {
+            name: kwargs.pop(name, None)
+            for name in self.THRESHOLDS
+        }
+        self.rule_limit = kwargs.pop("rule_limit", None) or self.RULE_LIMIT
+
+        super().__init__(*args, **kwargs)
+
+    def validate(self):
+        """
+        Ensure output format is supported.
+
+        Returns:
+            string: Returns an error message if any, else ``False``.
+        """
+        if self.output_format not in self.DOCUMENT_FILENAMES:
+            msg = "Statistics format '{}' is not supported, use one of: {}"
+            return msg.format(
+                self.output_format,
+                ", ".join(sorted(self.DOCUMENT_FILENAMES))
+            )
+
+        return False
+
+    def build(self, report):
+        """
+        Add every reported paths to statistics engine without storing them.
+
+        Arguments:
+            report (dict): A dict of path messages, each item key is a path and
+                item value is a list of dictionnaries (each dict is a message
+                row).
+        """
+        for path, messages in report.items():
+            # Notify each path in progress to logger
+            self.log.info(path)
+
+            self.statistics.add(*self.build_path(path, messages))
+
+    def get_failures(self):
+        """
+        Return exceeded thresholds.
+
+        Returns:
+            list: Failure message for each exceeded threshold.
+        """
+        failures = []
+        totals = self.statistics.totals
+        msg = "{count} {key} over maximum of {maximum}"
+
+        # Validated paths are only a sample of every paths
+        if self.statistics.estimates is not None:
+            totals = self.statistics.estimates
+            msg = "{count} estimated {key} over maximum of {maximum}"
+
+        for name, key in self.THRESHOLDS.items():
+            maximum = self.thresholds[name]
+            if maximum is not None and totals.get(key, 0) > maximum:
+                failures.append(msg.format(
+                    count=totals.get(key, 0),
+                    key=key,
+                    maximum=maximum,
+                ))
+
+        return failures
+
+    def get_exit_code(self):
+        """
+        Return exit code from thresholds.
+
+        Returns:
+            int: ``FAILURE_EXIT_CODE`` if a threshold is exceeded, else ``0``.
+        """
+        return self.FAILURE_EXIT_CODE if self.get_failures() else 0
+
+    def modelize_stats(self):
+        """
+        Make statistics summary context.
+
+        Returns:
+            dict: Statistics summary with export metas and thresholds.
+        """
+        context = self.statistics.summary(limit=self.rule_limit)
+        context["metas"] = self.store["metas"]
+        context["thresholds"] = {
+            "limits": self.thresholds,
+            "failures": self.get_failures(),
+        }
+
+        return context
+
+    def render_text(self, context):
+        """
+        Render statistics summary to text.
+
+        Arguments:
+            context (dict): Statistics summary as returned from
+                ``modelize_stats``.
+
+        Returns:
+            string: Text summary.
+        """
+        statistics = context["statistics"]
+
+        lines = [
+            "Paths: {}".format(context["paths"]),
+            "Errors: {}".format(statistics["errors"]),
+            "Warnings: {}".format(statistics["warnings"]),
+            "Informations: {}".format(statistics["infos"]),
+            "Debugs: {}".format(statistics["debugs"]),
+        ]
+
+        if "ignored" in statistics:
+            lines.append("Ignored: {}".format(statistics["ignored"]))
+
+        if "estimates" in statistics:
+            msg = ("Estimated from sample of {sampled} path(s) over {paths} "
+                   "(ratio {ratio}): {errors} error(s), {warnings} "
+                   "warning(s)")
+            lines.append(msg.format(**statistics["estimates"]))
+
+        lines += [
+            "Messages per path: {}".format(" ".join([
+                "{}={}".format(k, v)
+                for k, v in context["percentiles"].items()
+            ])),
+        ]
+
+        if context["offenders"]:
+            lines.append("Worst paths:")
+            msg = "  {name}: {errors} error(s), {warnings} warning(s)"
+            for item in context["offenders"]:
+                lines.append(msg.format(**item))
+
+        if context["rules"]:
+            lines.append("Most occuring rules:")
+            for item in context["rules"]:
+                lines.append("  {count} {type}: {template}".format(**item))
+
+        limits = context["thresholds"]["limits"]
+        failures = context["thresholds"]["failures"]
+        if failures:
+            lines.append("Thresholds: failed, {}".format(", ".join(failures)))
+        elif any([v is not None for v in limits.values()]):
+            lines.append("Thresholds: passed")
+
+        return "\n".join(lines)
+
+    def release(self, *args, **kwargs):
+        """
+        Make statistics summary document.
+
+        Pack mode has no effect.
+
+        Returns:
+            list: A list with the single summary document.
+        """
+        context = self.modelize_stats()
+
+        if self.output_format == "json":
+            content = json.dumps(context, indent=4, default=str)
+        else:
+            content = self.render_text(context)
+
+        return [{
+            "document": self.DOCUMENT_FILENAMES[self.output_format],
+            "content": content,
+        }]
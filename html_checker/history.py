@@ -0,0 +1,254 @@
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from .exceptions import HistoryInvalidError
+from .raw import RawWriter, read_raw
+from .utils.paths import get_cache_dir, get_path_key, is_local_ressource
+
+
+def parse_datetime(value):
+    """
+    Parse a W3C datetime as used in sitemap ``<lastmod>`` elements.
+
+    Arguments:
+        value (string): Date like ``2019-07-08`` or datetime like
+            ``2019-07-08T10:00:00+00:00``. A trailing ``Z`` is supported.
+
+    Returns:
+        datetime.datetime: Timezone aware datetime, a datetime without
+        timezone is assumed to be UTC. ``None`` if value is empty or invalid.
+    """
+    if not value:
+        return None
+
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return date
+
+
+class RunHistory:
+    """
+    Local history of site runs to only validate urls modified since a date.
+
+    History directory contains an index file with the date of the last run
+    for each sitemap and a raw results file for each sitemap with messages
+    for every url from its last run. Raw results are written with
+    ``html_checker.raw.RawWriter``.
+
+    Arguments:
+        dirpath (string): Path to history directory. Default to
+            ``history`` directory from application cache. It is created
+            on first record.
+
+    Attributes:
+        runs (dict): Last run for each sitemap key, each item is a dict
+            with ``sitemap`` path and ``date`` string.
+        previous (dict): Recorded results for each sitemap key, loaded once
+            from ``split``.
+    """
+    INDEX_FILENAME = "history.json"
+    RESULTS_FILENAME = "{}.jsonl.gz"
+
+    def __init__(self, dirpath=None):
+        self.dirpath = dirpath or get_cache_dir("history")
+        self.runs = self.read_index()
+        self.previous = {}
+
+    def get_index_path(self):
+        """
+        Return path to history index file.
+
+        Returns:
+            string: Index file path.
+        """
+        return os.path.join(self.dirpath, self.INDEX_FILENAME)
+
+    def get_key(self, sitemap):
+        """
+        Return history key for given sitemap.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+
+        Returns:
+            string: Hashed key.
+        """
+        if is_local_ressource(sitemap):
+            return get_path_key(sitemap)
+
+        return hashlib.sha1(sitemap.encode("utf-8")).hexdigest()[:16]
+
+    def get_results_path(self, sitemap):
+        """
+        Return path to raw results file for given sitemap.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+
+        Returns:
+            string: Raw results file path.
+        """
+        return os.path.join(
+            self.dirpath,
+            self.RESULTS_FILENAME.format(self.get_key(sitemap))
+        )
+
+    def read_index(self):
+        """
+        Read history index file if any.
+
+        Returns:
+            dict: Recorded runs.
+        """
+        path = self.get_index_path()
+        if not os.path.exists(path):
+            return {}
+
+        with io.open(path, "r") as fp:
+            try:
+                index = json.load(fp)
+            except ValueError as e:
+                msg = "History index file is not a valid JSON file: {}"
+                raise HistoryInvalidError(msg.format(e))
+
+        if not isinstance(index, dict) or not isinstance(index.get("runs"),
+                                                         dict):
+            msg = "History index file is invalid: {}"
+            raise HistoryInvalidError(msg.format(path))
+
+        return index["runs"]
+
+    def get_last_run(self, sitemap):
+        """
+        Return date of the last recorded run for given sitemap.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+
+        Returns:
+            datetime.datetime: Last run date or ``None`` if there is no
+            recorded run.
+        """
+        run = self.runs.get(self.get_key(sitemap))
+        if not run:
+            return None
+
+        return parse_datetime(run.get("date"))
+
+    def get_results(self, sitemap):
+        """
+        Return raw results from the last recorded run for given sitemap.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+
+        Returns:
+            collections.OrderedDict: Messages for each url, empty if there is
+            no recorded results.
+        """
+        results = OrderedDict()
+
+        path = self.get_results_path(sitemap)
+        if os.path.exists(path):
+            for registry in read_raw(path):
+                results.update(registry)
+
+        return results
+
+    def split(self, sitemap, paths, lastmods, since):
+        """
+        Split paths between the ones to validate and the ones whose results
+        from the last recorded run are carried over.
+
+        A path is only carried over if it has a last modification date not
+        after given date and there are recorded results for it. It may be
+        called for successive batches of paths from a same sitemap.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+            paths (list): Paths from sitemap.
+            lastmods (dict): Last modification date string for paths.
+            since (datetime.datetime): Date paths must have been modified
+                after to be validated. If ``None``, every paths are validated.
+
+        Returns:
+            tuple: List of paths to validate and a registry of carried over
+            paths with their recorded messages.
+        """
+        validate = []
+        carried = OrderedDict()
+
+        # Paths may come in batches, recorded results are only read once
+        previous = {}
+        if since:
+            key = self.get_key(sitemap)
+            if key not in self.previous:
+                self.previous[key] = self.get_results(sitemap)
+            previous = self.previous[key]
+
+        for path in paths:
+            lastmod = parse_datetime(lastmods.get(path))
+
+            if path in previous and lastmod is not None and lastmod <= since:
+                carried[path] = previous[path]
+            else:
+                validate.append(path)
+
+        return validate, carried
+
+    def open_writer(self, sitemap):
+        """
+        Open a writer for results of the current run.
+
+        Results are written to a temporary file which replaces the recorded
+        results once run is recorded.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+
+        Returns:
+            html_checker.raw.RawWriter: Writer for run results.
+        """
+        if not os.path.exists(self.dirpath):
+            os.makedirs(self.dirpath)
+
+        return RawWriter(self.get_results_path(sitemap) + ".tmp")
+
+    def record(self, sitemap, date, writer):
+        """
+        Record a run with its results.
+
+        Arguments:
+            sitemap (string): Sitemap file path or url.
+            date (datetime.datetime): Run start date.
+            writer (html_checker.raw.RawWriter): Writer from ``open_writer``
+                with results of the run.
+        """
+        writer.close()
+
+        path = self.get_results_path(sitemap)
+        if os.path.exists(writer.filepath):
+            os.replace(writer.filepath, path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+        self.runs[self.get_key(sitemap)] = {
+            "sitemap": sitemap,
+            "date": date.isoformat(),
+        }
+
+        with io.open(self.get_index_path(), "w") as fp:
+            json.dump({"runs": self.runs}, fp, indent=4)
@@ -0,0 +1,156 @@
+import gzip
+import json
+import os
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+
+from .exceptions import PathInvalidError, ReportError
+
+
+# Number of paths for each registry read from a raw results file
+RAW_BATCH_SIZE = 100
+
+
+class RawWriter:
+    """
+    Write raw report registries to a file, so exports can be rendered again
+    later without validating paths again.
+
+    File is a gzip compressed JSON Lines file where each line is an object
+    with items ``path`` and ``messages`` for a path as it was registered in
+    report registry. It is created on first write, along with its missing
+    parent directories. If metas are given, they are written first as a
+    header line object with a single item ``metas``.
+
+    Arguments:
+        filepath (string): Path to the file to write.
+
+    Keyword Arguments:
+        metas (dict): Export metas of the run, like its date and validator
+            version.
+
+    Attributes:
+        count (int): Number of written paths.
+    """
+    def __init__(self, filepath, metas=None):
+        self.filepath = filepath
+        self.metas = metas
+        self.fp = None
+        self.count = 0
+
+    def write(self, registry):
+        """
+        Write every paths from given registry.
+
+        Arguments:
+            registry (dict): Report registry.
+        """
+        if self.fp is None:
+            dirpath = os.path.dirname(self.filepath)
+            if dirpath:
+                os.makedirs(dirpath, exist_ok=True)
+
+            self.fp = gzip.open(self.filepath, "wt", encoding="utf-8")
+
+            if self.metas:
+                self.fp.write(json.dumps(
+                    {"metas": self.metas},
+                    separators=(",", ":"),
+                    default=str,
+                ) + "\n")
+
+        for path, messages in registry.items():
+            self.fp.write(json.dumps(
+                {"path": path, "messages": messages},
+                separators=(",", ":"),
+                default=str,
+            ) + "\n")
+            self.count += 1
+
+    def close(self):
+        """
+        Close file if it has been opened.
+        """
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+
+
+def read_raw(filepath, batch_size=RAW_BATCH_SIZE):
+    """
+    Read raw report registries from a file written with ``RawWriter``.
+
+    Arguments:
+        filepath (string): Path to the file to read.
+
+    Keyword Arguments:
+        batch_size (int): Maximum number of paths for each registry. Default
+            to ``RAW_BATCH_SIZE``.
+
+    Returns:
+        iterator: Report registries in the same order paths were written.
+    """
+    if not os.path.exists(filepath):
+        msg = "Given raw results file path does not exists: {}"
+        raise PathInvalidError(msg.format(filepath))
+
+    registry = OrderedDict()
+
+    with gzip.open(filepath, "rt", encoding="utf-8") as fp:
+        try:
+            for line in fp:
+                item = json.loads(line)
+
+                # Header is read from read_raw_metas
+                if "metas" in item and "path" not in item:
+                    continue
+
+                registry[item["path"]] = item["messages"]
+
+                if len(registry) >= batch_size:
+                    yield registry
+                    registry = OrderedDict()
+        except (OSError, EOFError, zlib.error, ValueError, KeyError,
+                TypeError) as e:
+            msg = "Raw results file is invalid: {}"
+            raise ReportError(msg.format(e))
+
+    if registry:
+        yield registry
+
+
+def read_raw_metas(filepath):
+    """
+    Read export metas from header of a raw results file.
+
+    Arguments:
+        filepath (string): Path to the file to read.
+
+    Returns:
+        dict: Export metas, ``created`` item is turned back to a datetime.
+        Empty if file does not have any header.
+    """
+    if not os.path.exists(filepath):
+        msg = "Given raw results file path does not exists: {}"
+        raise PathInvalidError(msg.format(filepath))
+
+    with gzip.open(filepath, "rt", encoding="utf-8") as fp:
+        try:
+            item = json.loads(fp.readline() or "{}")
+        except (OSError, EOFError, zlib.error, ValueError) as e:
+            msg = "Raw results file is invalid: {}"
+            raise ReportError(msg.format(e))
+
+    if not isinstance(item, dict) or not isinstance(item.get("metas"), dict):
+        return {}
+
+    metas = item["metas"]
+
+    if metas.get("created"):
+        try:
+            metas["created"] = datetime.fromisoformat(metas["created"])
+        except (TypeError, ValueError):
+            pass
+
+    return metas
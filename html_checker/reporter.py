@@ -1,3 +1,4 @@
+import copy
 import json
 import logging
 import os
@@ -13,14 +14,51 @@ class ReportStore:
     Reporter model.
 
     Parse validator report content and store it correctly.
+
+    Arguments:
+        paths (list): List of page path(s) which have been required for
+            checking.
+
+    Keyword Arguments:
+        ignore (html_checker.rules.IgnoreRules): Ignore rules to match against
+            validator messages. Rules are only applied here if they are not
+            native, since native rules are already applied by validator.
+
+    Attributes:
+        ignored (collections.OrderedDict): Counter of ignored messages for each
+            path which had some.
+        deduplicated (collections.OrderedDict): Paths which have not been
+            validated because they have the same body than another path, each
+            item value is the validated path their messages were copied from.
     """
-    def __init__(self, paths):
+    DUPLICATE_MESSAGE = "Same content than '{}', its validation is reused"
+
+    def __init__(self, paths, ignore=None):
         self.log = logging.getLogger(__pkgname__)
 
         self.paths = paths
+        self.ignore = ignore
         self.registry = OrderedDict(
             self.initial_registry(self.paths)
         )
+        self.ignored = OrderedDict()
+        self.deduplicated = OrderedDict()
+
+    def get_key(self, path):
+        """
+        Return registry key for given path.
+
+        Arguments:
+            path (string): Page path.
+
+        Returns:
+            string: Absolute path for an existing local file path, else the
+            unchanged path.
+        """
+        if is_local_ressource(path) and os.path.exists(path):
+            return os.path.abspath(path)
+
+        return path
 
     def initial_registry(self, paths):
         """
@@ -39,18 +77,7 @@ class ReportStore:
             except for unexisting file paths which will contain a critical
             error log.
         """
-        registry = []
-
-        for path in paths:
-            path_key = path
-
-            if is_local_ressource(path):
-                if os.path.exists(path):
-                    path_key = os.path.abspath(path)
-
-            registry.append((path_key, None))
-
-        return registry
+        return [(self.get_key(path), None) for path in paths]
 
     def parse(self, content):
         """
@@ -114,6 +141,11 @@ class ReportStore:
         else:
             messages = content
 
+        # Only validator messages are matched against ignore rules
+        ignore = None
+        if raw and self.ignore and not self.ignore.native:
+            ignore = self.ignore
+
         # To retain already outputed error messages for unknow paths
         already_seen_errors = []
 
@@ -129,6 +161,11 @@ class ReportStore:
                 path = os.path.abspath(path)
 
             if path in self.registry:
+                # Ignored message is only counted
+                if ignore and ignore.match(item.get("message", "")):
+                    self.ignored[path] = self.ignored.get(path, 0) + 1
+                    continue
+
                 if self.registry[path] is None:
                     self.registry[path] = []
                 self.registry[path].append(item)
@@ -137,3 +174,40 @@ class ReportStore:
                 if msg not in already_seen_errors:
                     already_seen_errors.append(msg)
                     self.log.warning(msg)
+
+    def add_duplicates(self, duplicates, origins=None):
+        """
+        Copy messages from validated paths to their duplicated paths.
+
+        Each duplicated path receives a copy of messages from the path with
+        identical body, followed by an ``info`` message with an item
+        ``duplicate`` set to this path.
+
+        Arguments:
+            duplicates (dict): Duplicated paths where each item value is the
+                validated path with identical body.
+
+        Keyword Arguments:
+            origins (dict): Messages of paths validated from another report,
+                used when a validated path is not in this report.
+        """
+        origins = origins or {}
+
+        for path, origin in duplicates.items():
+            key = self.get_key(path)
+            origin_key = self.get_key(origin)
+
+            if origin_key in self.registry:
+                messages = self.registry[origin_key]
+            else:
+                messages = origins.get(origin)
+
+            messages = copy.deepcopy(messages or [])
+            messages.append({
+                "type": "info",
+                "message": self.DUPLICATE_MESSAGE.format(origin),
+                "duplicate": origin,
+            })
+
+            self.registry[key] = messages
+            self.deduplicated[key] = origin
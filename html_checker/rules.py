@@ -0,0 +1,147 @@
+import io
+import os
+import re
+
+from .exceptions import PathInvalidError, RuleInvalidError
+
+
+class IgnoreRules:
+    """
+    Rules to ignore some validator messages.
+
+    Every rule is a regular expression which must match the whole message text
+    to ignore it, exact messages are escaped to be used as regular expressions.
+
+    Rules are compiled once into a single pattern which can be given to the
+    validator with its ``--filterpattern`` option so ignored messages are
+    never emitted, or matched from Python side against each message before it
+    is stored.
+
+    .. Note::
+        Validator is a Java program so its regular expression syntax is not
+        strictly the same than Python one, however common patterns (like
+        ``.*``, character classes, alternations, etc..) behave identically.
+
+    Keyword Arguments:
+        patterns (list): List of regular expression rules.
+        messages (list): List of exact message rules.
+        filepath (string): Path to a file of regular expression rules, one
+            rule per line. Empty lines and lines starting with ``#`` are
+            ignored. This is the same format than validator ``--filterfile``
+            option.
+        native (bool): If true, rules are passed to validator which performs
+            the filtering itself. This is the fastest way but validator won't
+            say anything about ignored messages so they can not be counted.
+            If false, rules are only matched from Python side where ignored
+            messages are counted. Default is ``True``.
+
+    Attributes:
+        patterns (list): List of all regular expression rules.
+        regex (re.Pattern): Compiled pattern from all rules or ``None`` if there
+            is no rules.
+    """
+    def __init__(self, patterns=None, messages=None, filepath=None, native=True):
+        self.native = native
+
+        self.patterns = list(patterns or [])
+        self.patterns.extend([re.escape(item) for item in messages or []])
+
+        if filepath:
+            self.patterns.extend(self.read_file(filepath))
+
+        self.regex = self.compile(self.patterns)
+
+    def __bool__(self):
+        return len(self.patterns) > 0
+
+    def read_file(self, path):
+        """
+        Read rules from given file.
+
+        Arguments:
+            path (string): Rule file path.
+
+        Returns:
+            list: List of rules.
+        """
+        if not os.path.exists(path):
+            msg = "Given ignore rule file path does not exists: {}"
+            raise PathInvalidError(msg.format(path))
+
+        with io.open(path, "r") as fp:
+            lines = [line.strip() for line in fp.read().splitlines()]
+
+        return [line for line in lines if line and not line.startswith("#")]
+
+    def get_pattern(self, patterns=None):
+        """
+        Join rules into a single regular expression.
+
+        Keyword Arguments:
+            patterns (list): List of rules to join. Default to ``patterns``
+                attribute.
+
+        Returns:
+            string: Regular expression for all rules.
+        """
+        patterns = self.patterns if patterns is None else patterns
+
+        return "|".join(["(?:{})".format(item) for item in patterns])
+
+    def compile(self, patterns):
+        """
+        Compile rules into a single regular expression object.
+
+        Arguments:
+            patterns (list): List of rules to compile.
+
+        Raises:
+            html_checker.exceptions.RuleInvalidError: If a rule is not a valid
+                regular expression.
+
+        Returns:
+            re.Pattern: Compiled regular expression or ``None`` if there is
+            no rules.
+        """
+        if not patterns:
+            return None
+
+        # Check every rule alone to give a meaningful error
+        for item in patterns:
+            try:
+                re.compile(item)
+            except re.error as e:
+                msg = "Invalid ignore rule '{}': {}"
+                raise RuleInvalidError(msg.format(item, e))
+
+        return re.compile(self.get_pattern(patterns))
+
+    def match(self, message):
+        """
+        Check if given message is matched by a rule.
+
+        Arguments:
+            message (string): Message text.
+
+        Returns:
+            bool: True if message is matched, else False.
+        """
+        if self.regex is None:
+            return False
+
+        return self.regex.fullmatch(str(message)) is not None
+
+    def get_tool_options(self):
+        """
+        Return validator options to perform rules filtering.
+
+        Returns:
+            dict: Validator options, empty if rules are not native or if there
+            is no rules.
+        """
+        if not self.native or not self:
+            return {}
+
+        return {
+            "--filterpattern": self.get_pattern(),
+        }
@@ -0,0 +1,334 @@
+import hashlib
+import io
+import logging
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+
+from .utils.paths import is_local_ressource
+from . import __pkgname__, USER_AGENT
+
+
+class SkeletonParser(HTMLParser):
+    """
+    HTML parser to collect the structure of a document.
+
+    Only element names down to a maximum depth are collected and consecutive
+    identical siblings are collapsed, so pages from a same template with a
+    different number of items in a list have the same skeleton.
+
+    Keyword Arguments:
+        max_depth (int): Maximum depth of collected elements.
+
+    Attributes:
+        skeleton (list): Collected items as ``depth:name`` strings.
+    """
+    VOID_ELEMENTS = [
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+        "meta", "source", "track", "wbr",
+    ]
+
+    def __init__(self, max_depth=8):
+        super().__init__()
+        self.max_depth = max_depth
+        self.depth = 0
+        self.skeleton = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.depth <= self.max_depth:
+            item = "{}:{}".format(self.depth, tag)
+            if not self.skeleton or self.skeleton[-1] != item:
+                self.skeleton.append(item)
+
+        if tag not in self.VOID_ELEMENTS:
+            self.depth += 1
+
+    def handle_endtag(self, tag):
+        if tag not in self.VOID_ELEMENTS:
+            self.depth = max(0, self.depth - 1)
+
+
+class Sampler:
+    """
+    Cluster paths to only validate a few representatives from each cluster
+    then extrapolate message statistics to every paths.
+
+    Paths can be clustered on their url pattern, where segments with digits
+    and slugs are generalized, or on a structural fingerprint of their
+    fetched document.
+
+    Keyword Arguments:
+        size (int): Number of representatives to validate for each cluster.
+            Default to ``DEFAULT_SIZE``.
+        method (string): Clustering method, either ``pattern`` or ``dom``.
+            Default to ``pattern``.
+        user_agent (string): User agent for every requests from ``dom``
+            method. Default to package user agent.
+        workers (int): Maximum number of documents fetched at the same time
+            from ``dom`` method. Default to ``DEFAULT_WORKERS``.
+
+    Attributes:
+        clusters (collections.OrderedDict): Paths for each cluster key, filled
+            from ``sample``.
+        counts (dict): Error and warning counts for each validated
+            representative, filled from ``add``.
+    """
+    DEFAULT_SIZE = 3
+    DEFAULT_WORKERS = 4
+    METHODS = ["pattern", "dom"]
+    ERROR_TYPES = ["error", "critical", "non-document-error"]
+
+    def __init__(self, size=None, method=None, user_agent=None, workers=None):
+        self.size = size or self.DEFAULT_SIZE
+        self.method = method or "pattern"
+        self.user_agent = user_agent or USER_AGENT
+        self.workers = workers or self.DEFAULT_WORKERS
+        self.log = logging.getLogger(__pkgname__)
+
+        self.clusters = OrderedDict()
+        self.counts = {}
+
+    def get_segment_pattern(self, segment):
+        """
+        Generalize an url path segment.
+
+        Arguments:
+            segment (string): Path segment.
+
+        Returns:
+            string: ``{n}`` for a number, ``{id}`` for a segment with digits,
+            ``{slug}`` for any other one. A file extension is kept.
+        """
+        name, dot, extension = segment.rpartition(".")
+        if not dot:
+            name, extension = segment, ""
+
+        if name.isdigit():
+            name = "{n}"
+        elif re.search(r"\d", name):
+            name = "{id}"
+        elif name:
+            name = "{slug}"
+
+        return name + dot + extension
+
+    def get_url_pattern(self, path):
+        """
+        Return url pattern for given path.
+
+        Host and the first path segment (commonly a site section) are kept
+        unless the segment contains digits, every other segment is
+        generalized. Query values are ignored, only parameter names are kept.
+
+        Arguments:
+            path (string): Page path.
+
+        Returns:
+            string: Url pattern.
+        """
+        parts = urlsplit(path)
+        segments = parts.path.split("/")
+
+        pattern = []
+        for i, segment in enumerate(segments):
+            if not segment or (i == 1 and not re.search(r"\d", segment)):
+                pattern.append(segment)
+            else:
+                pattern.append(self.get_segment_pattern(segment))
+
+        names = sorted(set([
+            item.split("=", 1)[0] for item in parts.query.split("&") if item
+        ]))
+
+        return "{}{}{}".format(
+            parts.netloc,
+            "/".join(pattern),
+            "?" + "&".join(names) if names else "",
+        )
+
+    def get_body(self, path):
+        """
+        Return document content for given path.
+
+        Arguments:
+            path (string): Page file path or url.
+
+        Returns:
+            string: Document content or ``None`` if it can not be read.
+        """
+        if is_local_ressource(path):
+            if not os.path.isfile(path):
+                return None
+
+            with io.open(path, "r", errors="replace") as fp:
+                return fp.read()
+
+        try:
+            r = self.session.get(path, headers={"User-Agent": self.user_agent})
+        except RequestException as e:
+            msg = "Unable to read body to sample '{}': {}"
+            self.log.debug(msg.format(path, e))
+            return None
+
+        if r.status_code != 200:
+            return None
+
+        return r.text
+
+    def get_dom_fingerprint(self, path):
+        """
+        Return structural fingerprint of given path document.
+
+        Arguments:
+            path (string): Page path.
+
+        Returns:
+            string: Fingerprint or the path itself if document can not be
+            read, so it is alone in its cluster.
+        """
+        content = self.get_body(path)
+        if content is None:
+            return path
+
+        parser = SkeletonParser()
+        parser.feed(content)
+        parser.close()
+
+        skeleton = "\n".join(parser.skeleton).encode("utf-8")
+
+        return "dom:{}".format(hashlib.sha1(skeleton).hexdigest()[:16])
+
+    def cluster(self, paths):
+        """
+        Group given paths on their cluster key.
+
+        Arguments:
+            paths (list): Page paths.
+
+        Returns:
+            collections.OrderedDict: Paths for each cluster key, in order of
+            first occurence.
+        """
+        clusters = OrderedDict()
+
+        if self.method == "dom":
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.workers,
+                                  pool_maxsize=self.workers)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                keys = list(executor.map(self.get_dom_fingerprint, paths))
+        else:
+            keys = [self.get_url_pattern(item) for item in paths]
+
+        for path, key in zip(paths, keys):
+            clusters.setdefault(key, []).append(path)
+
+        return clusters
+
+    def sample(self, paths):
+        """
+        Select representatives from clusters of given paths.
+
+        Representatives are spread evenly over each cluster.
+
+        Arguments:
+            paths (list): Page paths.
+
+        Returns:
+            list: Representative paths in original order.
+        """
+        self.clusters = self.cluster(paths)
+
+        selected = set()
+        for items in self.clusters.values():
+            size = min(self.size, len(items))
+            selected.update([
+                items[i * len(items) // size] for i in range(size)
+            ])
+
+        return [item for item in paths if item in selected]
+
+    def add(self, registry):
+        """
+        Count errors and warnings from validated representatives.
+
+        Arguments:
+            registry (dict): Report registry.
+        """
+        for path, messages in registry.items():
+            errors = 0
+            warnings = 0
+
+            for row in messages or []:
+                if row.get("type") in self.ERROR_TYPES:
+                    errors += 1
+                elif (row.get("type") == "info"
+                      and row.get("subType") == "warning"):
+                    warnings += 1
+
+            self.counts[path] = (errors, warnings)
+
+    def get_estimates(self):
+        """
+        Extrapolate message counts from representatives to every paths.
+
+        Each cluster is estimated from the mean counts of its validated
+        representatives multiplied by its size.
+
+        Returns:
+            dict: Estimated ``errors`` and ``warnings`` for every paths, the
+            number of ``paths``, the number of ``sampled`` representatives,
+            their ``ratio`` to every paths and ``clusters`` list with ``key``,
+            ``size``, ``sampled``, ``errors`` and ``warnings`` for each
+            cluster.
+        """
+        estimates = {
+            "paths": 0,
+            "sampled": 0,
+            "ratio": 0,
+            "errors": 0,
+            "warnings": 0,
+            "clusters": [],
+        }
+
+        for key, items in self.clusters.items():
+            counts = [self.counts[item] for item in items
+                      if item in self.counts]
+
+            errors = warnings = 0
+            if counts:
+                errors = round(
+                    sum([v[0] for v in counts]) * len(items) / len(counts)
+                )
+                warnings = round(
+                    sum([v[1] for v in counts]) * len(items) / len(counts)
+                )
+
+            estimates["paths"] += len(items)
+            estimates["sampled"] += len(counts)
+            estimates["errors"] += errors
+            estimates["warnings"] += warnings
+            estimates["clusters"].append({
+                "key": key,
+                "size": len(items),
+                "sampled": len(counts),
+                "errors": errors,
+                "warnings": warnings,
+            })
+
+        if estimates["paths"]:
+            estimates["ratio"] = round(
+                estimates["sampled"] / estimates["paths"], 4
+            )
+
+        return estimates
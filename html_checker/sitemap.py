@@ -1,15 +1,23 @@
+import gzip
 import io
 import json
 import logging
 import os
 import mimetypes
 import re
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from xml.etree import ElementTree
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
+from urllib3.exceptions import HTTPError as Urllib3Error
 
 from .utils.paths import is_local_ressource
+from .utils.structures import DigestSet
 from .exceptions import PathInvalidError, SitemapInvalidError
 from . import __pkgname__, USER_AGENT
 
@@ -18,11 +26,77 @@ class Sitemap:
     """
     Sitemap reader is able to get and read sitemap from a file path or an url
     either in XML or JSON format.
+
+    XML sitemaps are parsed as a stream, urls are yielded as soon as their
+    element is parsed and elements are cleared once read, so the whole
+    document is never loaded in memory.
+
+    Gzip compressed sitemaps are detected from their content and decompressed
+    as a stream while they are parsed.
+
+    Sitemap index is supported, its child sitemaps are fetched concurrently
+    from a pooled session and their urls are merged into a single stream
+    without duplicates.
+
+    Keyword Arguments:
+        register (object): Unused, kept for compatibility.
+        user_agent (string): User agent for every requests. Default to
+            package user agent.
+        workers (int): Maximum number of child sitemaps fetched at the same
+            time. Default to ``DEFAULT_WORKERS``.
+        max_depth (int): Maximum depth of nested sitemap indexes. Default to
+            ``DEFAULT_MAX_DEPTH``.
+        keep_lastmod (bool): If enabled, last modification dates of urls are
+            kept in ``lastmods`` while urls are read. Default to ``False``.
+        seen (object): Structure of already seen urls from caller, either a
+            ``DigestSet`` or a ``BloomFilter``. If given, every url from
+            ``iter_urls`` is only yielded once and urls merged from a sitemap
+            index are not deduplicated on their own. Else only urls merged
+            from a sitemap index are deduplicated, from a new ``DigestSet``.
+        canonicalize (callable): Function to turn an url into its canonical
+            form before it is deduplicated, like
+            ``UrlCanonicalizer.canonicalize``.
+
+    Attributes:
+        TIMEOUT (int): Timeout in seconds for every requests, it applies to
+            connection and to each read from a streamed response.
+        lastmods (dict): Last modification date string from sitemap for each
+            url which has one, only filled if ``keep_lastmod`` is enabled.
+            Urls are in their canonical form.
     """
-    def __init__(self, register=None, user_agent=None):
+    DEFAULT_WORKERS = 4
+    GZIP_MAGIC = b"\x1f\x8b"
+    DEFAULT_MAX_DEPTH = 3
+    TIMEOUT = 30
+
+    def __init__(self, register=None, user_agent=None, workers=None,
+                 max_depth=None, keep_lastmod=False, seen=None,
+                 canonicalize=None):
         self.register = register
         self.user_agent = user_agent or USER_AGENT
+        self.workers = workers or self.DEFAULT_WORKERS
+        self.max_depth = max_depth or self.DEFAULT_MAX_DEPTH
+        self.keep_lastmod = keep_lastmod
+        self.seen = seen
+        self.canonicalize = canonicalize
+        self.lastmods = {}
         self.log = logging.getLogger(__pkgname__)
+        self.session = self.get_session()
+
+    def get_session(self):
+        """
+        Return a session with a connection pool sized for workers.
+
+        Returns:
+            requests.Session: Session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers,
+                              pool_maxsize=self.workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
 
     def get_headers(self):
         """
@@ -91,7 +165,8 @@ class Sitemap:
             string: Document content.
         """
         try:
-            r = requests.get(path, headers=self.get_headers())
+            r = requests.get(path, headers=self.get_headers(),
+                             timeout=self.TIMEOUT)
         except RequestException as e:
             msg = "Unable to reach sitemap url: {}"
             raise PathInvalidError(msg.format(e))
@@ -102,19 +177,100 @@ class Sitemap:
 
         return r.content
 
+    def get_url_stream(self, path):
+        """
+        Open given url as a streamed response.
+
+        Arguments:
+            path (string): Ressource url.
+
+        Returns:
+            requests.Response: Streamed response, its body has not been read
+            yet.
+        """
+        try:
+            r = self.session.get(path, headers=self.get_headers(),
+                                 stream=True, timeout=self.TIMEOUT)
+        except RequestException as e:
+            msg = "Unable to reach sitemap url: {}"
+            raise PathInvalidError(msg.format(e))
+
+        if r.status_code != 200:
+            r.close()
+            msg = "Sitemap request returned invalid status: {}"
+            raise PathInvalidError(msg.format(r.status_code))
+
+        # Let urllib3 decode transfer content encoding like 'gzip'
+        r.raw.decode_content = True
+
+        return r
+
+    @contextmanager
+    def open_ressource(self, path):
+        """
+        Open given ressource as a binary file object without reading it.
+
+        Arguments:
+            path (string): Ressource file path or url.
+
+        Yields:
+            file object: Binary file object to read ressource content from,
+            already decompressed if ressource is gzip compressed.
+        """
+        if is_local_ressource(path):
+            if not os.path.exists(path):
+                msg = "Given file path does not exists: {}"
+                raise PathInvalidError(msg.format(path))
+
+            with io.open(path, "rb") as fp:
+                yield self.decompress(fp)
+        else:
+            with self.get_url_stream(path) as r:
+                try:
+                    source = self.decompress(r.raw)
+                except (RequestException, Urllib3Error, OSError) as e:
+                    msg = "Unable to read sitemap: {}"
+                    raise SitemapInvalidError(msg.format(e))
+
+                yield source
+
+    def decompress(self, source):
+        """
+        Wrap given source in a decompressing file object if its content is
+        gzip compressed.
+
+        Compression is detected from the first bytes of content rather than
+        the path extension, since a ``.gz`` ressource may have already been
+        decoded from its response content encoding.
+
+        Arguments:
+            source (file object): Binary file object.
+
+        Returns:
+            file object: Binary file object which reads decompressed content
+            if compressed, else the possibly buffered source.
+        """
+        if not hasattr(source, "peek"):
+            source = io.BufferedReader(source)
+
+        if source.peek(2)[:2] == self.GZIP_MAGIC:
+            return gzip.GzipFile(fileobj=source, mode="rb")
+
+        return source
+
     def parse_sitemap_json(self, ressource):
         """
         Parse JSON sitemap
 
         Arguments:
-            ressource (string): Ressource content.
+            ressource (string or bytes): Ressource content.
 
         Returns:
             list: List of paths.
         """
         try:
             content = json.loads(ressource)
-        except json.decoder.JSONDecodeError as e:
+        except (json.decoder.JSONDecodeError, UnicodeDecodeError) as e:
             msg = "Invalid JSON sitemap: {}"
             raise SitemapInvalidError(msg.format(e))
 
@@ -124,73 +280,283 @@ class Sitemap:
 
         return content["urls"]
 
-    def parse_sitemap_xml(self, ressource):
+    def iter_sitemap_entries(self, source, children=None):
         """
-        Parse XML sitemap
+        Parse XML sitemap as a stream.
+
+        Every item element is cleared from document tree once its location
+        and last modification date have been read, so memory usage does not
+        grow with the number of urls.
 
         Arguments:
-            ressource (string): Ressource content.
+            source (file object): Binary or text file object to read XML
+                from.
+
+        Keyword Arguments:
+            children (list): If given, a sitemap index is accepted and its
+                child sitemap locations are appended to this list instead of
+                being yielded. Default to ``None`` to only accept a sitemap.
 
         Returns:
-            list: List of paths.
+            iterator: Tuples of path and its ``<lastmod>`` value (or ``None``
+            if missing) in document order.
         """
-        paths = []
+        root = None
+        ns = ""
+        item_tag = None
+        warnings = 0
 
         try:
-            root = ElementTree.fromstring(ressource)
+            for event, element in ElementTree.iterparse(source,
+                                                        events=("start", "end")):
+                if root is None:
+                    root = element
+
+                    # Catch the root namespace if any
+                    match = re.match(r'{.*}', root.tag)
+                    if match:
+                        ns = match.group(0)
+
+                    name = root.tag.replace(ns, "")
+                    if name == "urlset":
+                        item_tag = "{}url".format(ns)
+                    elif name == "sitemapindex" and children is not None:
+                        item_tag = "{}sitemap".format(ns)
+                    else:
+                        msg = ("Invalid XML sitemap, cannot find root element "
+                               "<urlset>")
+                        if children is not None:
+                            msg += " or <sitemapindex>"
+                        raise SitemapInvalidError(msg)
+
+                    continue
+
+                if event != "end" or element.tag != item_tag:
+                    continue
+
+                location = element.find("{}loc".format(ns))
+                if location is not None:
+                    location = (location.text or "").strip()
+
+                # Empty location is considered as missing
+                if not location:
+                    warnings += 1
+                elif item_tag == "{}sitemap".format(ns):
+                    children.append(location)
+                else:
+                    lastmod = element.find("{}lastmod".format(ns))
+                    if lastmod is not None and lastmod.text:
+                        lastmod = lastmod.text.strip()
+                    else:
+                        lastmod = None
+
+                    yield (location, lastmod)
+
+                # Drop every read elements
+                root.clear()
         except ElementTree.ParseError as e:
             msg = "Invalid XML sitemap: {}"
             raise SitemapInvalidError(msg.format(e))
+        except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+            msg = "Invalid compressed sitemap: {}"
+            raise SitemapInvalidError(msg.format(e))
+        # Streamed response may fail or timeout in the middle of its body
+        except (RequestException, Urllib3Error, OSError) as e:
+            msg = "Unable to read sitemap: {}"
+            raise SitemapInvalidError(msg.format(e))
 
-        # Catch the root namespace if any
-        ns = re.match(r'{.*}', root.tag)
-        if ns:
-            ns = ns.group(0)
-        else:
-            ns = ""
+        if warnings > 0:
+            msg = ("There was {} item(s) without a <loc> element or with an "
+                   "empty one.")
+            self.log.warning(msg.format(warnings))
 
-        if root.tag.replace(ns, "") != "urlset":
-            msg = "Invalid XML sitemap, cannot find root element <urlset>"
-            raise SitemapInvalidError(msg)
+    def iter_sitemap_xml(self, source, children=None):
+        """
+        Parse XML sitemap as a stream to get its paths.
 
-        warnings = 0
-        for item in root.iter('{}url'.format(ns)):
-            location = item.find("{}loc".format(ns))
+        Arguments:
+            source (file object): Binary or text file object to read XML
+                from.
 
-            if location is None:
-                warnings += 1
-            else:
-                paths.append(location.text)
+        Keyword Arguments:
+            children (list): Same as ``iter_sitemap_entries``.
 
-        if warnings > 0:
-            msg = "There was {} url item(s) without a <loc> element."
-            self.log.warning(msg.format(warnings))
-
-        return paths
+        Returns:
+            iterator: Paths in document order.
+        """
+        for location, lastmod in self.iter_sitemap_entries(source,
+                                                           children=children):
+            yield location
 
-    def get_urls(self, path):
+    def fetch_sitemap(self, path):
         """
-        Parse given sitemap to get urls.
+        Read every entries and child sitemaps from given XML sitemap.
 
         Arguments:
             path (string): Sitemap path.
 
         Returns:
-            list: List of urls.
+            tuple: List of entries and list of child sitemap locations.
         """
-        if is_local_ressource(path):
-            ressource = self.get_file_ressource(path)
-        else:
-            ressource = self.get_url_ressource(path)
+        children = []
+
+        with self.open_ressource(path) as source:
+            entries = list(self.iter_sitemap_entries(source, children=children))
+
+        return entries, children
+
+    def iter_index_entries(self, children):
+        """
+        Fetch child sitemaps concurrently and merge their urls.
+
+        Child sitemaps are fetched from a pool of workers with at most
+        ``workers`` requests in flight. Results are consumed in index order
+        so urls order is stable, a same url or child sitemap is only
+        yielded or fetched once. A child sitemap which can not be read,
+        either invalid or from a network error, is skipped with a warning.
+
+        Arguments:
+            children (list): Child sitemap locations from a sitemap index.
+
+        Returns:
+            iterator: Entries with unique urls.
+        """
+        # Caller structure is used once urls are canonical, there is no need
+        # for another one
+        seen_urls = DigestSet() if self.seen is None else None
+        seen_sitemaps = set(children)
+        pending = deque([(item, 1) for item in children])
+        running = deque()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    location, depth = pending.popleft()
+                    running.append((
+                        location,
+                        depth,
+                        executor.submit(self.fetch_sitemap, location),
+                    ))
+
+                location, depth, future = running.popleft()
+                try:
+                    entries, nested = future.result()
+                except (PathInvalidError, SitemapInvalidError,
+                        RequestException, Urllib3Error, OSError) as e:
+                    msg = "Unable to read child sitemap '{}': {}"
+                    self.log.warning(msg.format(location, e))
+                    continue
+
+                for item in nested:
+                    if item in seen_sitemaps:
+                        continue
+                    seen_sitemaps.add(item)
+
+                    if depth >= self.max_depth:
+                        msg = "Ignored child sitemap over maximum depth: {}"
+                        self.log.warning(msg.format(item))
+                        continue
+
+                    pending.append((item, depth + 1))
+
+                for url, lastmod in entries:
+                    if seen_urls is None or seen_urls.add(url):
+                        yield (url, lastmod)
+
+    def parse_sitemap_xml(self, ressource):
+        """
+        Parse XML sitemap
+
+        Arguments:
+            ressource (string): Ressource content.
+
+        Returns:
+            list: List of paths.
+        """
+        if isinstance(ressource, str):
+            ressource = ressource.encode("utf-8")
+
+        return list(self.iter_sitemap_xml(io.BytesIO(ressource)))
+
+    def iter_entries(self, path):
+        """
+        Parse given sitemap to lazily get its entries.
 
+        XML sitemap is streamed from its ressource, JSON sitemap has to be
+        read entirely before its urls can be yielded. Both may be gzip
+        compressed.
+
+        Arguments:
+            path (string): Sitemap path.
+
+        Returns:
+            iterator: Tuples of url and its last modification date, JSON
+            sitemap urls never have a date.
+        """
         contenttype = self.contenttype(path)
 
         if contenttype == "json":
-            return self.parse_sitemap_json(ressource)
+            with self.open_ressource(path) as source:
+                try:
+                    ressource = source.read()
+                except (gzip.BadGzipFile, EOFError, zlib.error) as e:
+                    msg = "Invalid compressed sitemap: {}"
+                    raise SitemapInvalidError(msg.format(e))
+                except (RequestException, Urllib3Error, OSError) as e:
+                    msg = "Unable to read sitemap: {}"
+                    raise SitemapInvalidError(msg.format(e))
+
+            for url in self.parse_sitemap_json(ressource):
+                yield (url, None)
         elif contenttype == "xml":
-            return self.parse_sitemap_xml(ressource)
+            children = []
+
+            with self.open_ressource(path) as source:
+                yield from self.iter_sitemap_entries(source, children=children)
+
+            if children:
+                msg = "Sitemap index have {} child sitemap(s)"
+                self.log.debug(msg.format(len(children)))
+                yield from self.iter_index_entries(children)
         # Should never occurs
         else:
             msg = ("Unable to parse ressource from given path, unknowed "
                    "content type: {}".format(contenttype))
             raise SitemapInvalidError(msg)
+
+    def iter_urls(self, path):
+        """
+        Parse given sitemap to lazily get urls.
+
+        Urls are turned into their canonical form and deduplicated if enabled.
+        Last modification dates are stored in ``lastmods`` if enabled.
+
+        Arguments:
+            path (string): Sitemap path.
+
+        Returns:
+            iterator: Urls.
+        """
+        for url, lastmod in self.iter_entries(path):
+            if self.canonicalize:
+                url = self.canonicalize(url)
+
+            if self.seen is not None and not self.seen.add(url):
+                continue
+
+            if self.keep_lastmod and lastmod:
+                self.lastmods[url] = lastmod
+
+            yield url
+
+    def get_urls(self, path):
+        """
+        Parse given sitemap to get urls.
+
+        Arguments:
+            path (string): Sitemap path.
+
+        Returns:
+            list: List of urls.
+        """
+        return list(self.iter_urls(path))
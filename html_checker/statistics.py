@@ -0,0 +1,205 @@
+import heapq
+from collections import Counter
+
+from .utils.texts import is_no_report_row, normalize_message
+
+
+class StatisticsEngine:
+    """
+    Statistics incrementally computed while paths are built.
+
+    Every path is only walked once when it is added, so statistics are
+    available at release time without walking stored reports again.
+
+    Keyword Arguments:
+        top (int): Number of worst paths to keep. Default to ``DEFAULT_TOP``.
+
+    Attributes:
+        paths (int): Number of added paths.
+        totals (dict): Total of messages for each type, with the same items
+            than path statistics.
+        rules (collections.Counter): Occurences of each rule where key is a
+            tuple of message type and message template.
+        offenders (list): Heap of worst paths as tuples of error count,
+            warning count, negative path id and path name. Heap root is the
+            least bad path.
+        histogram (collections.Counter): Number of paths for each message
+            count.
+        ignored (int): Number of messages ignored from ignore rules, ``None``
+            when ignored messages are not counted.
+        estimates (dict): Message totals estimated from a sample for every
+            paths, ``None`` when paths have not been sampled.
+    """
+    DEFAULT_TOP = 10
+    PERCENTILES = [50, 90, 99]
+
+    def __init__(self, top=None):
+        self.top = top or self.DEFAULT_TOP
+        self.paths = 0
+        self.totals = {
+            "debugs": 0,
+            "errors": 0,
+            "infos": 0,
+            "warnings": 0,
+        }
+        self.rules = Counter()
+        self.offenders = []
+        self.histogram = Counter()
+        self.ignored = None
+        self.estimates = None
+
+    def add(self, name, data):
+        """
+        Add a built path to statistics.
+
+        Placeholder row of a path without any message is neither a rule nor
+        counted as a message.
+
+        Arguments:
+            name (string): Path name.
+            data (dict): Path data with its ``statistics`` and ``messages``.
+        """
+        self.paths += 1
+
+        stats = data["statistics"]
+        for key, value in stats.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+
+        messages = [
+            row for row in data["messages"]
+            if not is_no_report_row(row)
+        ]
+
+        for row in messages:
+            self.rules[(row["type"], normalize_message(row["message"]))] += 1
+
+        self.histogram[len(messages)] += 1
+
+        # Ties keep the earliest path since its negative id is greater
+        item = (stats["errors"], stats["warnings"], -self.paths, name)
+        if len(self.offenders) < self.top:
+            heapq.heappush(self.offenders, item)
+        elif item > self.offenders[0]:
+            heapq.heapreplace(self.offenders, item)
+
+    def add_ignored(self, count):
+        """
+        Add a number of messages ignored from ignore rules.
+
+        Arguments:
+            count (int): Number of ignored messages.
+        """
+        self.ignored = (self.ignored or 0) + count
+
+    def set_estimates(self, estimates):
+        """
+        Set message totals estimated from a sample.
+
+        Arguments:
+            estimates (dict): Estimates as returned from
+                ``html_checker.sampling.Sampler.get_estimates``, only its
+                ``paths``, ``sampled``, ``ratio``, ``errors`` and
+                ``warnings`` items are kept.
+        """
+        self.estimates = {
+            key: estimates[key]
+            for key in ["paths", "sampled", "ratio", "errors", "warnings"]
+        }
+
+    def get_totals(self):
+        """
+        Return global statistics.
+
+        Returns:
+            dict: A copy of totals, with item ``ignored`` if ignored messages
+            have been counted and item ``estimates`` if paths have been
+            sampled.
+        """
+        totals = dict(self.totals)
+
+        if self.ignored is not None:
+            totals["ignored"] = self.ignored
+
+        if self.estimates is not None:
+            totals["estimates"] = dict(self.estimates)
+
+        return totals
+
+    def get_offenders(self):
+        """
+        Return worst paths, from the worst to the least bad one.
+
+        Returns:
+            list: Dictionnaries with path ``id``, ``name``, ``errors`` and
+            ``warnings`` items.
+        """
+        return [
+            {
+                "id": -i,
+                "name": name,
+                "errors": errors,
+                "warnings": warnings,
+            }
+            for errors, warnings, i, name in sorted(self.offenders, reverse=True)
+        ]
+
+    def get_rules(self, limit=None):
+        """
+        Return most occuring rules.
+
+        Keyword Arguments:
+            limit (int): Maximum number of rules to return. Default to
+                ``None`` for every rules.
+
+        Returns:
+            list: Dictionnaries with rule ``type``, ``template`` and
+            ``count`` items.
+        """
+        return [
+            {"type": key[0], "template": key[1], "count": count}
+            for key, count in self.rules.most_common(limit)
+        ]
+
+    def get_percentile(self, percent):
+        """
+        Return a percentile of message count per path, with the nearest rank
+        method from histogram.
+
+        Arguments:
+            percent (int): Percentile to compute, from 0 to 100.
+
+        Returns:
+            int: Message count below or equal which given percent of paths
+            are. ``0`` if there is no paths.
+        """
+        rank = max(1, -(-percent * self.paths // 100))
+        seen = 0
+
+        for size in sorted(self.histogram):
+            seen += self.histogram[size]
+            if seen >= rank:
+                return size
+
+        return 0
+
+    def summary(self, limit=None):
+        """
+        Return every statistics.
+
+        Keyword Arguments:
+            limit (int): Maximum number of rules to return. Default to
+                ``None`` for every rules.
+
+        Returns:
+            dict: Statistics.
+        """
+        return {
+            "paths": self.paths,
+            "statistics": self.get_totals(),
+            "rules": self.get_rules(limit),
+            "offenders": self.get_offenders(),
+            "percentiles": {
+                "p{}".format(item): self.get_percentile(item)
+                for item in self.PERCENTILES
+            },
+        }
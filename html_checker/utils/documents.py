@@ -4,30 +4,76 @@ import os
 from .paths import resolve_paths
 
 
+CHUNK_SIZE = 65536
+
+
+def iter_chunks(document, size=CHUNK_SIZE):
+    """
+    Iterate over document content by chunks.
+
+    A document may have its content as a string in item ``content`` or as an
+    iterable of strings in item ``chunks`` when it is encoded on the fly. Tiny
+    encoded chunks are joined until they reach the given size so they are not
+    written one by one.
+
+    Arguments:
+        document (dict): Document datas.
+
+    Keyword Arguments:
+        size (int): Minimal length of yielded chunks, except for the last one.
+
+    Returns:
+        iterator: Content chunks.
+    """
+    if "chunks" not in document:
+        yield document["content"]
+        return
+
+    buffer = []
+    length = 0
+
+    for chunk in document["chunks"]:
+        buffer.append(chunk)
+        length += len(chunk)
+
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
 def write_documents(destination, documents):
     """
     Write every given documents files into destination directory.
 
     Arguments:
         destination (string): Destination directory where to write files. If
-            given directory path does not exist, it will be created.
+            given directory path does not exist, it will be created, as
+            well as document subdirectories.
         documents (list): List of document datas (``dict``) with item ``document`` for
             document relative (from ``destination``) filepath where to write and
-            item ``content`` for content string to write to file.
+            item ``content`` for content string to write to file or item
+            ``chunks`` for an iterable of content strings.
 
     Returns:
         list: List of written documents.
     """
     files = []
 
-    if not os.path.exists(destination):
-        os.makedirs(destination)
+    os.makedirs(destination, exist_ok=True)
 
     for doc in documents:
         file_destination = resolve_paths(destination, doc["document"])
         files.append(file_destination)
 
+        # Document path may be in a subdirectory
+        os.makedirs(os.path.dirname(file_destination), exist_ok=True)
+
         with io.open(file_destination, 'w') as fp:
-            fp.write(doc["content"])
+            for chunk in iter_chunks(doc):
+                fp.write(chunk)
 
     return files
@@ -1,3 +1,4 @@
+import hashlib
 import os
 
 import html_checker
@@ -73,3 +74,38 @@ def resolve_paths(*paths):
             )
         )
     )
+
+
+def get_cache_dir(*parts):
+    """
+    Return path to a directory in application cache.
+
+    Application cache is located in directory ``py-html-checker`` inside the
+    directory from environment variable ``XDG_CACHE_HOME`` if defined, else in
+    directory ``.cache`` from user home directory.
+
+    This does not create any directory.
+
+    Arguments:
+        *parts (list): Path parts to join to application cache path.
+
+    Returns:
+        string: Absolute path.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+
+    return resolve_paths(base, html_checker.__pkgname__, *parts)
+
+
+def get_path_key(path):
+    """
+    Return a short hashed key for given path, suitable for a directory name.
+
+    Arguments:
+        path (string): Path to hash, it is resolved to an absolute path
+            before.
+
+    Returns:
+        string: Hashed key.
+    """
+    return hashlib.sha1(resolve_paths(path).encode("utf-8")).hexdigest()[:16]
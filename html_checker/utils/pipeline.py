@@ -0,0 +1,89 @@
+import queue
+import threading
+
+
+# Marker for the end of produced items
+END = object()
+
+
+def iter_batches(items, size):
+    """
+    Group given items into lists of a maximum size.
+
+    Arguments:
+        items (iterable): Items to group, it may be an iterator which is
+            consumed as batches are yielded.
+        size (int): Maximum number of items in a batch.
+
+    Returns:
+        iterator: Lists of items, the last one may be smaller.
+    """
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def iter_prefetched(items, maxsize):
+    """
+    Consume given items from a background thread through a bounded queue.
+
+    Items are produced while the consumer is busy with previous ones, the
+    producer waits when queue is full so no more than ``maxsize`` items are
+    retained. An exception raised from producer is raised again from
+    consumer. If consumer stops before the end, producer is stopped too.
+
+    Arguments:
+        items (iterable): Items to produce.
+        maxsize (int): Maximum number of produced items waiting to be
+            consumed.
+
+    Returns:
+        iterator: Produced items in their original order.
+    """
+    pending = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(error, item):
+        while not stopped.is_set():
+            try:
+                pending.put((error, item), timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(None, item):
+                    return
+        except Exception as e:
+            put(e, END)
+        else:
+            put(None, END)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            error, item = pending.get()
+
+            if error is not None:
+                raise error
+
+            if item is END:
+                return
+
+            yield item
+    finally:
+        stopped.set()
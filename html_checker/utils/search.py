@@ -0,0 +1,105 @@
+import json
+
+from .texts import is_no_report_row, normalize_message
+
+
+class SearchIndex:
+    """
+    Inverted index of reported paths to be searched from a browser.
+
+    Index is filled in a single pass while paths are built, each path gets an
+    id from its position (starting from 1). Only normalized message templates
+    and path name trigrams are retained, not the messages themselves.
+
+    Attributes:
+        paths (list): Indexed path names, path id is its position plus one.
+        templates (dict): Message templates where each item value is the
+            ordered list of ids of paths which have reported the template.
+        trigrams (dict): Path name trigrams where each item value is the
+            ordered list of ids of paths which name contains the trigram.
+    """
+    def __init__(self):
+        self.paths = []
+        self.templates = {}
+        self.trigrams = {}
+
+    def get_trigrams(self, text):
+        """
+        Return trigrams from given text.
+
+        Arguments:
+            text (string): Text to split.
+
+        Returns:
+            set: Every lowercase trigrams from text.
+        """
+        text = text.lower()
+
+        return set([text[i:i + 3] for i in range(len(text) - 2)])
+
+    def add(self, name, messages):
+        """
+        Index a path and its messages.
+
+        Since ids are incremented, their lists are always ordered. Placeholder
+        row of a path without any message is not indexed.
+
+        Arguments:
+            name (string): Path name.
+            messages (list): List of message dictionnaries.
+
+        Returns:
+            int: Path id.
+        """
+        self.paths.append(name)
+        i = len(self.paths)
+
+        for trigram in self.get_trigrams(name):
+            self.trigrams.setdefault(trigram, []).append(i)
+
+        for row in messages or []:
+            if is_no_report_row(row):
+                continue
+
+            ids = self.templates.setdefault(normalize_message(row["message"]), [])
+            if not ids or ids[-1] != i:
+                ids.append(i)
+
+        return i
+
+    def dump(self, targets):
+        """
+        Serialize index to a compact script.
+
+        Index is a script which calls function ``htmlCheckerSearchIndex`` with
+        index data so it can be loaded from a page opened from file system.
+
+        Trigrams which are in every path names, like from a shared scheme and
+        domain, do not narrow a search, so they are only listed in ``common``
+        without their ids.
+
+        Arguments:
+            targets (list): Link of each path document in the same order than
+                indexed paths.
+
+        Returns:
+            string: Index script.
+        """
+        total = len(self.paths)
+        common = sorted([
+            k for k, v in self.trigrams.items() if len(v) == total
+        ])
+
+        payload = json.dumps(
+            {
+                "paths": [list(item) for item in zip(self.paths, targets)],
+                "templates": self.templates,
+                "trigrams": {
+                    k: v for k, v in self.trigrams.items() if len(v) < total
+                },
+                "common": common,
+            },
+            separators=(",", ":"),
+        )
+
+        return "htmlCheckerSearchIndex({});\n".format(payload)
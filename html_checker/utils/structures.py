@@ -1,3 +1,171 @@
+import hashlib
+import logging
+import math
+
+from .. import __pkgname__
+
+
+class DigestSet:
+    """
+    Exact set of items stored as hashed digests.
+
+    Only a fixed size digest is kept for each item instead of the item
+    itself, so memory usage does not depend from items length. A digest
+    costs about 90 bytes with the set overhead, this is not less than a set
+    of items which are kept elsewhere anyway, it only saves memory when
+    items are dropped once consumed. Digests are large enough for
+    collisions to be negligible.
+
+    Attributes:
+        duplicates (int): Number of items which were refused since already
+            added.
+    """
+    DIGEST_SIZE = 16
+
+    def __init__(self):
+        self.digests = set()
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.digests)
+
+    def __contains__(self, item):
+        return self.get_digest(item) in self.digests
+
+    def get_digest(self, item):
+        """
+        Return digest for given item.
+
+        Arguments:
+            item (string): Item to hash.
+
+        Returns:
+            bytes: Digest.
+        """
+        return hashlib.blake2b(item.encode("utf-8"),
+                               digest_size=self.DIGEST_SIZE).digest()
+
+    def add(self, item):
+        """
+        Add given item if not already added.
+
+        Arguments:
+            item (string): Item to add.
+
+        Returns:
+            bool: ``True`` if item has been added, ``False`` if it was already
+            added.
+        """
+        digest = self.get_digest(item)
+
+        if digest in self.digests:
+            self.duplicates += 1
+            return False
+
+        self.digests.add(digest)
+
+        return True
+
+
+class BloomFilter:
+    """
+    Probabilistic set of items with a fixed memory size.
+
+    An added item is always found again but an item which has never been
+    added may be wrongly found, at a rate near given error rate as long as
+    the number of added items does not exceed capacity. A warning is logged
+    once capacity is exceeded since error rate then grows quickly.
+
+    Keyword Arguments:
+        capacity (int): Expected maximum number of items. Default to
+            ``DEFAULT_CAPACITY``.
+        error_rate (float): Rate of false positives, between 0 and 1. Default
+            to ``DEFAULT_ERROR_RATE``.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Number of bits set for each item.
+        count (int): Number of added items.
+        duplicates (int): Number of items which were refused since probably
+            already added.
+    """
+    DEFAULT_CAPACITY = 1000000
+    DEFAULT_ERROR_RATE = 0.001
+
+    def __init__(self, capacity=None, error_rate=None):
+        self.capacity = capacity or self.DEFAULT_CAPACITY
+        self.error_rate = error_rate or self.DEFAULT_ERROR_RATE
+
+        self.size = max(8, int(math.ceil(
+            -self.capacity * math.log(self.error_rate) / (math.log(2) ** 2)
+        )))
+        self.hashes = max(1, int(round(
+            self.size / self.capacity * math.log(2)
+        )))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+        self.duplicates = 0
+        self.log = logging.getLogger(__pkgname__)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, item):
+        return all([
+            self.bits[i >> 3] & (1 << (i & 7))
+            for i in self.get_positions(item)
+        ])
+
+    def get_positions(self, item):
+        """
+        Return bit positions for given item.
+
+        Positions are derived from a single digest with double hashing.
+
+        Arguments:
+            item (string): Item to hash.
+
+        Returns:
+            list: Bit positions.
+        """
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """
+        Add given item if not probably already added.
+
+        Arguments:
+            item (string): Item to add.
+
+        Returns:
+            bool: ``True`` if item has been added, ``False`` if it was
+            probably already added.
+        """
+        added = False
+
+        for i in self.get_positions(item):
+            mask = 1 << (i & 7)
+            if not self.bits[i >> 3] & mask:
+                self.bits[i >> 3] |= mask
+                added = True
+
+        if added:
+            self.count += 1
+
+            if self.count == self.capacity + 1:
+                msg = ("Bloom filter capacity of {} items is exceeded, more "
+                       "items than the {} error rate may be wrongly "
+                       "ignored as duplicates")
+                self.log.warning(msg.format(self.capacity, self.error_rate))
+        else:
+            self.duplicates += 1
+
+        return added
+
 
 def reduce_unique(items):
     """
@@ -1,6 +1,18 @@
+import functools
+import hashlib
+import re
+
 from ..exceptions import HtmlCheckerBaseException
 
 
+# Quoted values from validator messages, validator uses typographic quotes
+QUOTED_VALUE_REGEX = re.compile(r"“[^”]*”|\"[^\"]*\"")
+NUMBER_REGEX = re.compile(r"\b\d+\b")
+
+# Placeholder debug message for a path without any message from validator
+NO_REPORT_MESSAGE = "There was not any log report for this path."
+
+
 def format_hostname(value):
     """
     Given a string value, check if it's a valid hostname. Optional port can be
@@ -30,3 +42,64 @@ def format_hostname(value):
         port = 8002
 
     return (hostname, port)
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_message(message):
+    """
+    Normalize a validator message to its template, so every occurence of a
+    same rule leads to the same string whatever values it has been raised
+    for.
+
+    Since the same messages are repeated over many paths, results are
+    memoized.
+
+    Quoted values are replaced with ``“…”``, standalone numbers with ``#`` and
+    whitespaces are collapsed to a single space. For example message
+    ``Duplicate ID “foo”.`` is normalized to ``Duplicate ID “…”.``.
+
+    Arguments:
+        message (string): Message text.
+
+    Returns:
+        string: Message template.
+    """
+    template = QUOTED_VALUE_REGEX.sub("“…”", str(message))
+    template = NUMBER_REGEX.sub("#", template)
+
+    return " ".join(template.split())
+
+
+def message_fingerprint(message_type, message):
+    """
+    Return a stable fingerprint for a message rule.
+
+    Fingerprint is computed from message type and template, so it is the same
+    for every occurence of a rule whatever its values are, from a run to
+    another.
+
+    Arguments:
+        message_type (string): Message type like ``error``.
+        message (string): Message text.
+
+    Returns:
+        string: Fingerprint as a 16 characters hexadecimal string.
+    """
+    key = "{}:{}".format(message_type, normalize_message(message))
+
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def is_no_report_row(row):
+    """
+    Check if given message row is the placeholder for a path without any
+    message from validator.
+
+    Arguments:
+        row (dict): Message row.
+
+    Returns:
+        bool: True if row is the placeholder debug row.
+    """
+    return (row.get("type") == "debug"
+            and row.get("message") == NO_REPORT_MESSAGE)
@@ -1,3 +1,4 @@
+import json
 import logging
 import os
 import subprocess
@@ -10,6 +11,62 @@ from .utils.paths import is_local_ressource, get_application_path
 from . import __pkgname__, DEFAULT_INTERPRETER, DEFAULT_VALIDATOR, USER_AGENT
 
 
+class ValidatorVersionQuery:
+    """
+    Validator tool started in background to output its version.
+
+    Version is only waited for once it is needed, so this separate process
+    runs while caller goes on with sitemap parsing or a first validation.
+    The version is given to exporters as export metas, so they do not have
+    to execute validator tool themselves to get it. It does not speed up
+    validator process used for validations.
+
+    Arguments:
+        command (list): Command to execute validator tool with its
+            ``--version`` argument.
+
+    Attributes:
+        process (subprocess.Popen): Started process until its output has been
+            read or it has been released. ``None`` if process could not be
+            started, the error will be raised again from validation.
+        version (string): Validator version once process has finished.
+    """
+    def __init__(self, command):
+        self.version = None
+
+        try:
+            self.process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL)
+        except OSError:
+            self.process = None
+
+    def get_version(self):
+        """
+        Wait for process to finish and return version from its output.
+
+        Returns:
+            string: Validator version or ``None`` if process could not be
+            started or has failed.
+        """
+        if self.process is not None:
+            output, _ = self.process.communicate()
+            if self.process.returncode == 0:
+                self.version = output.decode("utf-8").strip() or None
+            self.process = None
+
+        return self.version
+
+    def release(self):
+        """
+        Kill process if it is still running, like when command has been
+        aborted before needing the version.
+        """
+        if self.process is not None:
+            self.process.kill()
+            self.process.communicate()
+            self.process = None
+
+
 class ValidatorInterface:
     """
     Interface for validator tool
@@ -27,14 +84,30 @@ class ValidatorInterface:
         exception_class (object): An exception class to catch. Commonly it
             should be a child of
             ``html_checker.exceptions.HtmlCheckerBaseException``.
+        ignore (html_checker.rules.IgnoreRules): Rules to ignore some
+            validator messages.
+        hasher (html_checker.bodies.BodyHasher): If given, paths with
+            identical body are only validated once and the other ones receive
+            a copy of its messages, even from another ``validate`` call.
+
+    Attributes:
+        origins (dict): Messages of every validated path which was the first
+            one for its body digest, kept for duplicates from next
+            ``validate`` calls. Messages are stored as a JSON string which is
+            far lighter than message dictionnaries and only decoded when a
+            duplicate appears. Paths without any message are not stored. Only
+            filled when ``hasher`` is given.
     """
     REPORT_CLASS = ReportStore
     INTERPRETER = DEFAULT_INTERPRETER
     VALIDATOR = DEFAULT_VALIDATOR
 
-    def __init__(self, exception_class=None):
+    def __init__(self, exception_class=None, ignore=None, hasher=None):
         self.log = logging.getLogger(__pkgname__)
         self.catched_exception = self.get_catched_exception(exception_class)
+        self.ignore = ignore
+        self.hasher = hasher
+        self.origins = {}
 
     def get_catched_exception(self, exception_class=None):
         """
@@ -155,6 +228,22 @@ class ValidatorInterface:
 
         return process
 
+    def query_version(self, interpreter_options=None):
+        """
+        Start validator tool in background to get its version.
+
+        Keyword Arguments:
+            interpreter_options (dict): Dict of interpreter arguments, they
+                should be the same than for validations.
+
+        Returns:
+            ValidatorVersionQuery: Version query with started process.
+        """
+        return ValidatorVersionQuery(self.get_validator_command(
+            ["--version"],
+            interpreter_options=interpreter_options,
+        ))
+
     def manage_options(self, interpreter_options, tool_options):
         """
         Compile default and additional interpreter and validator options.
@@ -166,7 +255,8 @@ class ValidatorInterface:
                 include in commandline. Default is ``None`` but some options
                 are defined for internal purposes if not given, such as
                 ``--format``, ``--exist-zero-always`` and ``--user-agent``.
-                Except the last one, you should not try to change them or you
+                Native ignore rules are compiled to ``--filterpattern``.
+                Except the last two ones, you should not try to change them or you
                 will probably break the validator and reporter.
 
         Returns:
@@ -190,6 +280,12 @@ class ValidatorInterface:
         if "--user-agent" not in tool_options:
             tool_options["--user-agent"] = USER_AGENT
 
+        # Compile native ignore rules to validator filter
+        if self.ignore:
+            for name, value in self.ignore.get_tool_options().items():
+                if name not in tool_options:
+                    tool_options[name] = value
+
         # TODO: Get the checked source
         # NOTE: This option does not exists in vnu, have to implement own solution, it
         # means this would requires to request again the ressource to get it
@@ -262,7 +358,7 @@ class ValidatorInterface:
         )
 
         # Init a new ReportStore object
-        report = self.REPORT_CLASS(paths)
+        report = self.REPORT_CLASS(paths, ignore=self.ignore)
 
         # Check for local file path validity
         for item in paths[:]:
@@ -278,6 +374,11 @@ class ValidatorInterface:
                 # Purge erroneous path from paths to validate
                 paths.pop(paths.index(item))
 
+        # Only validate the first path of identical bodies
+        duplicates = {}
+        if self.hasher:
+            paths, duplicates = self.hasher.group(paths)
+
         if len(paths) > 0:
             try:
                 content = self.validate_item(
@@ -296,4 +397,18 @@ class ValidatorInterface:
                         },
                     ], raw=False)
 
+        if self.hasher:
+            # Keep origin messages for duplicates from next validations
+            for item in paths:
+                messages = report.registry.get(report.get_key(item))
+                if messages and self.hasher.is_origin(item):
+                    self.origins[item] = json.dumps(messages, default=str)
+
+            if duplicates:
+                report.add_duplicates(duplicates, origins={
+                    origin: json.loads(self.origins[origin])
+                    for origin in set(duplicates.values())
+                    if origin in self.origins
+                })
+
         return report
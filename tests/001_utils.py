@@ -1,12 +1,22 @@
 import io
 import json
+import logging
+
 import pytest
 
 from html_checker.exceptions import HtmlCheckerBaseException
-from html_checker.utils.documents import write_documents
-from html_checker.utils.paths import is_local_ressource, is_url, resolve_paths
-from html_checker.utils.structures import reduce_unique, merge_compute
-from html_checker.utils.texts import format_hostname
+from html_checker.utils.documents import iter_chunks, write_documents
+from html_checker.utils.paths import (
+    get_cache_dir, get_path_key, is_local_ressource, is_url, resolve_paths
+)
+from html_checker.utils.pipeline import iter_batches, iter_prefetched
+from html_checker.utils.search import SearchIndex
+from html_checker.utils.structures import (
+    BloomFilter, DigestSet, merge_compute, reduce_unique
+)
+from html_checker.utils.texts import (
+    format_hostname, message_fingerprint, normalize_message
+)
 
 
 @pytest.mark.parametrize("path, expected", [
@@ -294,6 +304,69 @@ def test_write_documents(temp_builds_dir, documents, expected):
         assert content == doc["content"]
 
 
+def test_get_cache_dir(monkeypatch):
+    """
+    Cache directory should be located in user cache directory.
+    """
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+    assert get_cache_dir("foo") == resolve_paths("~/.cache/py-html-checker/foo")
+
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/cache")
+    assert get_cache_dir("foo", "bar") == "/tmp/cache/py-html-checker/foo/bar"
+
+
+def test_get_path_key():
+    """
+    Path key should be stable and depend from the resolved path.
+    """
+    assert get_path_key("/foo/bar") == get_path_key("/foo/./bar/")
+    assert get_path_key("/foo/bar") != get_path_key("/foo/baz")
+    assert len(get_path_key("/foo/bar")) == 16
+
+
+@pytest.mark.parametrize("document, size, expected", [
+    (
+        {"content": "foobar"},
+        2,
+        ["foobar"],
+    ),
+    (
+        {"chunks": iter(["f", "o", "o", "b", "a", "r"])},
+        2,
+        ["fo", "ob", "ar"],
+    ),
+    (
+        {"chunks": iter(["foo", "b", "a", "r"])},
+        4,
+        ["foob", "ar"],
+    ),
+    (
+        {"chunks": iter([])},
+        4,
+        [],
+    ),
+])
+def test_iter_chunks(document, size, expected):
+    """
+    Document content should be iterated by chunks of minimal size.
+    """
+    assert list(iter_chunks(document, size=size)) == expected
+
+
+def test_write_documents_chunks(temp_builds_dir):
+    """
+    Document content chunks should be written to file.
+    """
+    destination = temp_builds_dir.join("write_documents_chunks").strpath
+
+    docs = write_documents(destination, [
+        {"document": "foo.txt", "chunks": iter(["f", "o", "o"])},
+    ])
+
+    with io.open(docs[0], "r") as fp:
+        assert fp.read() == "foo"
+
+
 @pytest.mark.parametrize("value, expected", [
     (
         "foo",
@@ -355,3 +428,212 @@ def test_format_hostname_fail(value, expected):
         format_hostname(value)
 
     assert expected == str(excinfo.value)
+
+
+@pytest.mark.parametrize("value,expected", [
+    (
+        "Duplicate ID “foo”.",
+        "Duplicate ID “…”.",
+    ),
+    (
+        "Attribute “foo” not allowed on element “div” at this point.",
+        "Attribute “…” not allowed on element “…” at this point.",
+    ),
+    (
+        "Bad value \"12\" for attribute width.",
+        "Bad value “…” for attribute width.",
+    ),
+    (
+        "Consider using the h1 element\nfor 3  headings.",
+        "Consider using the h1 element for # headings.",
+    ),
+])
+def test_normalize_message(value, expected):
+    """
+    Message values should be replaced to get the message template.
+    """
+    assert normalize_message(value) == expected
+
+
+def test_search_index():
+    """
+    Search index should map templates and name trigrams to ordered path ids.
+    """
+    index = SearchIndex()
+
+    assert index.add("/foo.html", [
+        {"message": "Duplicate ID “a”."},
+        {"message": "Duplicate ID “b”."},
+    ]) == 1
+    # Placeholder row of a clean path is not a message
+    assert index.add("/bar.html", [
+        {"type": "debug", "message": "There was not any log report for this "
+                                     "path."},
+    ]) == 2
+    assert index.add("/foo-bar.html", [
+        {"message": "Duplicate ID “c”."},
+        {"message": "Stray end tag “div”."},
+    ]) == 3
+
+    assert index.templates == {
+        "Duplicate ID “…”.": [1, 3],
+        "Stray end tag “…”.": [3],
+    }
+    assert index.trigrams["foo"] == [1, 3]
+    assert index.trigrams["bar"] == [2, 3]
+    assert index.trigrams[".ht"] == [1, 2, 3]
+
+    script = index.dump(["a.html", "b.html", "c.html"])
+    assert script.startswith("htmlCheckerSearchIndex(")
+    assert script.endswith(");\n")
+
+    payload = json.loads(script[len("htmlCheckerSearchIndex("):-len(");\n")])
+    assert payload["paths"] == [
+        ["/foo.html", "a.html"],
+        ["/bar.html", "b.html"],
+        ["/foo-bar.html", "c.html"],
+    ]
+    assert payload["templates"] == index.templates
+
+    # Trigrams from every paths are only listed as common
+    assert payload["common"] == [".ht", "htm", "tml"]
+    assert ".ht" not in payload["trigrams"]
+    assert payload["trigrams"]["foo"] == [1, 3]
+
+
+def test_message_fingerprint():
+    """
+    Fingerprint should only depend from message type and template.
+    """
+    fingerprint = message_fingerprint("error", "Duplicate ID “foo”.")
+
+    assert len(fingerprint) == 16
+    assert fingerprint == message_fingerprint("error", "Duplicate ID “bar”.")
+    assert fingerprint != message_fingerprint("warning", "Duplicate ID “foo”.")
+    assert fingerprint != message_fingerprint("error", "Stray end tag “foo”.")
+
+
+@pytest.mark.parametrize("seen", [
+    DigestSet(),
+    BloomFilter(capacity=100, error_rate=0.001),
+])
+def test_seen_structures(seen):
+    """
+    Items should only be added once, either with exact digests or a Bloom
+    filter.
+    """
+    added = [
+        item for item in ["a", "b", "a", "c", "b", "d"]
+        if seen.add(item)
+    ]
+
+    assert added == ["a", "b", "c", "d"]
+    assert len(seen) == 4
+    assert seen.duplicates == 2
+    assert "c" in seen
+
+
+def test_bloom_filter_capacity_warning(caplog):
+    """
+    A warning should be logged only once when Bloom filter capacity is
+    exceeded.
+    """
+    bloom = BloomFilter(capacity=2, error_rate=0.01)
+
+    for item in ["a", "b", "a"]:
+        bloom.add(item)
+
+    assert caplog.record_tuples == []
+
+    for item in ["c", "d"]:
+        bloom.add(item)
+
+    assert caplog.record_tuples == [
+        (
+            "py-html-checker",
+            logging.WARNING,
+            (
+                "Bloom filter capacity of 2 items is exceeded, more items "
+                "than the 0.01 error rate may be wrongly ignored as "
+                "duplicates"
+            ),
+        ),
+    ]
+
+
+def test_bloom_filter_error_rate():
+    """
+    Bloom filter false positive rate should be near the expected one when
+    filled to capacity.
+    """
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+
+    for i in range(10000):
+        bloom.add("http://perdu.com/{}".format(i))
+
+    # A few items may have been wrongly refused while filling
+    assert len(bloom) + bloom.duplicates == 10000
+    assert bloom.duplicates < 200
+    assert bloom.add("http://perdu.com/42") is False
+
+    false_positives = len([
+        i for i in range(10000)
+        if "http://foo.com/{}".format(i) in bloom
+    ])
+
+    assert false_positives < 200
+
+
+@pytest.mark.parametrize("items,size,expected", [
+    ([], 2, []),
+    ([1], 2, [[1]]),
+    ([1, 2], 2, [[1, 2]]),
+    ([1, 2, 3, 4, 5], 2, [[1, 2], [3, 4], [5]]),
+    ([1, 2, 3], 1, [[1], [2], [3]]),
+])
+def test_iter_batches(items, size, expected):
+    """
+    Items should be grouped in lists of a maximum size.
+    """
+    assert list(iter_batches(iter(items), size)) == expected
+
+
+def test_iter_prefetched():
+    """
+    Items should be produced from a thread in their original order and
+    producer should not go further than queue size.
+    """
+    consumed = []
+
+    def items():
+        for i in range(10):
+            consumed.append(i)
+            yield i
+
+    prefetched = iter_prefetched(items(), maxsize=2)
+
+    assert next(prefetched) == 0
+    # First item has been taken out from queue, two are waiting and producer
+    # is blocked on the next one
+    assert len(consumed) <= 4
+
+    assert list(prefetched) == list(range(1, 10))
+
+
+def test_iter_prefetched_error():
+    """
+    An exception from producer should be raised again from consumer after
+    previously produced items.
+    """
+    def items():
+        yield "a"
+        yield "b"
+        raise HtmlCheckerBaseException("Broken")
+
+    prefetched = iter_prefetched(items(), maxsize=1)
+
+    assert next(prefetched) == "a"
+    assert next(prefetched) == "b"
+
+    with pytest.raises(HtmlCheckerBaseException, match="Broken"):
+        next(prefetched)
@@ -2,14 +2,19 @@
 NOTE: Ressource URLs are not tested to avoid depending from a webserver
       instance.
 """
+import gzip
+import io
+import logging
 import os
 
 import pytest
 import requests
+from urllib3.exceptions import ReadTimeoutError
 
 from html_checker import USER_AGENT
 from html_checker.exceptions import PathInvalidError, SitemapInvalidError
 from html_checker.sitemap import Sitemap
+from html_checker.utils.structures import BloomFilter, DigestSet
 
 
 class FakeResponse:
@@ -45,7 +50,8 @@ def mock_requests_get(*args, **kwargs):
         {
             "args": ("http://perdu.com",),
             "kwargs": {
-                "headers": {"User-Agent": USER_AGENT}
+                "headers": {"User-Agent": USER_AGENT},
+                "timeout": Sitemap.TIMEOUT,
             },
         },
     ),
@@ -55,7 +61,8 @@ def mock_requests_get(*args, **kwargs):
         {
             "args": ("http://perdu.com",),
             "kwargs": {
-                "headers": {"User-Agent": "Foobar"}
+                "headers": {"User-Agent": "Foobar"},
+                "timeout": Sitemap.TIMEOUT,
             },
         },
     ),
@@ -302,3 +309,335 @@ def test_get_urls(settings, path, expected):
     filepath = os.path.join(settings.fixtures_path, path)
 
     assert expected == s.get_urls(filepath)
+
+
+@pytest.mark.parametrize("path", [
+    "sitemap.invalid.xml",
+    "sitemap.malformed.xml",
+])
+def test_iter_urls_fail(settings, path):
+    """
+    Should raise exception for invalid XML sitemap once iterated.
+    """
+    s = Sitemap()
+
+    filepath = os.path.join(settings.fixtures_path, path)
+
+    with pytest.raises(SitemapInvalidError):
+        list(s.iter_urls(filepath))
+
+
+def test_iter_sitemap_xml_stream(tmp_path):
+    """
+    XML sitemap should be parsed lazily from its file without reading it
+    entirely to get the first urls.
+    """
+    s = Sitemap()
+
+    filepath = tmp_path / "sitemap.xml"
+    with io.open(filepath, "w") as fp:
+        fp.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        )
+        for i in range(5000):
+            fp.write("<url><loc>http://perdu.com/{}</loc></url>\n".format(i))
+        fp.write("</urlset>\n")
+
+    with io.open(filepath, "rb") as fp:
+        urls = s.iter_sitemap_xml(fp)
+
+        assert next(urls) == "http://perdu.com/0"
+        assert fp.tell() < os.path.getsize(filepath)
+
+        assert len(list(urls)) == 4999
+
+
+def test_iter_urls_stream_fail(monkeypatch):
+    """
+    Streamed request should have a timeout and a read failure in the middle
+    of response body should raise a sitemap exception.
+    """
+    class FailingRaw(io.RawIOBase):
+        """
+        Simulate a response body which times out after its first chunk.
+        """
+        def __init__(self):
+            self.chunks = [b'<urlset><url><loc>http://perdu.com/1</loc></url>']
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            if not self.chunks:
+                raise ReadTimeoutError(None, None, "Read timed out.")
+            chunk = self.chunks.pop(0)
+            buffer[:len(chunk)] = chunk
+            return len(chunk)
+
+    class StreamedResponse:
+        status_code = 200
+
+        def __init__(self):
+            self.raw = FailingRaw()
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+    passed = {}
+
+    def mock_session_get(path, **kwargs):
+        passed.update(kwargs)
+        return StreamedResponse()
+
+    s = Sitemap()
+    monkeypatch.setattr(s.session, "get", mock_session_get)
+
+    with pytest.raises(SitemapInvalidError) as excinfo:
+        s.get_urls("http://perdu.com/sitemap.xml")
+
+    assert str(excinfo.value) == (
+        "Unable to read sitemap: None: Read timed out."
+    )
+    assert passed["stream"] is True
+    assert passed["timeout"] == Sitemap.TIMEOUT
+
+
+def test_iter_urls_sitemap_index(caplog, tmp_path):
+    """
+    Sitemap index should be followed to merge urls from its child sitemaps
+    without duplicates, nested index included and unreadable child skipped.
+    """
+    urlset = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        '{}</urlset>\n'
+    )
+    index = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        '{}</sitemapindex>\n'
+    )
+
+    def write(name, template, locations, item):
+        filepath = str(tmp_path / name)
+        with io.open(filepath, "w") as fp:
+            fp.write(template.format("".join([
+                "<{item}><loc>{loc}</loc></{item}>\n".format(item=item, loc=v)
+                for v in locations
+            ])))
+        return filepath
+
+    first = write("first.xml", urlset, ["http://perdu.com/1",
+                                        "http://perdu.com/2"], "url")
+    second = write("second.xml", urlset, ["http://perdu.com/2",
+                                          "http://perdu.com/3"], "url")
+    nested = write("nested.xml", index, [second], "sitemap")
+    missing = str(tmp_path / "missing.xml")
+    root = write("sitemap.xml", index, [first, nested, missing, first],
+                 "sitemap")
+
+    s = Sitemap(workers=2)
+
+    assert s.get_urls(root) == [
+        "http://perdu.com/1",
+        "http://perdu.com/2",
+        "http://perdu.com/3",
+    ]
+    assert caplog.record_tuples[-1][1] == logging.WARNING
+    assert missing in caplog.record_tuples[-1][2]
+
+
+def test_iter_urls_sitemap_index_network_error(monkeypatch, caplog,
+                                               tmp_path):
+    """
+    Child sitemap failing from a network error should be skipped with a
+    warning.
+    """
+    fetch_sitemap = Sitemap.fetch_sitemap
+
+    def mock_fetch_sitemap(self, path):
+        if path.startswith("http"):
+            raise requests.exceptions.ConnectionError("Connection refused")
+        return fetch_sitemap(self, path)
+
+    monkeypatch.setattr(Sitemap, "fetch_sitemap", mock_fetch_sitemap)
+
+    first = tmp_path / "first.xml"
+    first.write_text(
+        "<urlset><url><loc>http://perdu.com/1</loc></url></urlset>"
+    )
+    root = tmp_path / "sitemap.xml"
+    root.write_text(
+        "<sitemapindex>"
+        "<sitemap><loc>http://perdu.com/child.xml</loc></sitemap>"
+        "<sitemap><loc>{}</loc></sitemap>"
+        "</sitemapindex>".format(first)
+    )
+
+    s = Sitemap()
+
+    assert s.get_urls(str(root)) == ["http://perdu.com/1"]
+    assert caplog.record_tuples[-1] == (
+        "py-html-checker",
+        logging.WARNING,
+        "Unable to read child sitemap 'http://perdu.com/child.xml': "
+        "Connection refused",
+    )
+
+
+@pytest.mark.parametrize("seen", [
+    DigestSet(),
+    BloomFilter(capacity=100, error_rate=0.001),
+])
+def test_iter_urls_seen(tmp_path, seen):
+    """
+    Urls should be canonicalized then deduplicated with caller structure,
+    either from a single sitemap or from a sitemap index.
+    """
+    urlset = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        '{}</urlset>\n'
+    )
+    single = str(tmp_path / "single.xml")
+    child = str(tmp_path / "child.xml")
+    index = str(tmp_path / "index.xml")
+
+    with io.open(single, "w") as fp:
+        fp.write(urlset.format("".join([
+            "<url><loc>{}</loc></url>\n".format(v)
+            for v in ["http://perdu.com/1", "http://PERDU.com/1",
+                      "http://perdu.com/2"]
+        ])))
+
+    with io.open(child, "w") as fp:
+        fp.write(urlset.format("".join([
+            "<url><loc>{}</loc></url>\n".format(v)
+            for v in ["http://perdu.com/2", "http://perdu.com/3"]
+        ])))
+
+    with io.open(index, "w") as fp:
+        fp.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex><sitemap><loc>{}</loc></sitemap>'
+            '</sitemapindex>\n'.format(child)
+        )
+
+    s = Sitemap(seen=seen, canonicalize=lambda url: url.lower())
+
+    assert s.get_urls(single) == [
+        "http://perdu.com/1",
+        "http://perdu.com/2",
+    ]
+    # Already seen urls are not yielded again from another sitemap
+    assert s.get_urls(index) == [
+        "http://perdu.com/3",
+    ]
+    assert len(seen) == 3
+    assert seen.duplicates == 2
+
+
+@pytest.mark.parametrize("template, item", [
+    (
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        '{}</urlset>\n',
+        "url",
+    ),
+    (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        '{}</sitemapindex>\n',
+        "sitemap",
+    ),
+])
+def test_iter_urls_empty_loc(caplog, tmp_path, template, item):
+    """
+    Empty or blank locations should be skipped like missing ones.
+    """
+    child = str(tmp_path / "child.xml")
+    root = str(tmp_path / "sitemap.xml")
+
+    with io.open(child, "w") as fp:
+        fp.write(
+            '<urlset><url><loc>http://perdu.com/1</loc></url></urlset>\n'
+        )
+
+    location = child if item == "sitemap" else " http://perdu.com/1 "
+    with io.open(root, "w") as fp:
+        fp.write(template.format("".join([
+            "<{item}><loc>{loc}</loc></{item}>\n".format(item=item, loc=v)
+            for v in ["", "  ", location]
+        ])))
+
+    s = Sitemap(seen=DigestSet())
+
+    assert s.get_urls(root) == ["http://perdu.com/1"]
+    assert (
+        "py-html-checker",
+        logging.WARNING,
+        "There was 2 item(s) without a <loc> element or with an empty one.",
+    ) in caplog.record_tuples
+
+
+def test_iter_urls_sitemap_index_depth(caplog, tmp_path):
+    """
+    Nested sitemap indexes should not be followed over maximum depth.
+    """
+    template = (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex><sitemap><loc>{}</loc></sitemap></sitemapindex>\n'
+    )
+    root = str(tmp_path / "sitemap.xml")
+    nested = str(tmp_path / "nested.xml")
+    deepest = str(tmp_path / "deepest.xml")
+
+    for filepath, location in [(root, nested), (nested, deepest)]:
+        with io.open(filepath, "w") as fp:
+            fp.write(template.format(location))
+
+    s = Sitemap(max_depth=1)
+
+    assert s.get_urls(root) == []
+    assert (
+        "py-html-checker",
+        logging.WARNING,
+        "Ignored child sitemap over maximum depth: {}".format(deepest),
+    ) in caplog.record_tuples
+
+
+@pytest.mark.parametrize("path", [
+    "sitemap.xml",
+    "sitemap.json",
+])
+def test_get_urls_gzip(settings, tmp_path, path):
+    """
+    Gzip compressed sitemap should be decompressed while it is parsed.
+    """
+    s = Sitemap()
+
+    filepath = str(tmp_path / "{}.gz".format(path))
+    with io.open(os.path.join(settings.fixtures_path, path), "rb") as fp:
+        with gzip.open(filepath, "wb") as compressed:
+            compressed.write(fp.read())
+
+    assert s.get_urls(filepath) == [
+        "http://perdu.com/",
+        "https://www.google.com/",
+    ]
+
+
+def test_get_urls_gzip_invalid(tmp_path):
+    """
+    Truncated gzip sitemap should raise exception.
+    """
+    s = Sitemap()
+
+    filepath = str(tmp_path / "sitemap.xml.gz")
+    with io.open(filepath, "wb") as fp:
+        fp.write(gzip.compress(b'<?xml version="1.0"?><urlset></urlset>')[:20])
+
+    with pytest.raises(SitemapInvalidError):
+        s.get_urls(filepath)
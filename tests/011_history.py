@@ -0,0 +1,91 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pytest
+
+from html_checker.exceptions import HistoryInvalidError
+from html_checker.history import RunHistory, parse_datetime
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None),
+    ("", None),
+    ("nope", None),
+    ("2019-07-08", datetime(2019, 7, 8, tzinfo=timezone.utc)),
+    ("2019-07-08T10:30:00Z", datetime(2019, 7, 8, 10, 30,
+                                      tzinfo=timezone.utc)),
+    ("2019-07-08T12:30:00+02:00", datetime(2019, 7, 8, 10, 30,
+                                           tzinfo=timezone.utc)),
+])
+def test_parse_datetime(value, expected):
+    """
+    Sitemap dates should be parsed to timezone aware datetimes.
+    """
+    assert parse_datetime(value) == expected
+
+
+def test_record_and_split(tmp_path):
+    """
+    Recorded results should be carried over for paths not modified since
+    given date.
+    """
+    sitemap = "http://perdu.com/sitemap.xml"
+    history = RunHistory(str(tmp_path / "history"))
+
+    assert history.get_last_run(sitemap) is None
+
+    started = datetime(2024, 1, 10, tzinfo=timezone.utc)
+    writer = history.open_writer(sitemap)
+    writer.write(OrderedDict([
+        ("http://perdu.com/old", [{"type": "error", "message": "Foo"}]),
+        ("http://perdu.com/new", None),
+    ]))
+    history.record(sitemap, started, writer)
+
+    # Reload from files
+    history = RunHistory(str(tmp_path / "history"))
+
+    assert history.get_last_run(sitemap) == started
+
+    validate, carried = history.split(
+        sitemap,
+        [
+            "http://perdu.com/old",
+            "http://perdu.com/new",
+            "http://perdu.com/nodate",
+            "http://perdu.com/unknown",
+        ],
+        {
+            "http://perdu.com/old": "2024-01-01",
+            "http://perdu.com/new": "2024-01-15",
+            "http://perdu.com/unknown": "2024-01-01",
+        },
+        started,
+    )
+
+    assert validate == [
+        "http://perdu.com/new",
+        "http://perdu.com/nodate",
+        "http://perdu.com/unknown",
+    ]
+    assert carried == OrderedDict([
+        ("http://perdu.com/old", [{"type": "error", "message": "Foo"}]),
+    ])
+
+    # Without a date every paths are validated
+    validate, carried = history.split(sitemap, ["http://perdu.com/old"],
+                                      {"http://perdu.com/old": "2024-01-01"},
+                                      None)
+
+    assert validate == ["http://perdu.com/old"]
+    assert carried == OrderedDict()
+
+
+def test_invalid_index(tmp_path):
+    """
+    An invalid history index should raise an exception.
+    """
+    (tmp_path / "history.json").write_text("[]")
+
+    with pytest.raises(HistoryInvalidError):
+        RunHistory(str(tmp_path))
@@ -0,0 +1,122 @@
+import pytest
+
+from html_checker.canonical import UrlCanonicalizer
+from html_checker.exceptions import RuleInvalidError
+
+
+@pytest.mark.parametrize("rules, tracking, url, expected", [
+    # No rules
+    (
+        [],
+        None,
+        "https://X.com/a/?utm_source=foo#top",
+        "https://X.com/a/?utm_source=foo#top",
+    ),
+    # File paths are never changed
+    (
+        ["strip-slash", "fragment"],
+        None,
+        "foo/bar/",
+        "foo/bar/",
+    ),
+    (
+        ["fragment"],
+        None,
+        "https://x.com/a#top",
+        "https://x.com/a",
+    ),
+    (
+        ["tracking"],
+        None,
+        "https://x.com/a?utm_source=foo&id=1&gclid=2&utm_medium=bar",
+        "https://x.com/a?id=1",
+    ),
+    (
+        ["tracking"],
+        ["ref_*"],
+        "https://x.com/a?ref_src=foo&id=1",
+        "https://x.com/a?id=1",
+    ),
+    (
+        ["tracking"],
+        None,
+        "https://x.com/a?utm_source=foo",
+        "https://x.com/a",
+    ),
+    (
+        ["sort-query"],
+        None,
+        "https://x.com/a?b=2&a=%20&c",
+        "https://x.com/a?a=%20&b=2&c",
+    ),
+    (
+        ["lowercase-host"],
+        None,
+        "https://User@X.Com/Foo",
+        "https://User@x.com/Foo",
+    ),
+    (
+        ["strip-slash"],
+        None,
+        "https://x.com/a/",
+        "https://x.com/a",
+    ),
+    (
+        ["strip-slash"],
+        None,
+        "https://x.com",
+        "https://x.com/",
+    ),
+    (
+        ["add-slash"],
+        None,
+        "https://x.com/a",
+        "https://x.com/a/",
+    ),
+    (
+        ["add-slash"],
+        None,
+        "https://x.com/a/index.html",
+        "https://x.com/a/index.html",
+    ),
+    (
+        UrlCanonicalizer.RULES[:-1],
+        None,
+        "https://X.com/a/?utm_source=foo&b=2&a=1#top",
+        "https://x.com/a?a=1&b=2",
+    ),
+])
+def test_canonicalize(rules, tracking, url, expected):
+    """
+    Rules should be applied to urls.
+    """
+    canonicalizer = UrlCanonicalizer(rules=rules, tracking=tracking)
+
+    assert canonicalizer.canonicalize(url) == expected
+
+
+@pytest.mark.parametrize("rules", [
+    ["nope"],
+    ["strip-slash", "add-slash"],
+])
+def test_invalid_rules(rules):
+    """
+    Unknown or conflicting rules should raise an exception.
+    """
+    with pytest.raises(RuleInvalidError):
+        UrlCanonicalizer(rules=rules)
+
+
+def test_iter_canonical():
+    """
+    Canonical urls should be yielded lazily.
+    """
+    canonicalizer = UrlCanonicalizer(rules=["fragment"])
+
+    urls = canonicalizer.iter_canonical(iter([
+        "https://x.com/a#top",
+        "https://x.com/a",
+    ]))
+
+    assert next(urls) == "https://x.com/a"
+    assert list(urls) == ["https://x.com/a"]
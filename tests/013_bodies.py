@@ -0,0 +1,69 @@
+from html_checker.bodies import BodyHasher
+
+
+def test_group(tmp_path):
+    """
+    Paths with identical body should be grouped on the first one, unreadable
+    paths are never grouped.
+    """
+    for name, content in [
+        ("foo.html", "<p>Foo</p>"),
+        ("bar.html", "<p>Bar</p>"),
+        ("foo-alias.html", "<p>Foo</p>"),
+        ("foo-again.html", "<p>Foo</p>"),
+    ]:
+        (tmp_path / name).write_text(content)
+
+    paths = [
+        str(tmp_path / "foo.html"),
+        str(tmp_path / "bar.html"),
+        str(tmp_path / "foo-alias.html"),
+        str(tmp_path / "missing.html"),
+        str(tmp_path / "missing.html"),
+        str(tmp_path / "foo-again.html"),
+    ]
+
+    unique, duplicates = BodyHasher(workers=2).group(paths)
+
+    assert unique == [
+        str(tmp_path / "foo.html"),
+        str(tmp_path / "bar.html"),
+        str(tmp_path / "missing.html"),
+        str(tmp_path / "missing.html"),
+    ]
+    assert duplicates == {
+        str(tmp_path / "foo-alias.html"): str(tmp_path / "foo.html"),
+        str(tmp_path / "foo-again.html"): str(tmp_path / "foo.html"),
+    }
+
+
+def test_group_across_calls(tmp_path):
+    """
+    Paths should be grouped on a path from a previous call.
+    """
+    for name, content in [
+        ("foo.html", "<p>Foo</p>"),
+        ("bar.html", "<p>Bar</p>"),
+        ("foo-alias.html", "<p>Foo</p>"),
+    ]:
+        (tmp_path / name).write_text(content)
+
+    hasher = BodyHasher(workers=2)
+
+    unique, duplicates = hasher.group([
+        str(tmp_path / "foo.html"),
+        str(tmp_path / "bar.html"),
+    ])
+
+    assert duplicates == {}
+    assert hasher.is_origin(str(tmp_path / "foo.html")) is True
+
+    unique, duplicates = hasher.group([
+        str(tmp_path / "foo-alias.html"),
+    ])
+
+    assert unique == []
+    assert duplicates == {
+        str(tmp_path / "foo-alias.html"): str(tmp_path / "foo.html"),
+    }
+    assert hasher.is_origin(str(tmp_path / "foo-alias.html")) is False
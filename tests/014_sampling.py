@@ -0,0 +1,87 @@
+from collections import OrderedDict
+
+import pytest
+
+from html_checker.sampling import Sampler
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("http://perdu.com/", "perdu.com/"),
+    ("http://perdu.com/about", "perdu.com/about"),
+    ("http://perdu.com/products/blue-shirt", "perdu.com/products/{slug}"),
+    ("http://perdu.com/products/shirt-42", "perdu.com/products/{id}"),
+    ("http://perdu.com/blog/2024/10/title.html",
+     "perdu.com/blog/{n}/{n}/{slug}.html"),
+    ("http://perdu.com/2024/", "perdu.com/{n}/"),
+    ("http://perdu.com/search?q=foo&page=2", "perdu.com/search?page&q"),
+])
+def test_get_url_pattern(path, expected):
+    """
+    Url pattern should generalize path segments.
+    """
+    assert Sampler().get_url_pattern(path) == expected
+
+
+def test_sample_and_estimates():
+    """
+    Representatives should be spread over clusters and their counts
+    extrapolated to every paths.
+    """
+    paths = ["http://perdu.com/products/item-{}".format(i) for i in range(10)]
+    paths.insert(3, "http://perdu.com/about")
+
+    sampler = Sampler(size=2)
+
+    selected = sampler.sample(paths)
+
+    assert selected == [
+        "http://perdu.com/products/item-0",
+        "http://perdu.com/about",
+        "http://perdu.com/products/item-5",
+    ]
+
+    sampler.add(OrderedDict([
+        ("http://perdu.com/products/item-0", [
+            {"type": "error", "message": "Foo"},
+            {"type": "info", "subType": "warning", "message": "Bar"},
+        ]),
+        ("http://perdu.com/about", None),
+        ("http://perdu.com/products/item-5", [
+            {"type": "error", "message": "Foo"},
+        ]),
+    ]))
+
+    estimates = sampler.get_estimates()
+
+    assert estimates["errors"] == 10
+    assert estimates["warnings"] == 5
+    assert estimates["paths"] == 11
+    assert estimates["sampled"] == 3
+    assert estimates["ratio"] == 0.2727
+    assert estimates["clusters"][1] == {
+        "key": "perdu.com/about",
+        "size": 1,
+        "sampled": 1,
+        "errors": 0,
+        "warnings": 0,
+    }
+
+
+def test_cluster_dom(tmp_path):
+    """
+    Documents with the same structure should be clustered together, even
+    with a different number of repeated items.
+    """
+    for name, content in [
+        ("a.html", "<html><body><ul><li>1</li><li>2</li></ul></body></html>"),
+        ("b.html", "<html><body><ul><li>3</li></ul></body></html>"),
+        ("c.html", "<html><body><p>Foo<br>bar</p></body></html>"),
+    ]:
+        (tmp_path / name).write_text(content)
+
+    paths = [str(tmp_path / name) for name in ["a.html", "b.html", "c.html",
+                                               "missing.html"]]
+
+    clusters = list(Sampler(method="dom").cluster(paths).values())
+
+    assert clusters == [paths[:2], paths[2:3], paths[3:]]
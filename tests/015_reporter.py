@@ -1,9 +1,11 @@
+import json
 from collections import OrderedDict
 
 import pytest
 
 from html_checker.exceptions import ReportError
 from html_checker.reporter import ReportStore
+from html_checker.rules import IgnoreRules
 
 
 @pytest.mark.parametrize("paths,expected", [
@@ -180,3 +182,53 @@ def test_add(paths, contents, expected):
         r.add(content)
 
     assert OrderedDict(expected) == r.registry
+
+
+@pytest.mark.parametrize("native,expected_registry,expected_ignored", [
+    (
+        True,
+        [
+            ("foo.html", [
+                {"message": "Duplicate ID “nav”."},
+                {"message": "Foo."},
+            ]),
+            ("bar.html", [
+                {"message": "Duplicate ID “nav”."},
+            ]),
+        ],
+        {},
+    ),
+    (
+        False,
+        [
+            ("foo.html", [
+                {"message": "Foo."},
+            ]),
+            ("bar.html", None),
+        ],
+        {
+            "foo.html": 1,
+            "bar.html": 1,
+        },
+    ),
+])
+def test_add_ignored(native, expected_registry, expected_ignored):
+    """
+    Only non native rules should be applied from reporter, ignored messages
+    are counted instead of being stored.
+    """
+    r = ReportStore(
+        ["foo.html", "bar.html"],
+        ignore=IgnoreRules(patterns=["Duplicate ID .*"], native=native)
+    )
+
+    r.add(json.dumps({
+        "messages": [
+            {"url": "foo.html", "message": "Duplicate ID “nav”."},
+            {"url": "foo.html", "message": "Foo."},
+            {"url": "bar.html", "message": "Duplicate ID “nav”."},
+        ]
+    }).encode("utf-8"))
+
+    assert OrderedDict(expected_registry) == r.registry
+    assert expected_ignored == r.ignored
@@ -0,0 +1,94 @@
+import pytest
+
+from html_checker.exceptions import PathInvalidError, RuleInvalidError
+from html_checker.rules import IgnoreRules
+
+
+def test_empty():
+    """
+    Without any rules, nothing should be matched and there is no validator
+    options.
+    """
+    rules = IgnoreRules()
+
+    assert bool(rules) is False
+    assert rules.regex is None
+    assert rules.match("Foo") is False
+    assert rules.get_tool_options() == {}
+
+
+def test_read_file(settings):
+    """
+    Rules file should be read without empty lines and comments.
+    """
+    rules = IgnoreRules(
+        filepath=str(settings.fixtures_path / "ignore_rules.txt")
+    )
+
+    assert rules.patterns == [
+        "Duplicate ID .*",
+        "Consider adding a “lang” attribute.*",
+    ]
+
+
+def test_read_file_missing(settings):
+    """
+    Unexisting rules file should raise an exception.
+    """
+    with pytest.raises(PathInvalidError):
+        IgnoreRules(filepath=str(settings.fixtures_path / "nope.txt"))
+
+
+def test_invalid_rule():
+    """
+    Invalid regular expression should raise an exception which name the
+    invalid rule.
+    """
+    with pytest.raises(RuleInvalidError) as excinfo:
+        IgnoreRules(patterns=["Foo.*", "Bar[a-"])
+
+    assert str(excinfo.value).startswith("Invalid ignore rule 'Bar[a-'")
+
+
+@pytest.mark.parametrize("message,expected", [
+    ("Duplicate ID “nav”.", True),
+    ("Element “div” not allowed.", False),
+    # Rule has to match the whole message
+    ("Error: Duplicate ID “nav”.", False),
+    ("Bad value “1.5” for attribute.", True),
+    ("Bad value “1x5” for attribute.", False),
+    ("Bad value “1.5” for attribute. Really.", False),
+])
+def test_match(message, expected):
+    """
+    Message should be matched from patterns and exact messages.
+    """
+    rules = IgnoreRules(
+        patterns=["Duplicate ID .*"],
+        messages=["Bad value “1.5” for attribute."],
+    )
+
+    assert rules.match(message) is expected
+
+
+@pytest.mark.parametrize("native,expected", [
+    (
+        True,
+        {"--filterpattern": "(?:Duplicate ID .*)|(?:Foo\\ bar\\.)"},
+    ),
+    (
+        False,
+        {},
+    ),
+])
+def test_get_tool_options(native, expected):
+    """
+    Only native rules should be compiled to a validator filter option.
+    """
+    rules = IgnoreRules(
+        patterns=["Duplicate ID .*"],
+        messages=["Foo bar."],
+        native=native,
+    )
+
+    assert rules.get_tool_options() == expected
@@ -0,0 +1,190 @@
+import pytest
+
+from html_checker.export.render import ExporterRenderer
+from html_checker.statistics import StatisticsEngine
+
+
+def make_data(errors=0, warnings=0, infos=0):
+    """
+    Return path data with given number of messages for each type.
+    """
+    messages = (
+        [{"type": "error", "message": "Duplicate ID “{}”.".format(i)}
+         for i in range(errors)] +
+        [{"type": "warning", "message": "Section lacks heading."}] * warnings +
+        [{"type": "info", "message": "Trailing slash."}] * infos
+    )
+
+    return {
+        "messages": messages,
+        "statistics": {
+            "debugs": 0,
+            "errors": errors,
+            "infos": infos,
+            "warnings": warnings,
+        },
+    }
+
+
+def test_totals_and_rules():
+    """
+    Totals and rule counts should be updated from each added path.
+    """
+    engine = StatisticsEngine()
+
+    engine.add("/foo.html", make_data(errors=2, warnings=1))
+    engine.add("/bar.html", make_data(errors=1, infos=3))
+
+    assert engine.paths == 2
+    assert engine.get_totals() == {
+        "debugs": 0,
+        "errors": 3,
+        "infos": 3,
+        "warnings": 1,
+    }
+    assert engine.get_rules() == [
+        {"type": "error", "template": "Duplicate ID “…”.", "count": 3},
+        {"type": "info", "template": "Trailing slash.", "count": 3},
+        {"type": "warning", "template": "Section lacks heading.", "count": 1},
+    ]
+    assert engine.get_rules(limit=1) == [
+        {"type": "error", "template": "Duplicate ID “…”.", "count": 3},
+    ]
+
+    # Totals are a copy
+    engine.get_totals()["errors"] = 42
+    assert engine.totals["errors"] == 3
+
+
+def test_offenders():
+    """
+    Only the worst paths should be kept, ordered from errors then warnings
+    and the earliest path for ties.
+    """
+    engine = StatisticsEngine(top=3)
+
+    engine.add("/a.html", make_data(errors=1))
+    engine.add("/b.html", make_data(errors=5))
+    engine.add("/c.html", make_data(errors=1, warnings=2))
+    engine.add("/d.html", make_data())
+    engine.add("/e.html", make_data(errors=1, warnings=2))
+    engine.add("/f.html", make_data(errors=3))
+
+    assert [item["name"] for item in engine.get_offenders()] == [
+        "/b.html",
+        "/f.html",
+        "/c.html",
+    ]
+    assert engine.get_offenders()[0] == {
+        "id": 2,
+        "name": "/b.html",
+        "errors": 5,
+        "warnings": 0,
+    }
+
+
+@pytest.mark.parametrize("sizes, percent, expected", [
+    ([], 50, 0),
+    ([3], 50, 3),
+    ([1, 2, 3, 4], 50, 2),
+    ([1, 2, 3, 4], 90, 4),
+    ([0] * 98 + [10, 50], 99, 10),
+    ([0] * 98 + [10, 50], 100, 50),
+])
+def test_percentile(sizes, percent, expected):
+    """
+    Percentiles should be computed from histogram of message counts.
+    """
+    engine = StatisticsEngine()
+
+    for i, size in enumerate(sizes):
+        engine.add("/{}.html".format(i), make_data(infos=size))
+
+    assert engine.get_percentile(percent) == expected
+
+
+def test_summary():
+    """
+    Summary should contains every statistics.
+    """
+    engine = StatisticsEngine()
+
+    engine.add("/foo.html", make_data(errors=2))
+
+    assert engine.summary() == {
+        "paths": 1,
+        "statistics": {
+            "debugs": 0,
+            "errors": 2,
+            "infos": 0,
+            "warnings": 0,
+        },
+        "rules": [
+            {"type": "error", "template": "Duplicate ID “…”.", "count": 2},
+        ],
+        "offenders": [
+            {"id": 1, "name": "/foo.html", "errors": 2, "warnings": 0},
+        ],
+        "percentiles": {"p50": 2, "p90": 2, "p99": 2},
+    }
+
+
+def test_ignored():
+    """
+    Ignored messages should only be in totals once they have been counted.
+    """
+    engine = StatisticsEngine()
+
+    engine.add("/foo.html", make_data(errors=1))
+
+    assert "ignored" not in engine.get_totals()
+
+    engine.add_ignored(2)
+    engine.add_ignored(0)
+
+    assert engine.get_totals()["ignored"] == 2
+
+
+def test_estimates():
+    """
+    Estimates should only be in totals once they have been set.
+    """
+    engine = StatisticsEngine()
+
+    engine.add("/foo.html", make_data(errors=1))
+
+    assert "estimates" not in engine.get_totals()
+
+    engine.set_estimates({
+        "paths": 10,
+        "sampled": 1,
+        "ratio": 0.1,
+        "errors": 10,
+        "warnings": 0,
+        "clusters": [],
+    })
+
+    assert engine.get_totals()["errors"] == 1
+    assert engine.get_totals()["estimates"] == {
+        "paths": 10,
+        "sampled": 1,
+        "ratio": 0.1,
+        "errors": 10,
+        "warnings": 0,
+    }
+
+
+def test_clean_path():
+    """
+    Placeholder row of a clean path should not be counted as a rule nor as a
+    message.
+    """
+    engine = StatisticsEngine()
+
+    engine.add(*ExporterRenderer().build_path("/clean.html", None))
+    engine.add(*ExporterRenderer().build_path("/other.html", []))
+
+    assert engine.paths == 2
+    assert engine.get_rules() == []
+    assert engine.get_percentile(50) == 0
+    assert engine.get_percentile(99) == 0
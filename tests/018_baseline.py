@@ -0,0 +1,208 @@
+import json
+from collections import OrderedDict
+
+import pytest
+
+from html_checker.baseline import Baseline
+from html_checker.exceptions import BaselineInvalidError, PathInvalidError
+from html_checker.export.json import JsonExport
+from html_checker.utils.documents import iter_chunks
+
+
+def make_baseline(tmp_path, report, **kwargs):
+    """
+    Write a packed JSON audit from given report and load it as a baseline.
+    """
+    exporter = JsonExport()
+    exporter.build(OrderedDict(report))
+
+    document = exporter.release(pack=True)[0]
+
+    path = tmp_path / "audit.json"
+    path.write_text("".join(iter_chunks(document)))
+
+    return Baseline(str(path), **kwargs)
+
+
+def test_filter(tmp_path):
+    """
+    Known messages should be removed, new messages kept and resolved messages
+    added.
+    """
+    baseline = make_baseline(tmp_path, [
+        ("/foo.html", [
+            {"type": "error", "lastLine": 10, "lastColumn": 1,
+             "message": "Duplicate ID “nav”."},
+            {"type": "info", "subType": "warning", "lastLine": 20,
+             "lastColumn": 1, "message": "Section lacks heading."},
+            {"type": "error", "message": "Stray doctype."},
+        ]),
+        ("/bar.html", [
+            {"type": "error", "message": "Stray doctype."},
+        ]),
+    ])
+
+    registry = baseline.filter(OrderedDict([
+        ("/foo.html", [
+            # Moved from a few lines with another value
+            {"type": "error", "lastLine": 13, "lastColumn": 1,
+             "message": "Duplicate ID “menu”."},
+            # Moved too far
+            {"type": "info", "subType": "warning", "lastLine": 40,
+             "lastColumn": 1, "message": "Section lacks heading."},
+            {"type": "error", "message": "Stray doctype."},
+            {"type": "error", "message": "Stray end tag “div”."},
+        ]),
+        ("/bar.html", None),
+        ("/new.html", [
+            {"type": "error", "message": "Stray doctype."},
+        ]),
+    ]))
+
+    assert registry == OrderedDict([
+        ("/foo.html", [
+            {"type": "info", "subType": "warning", "lastLine": 40,
+             "lastColumn": 1, "message": "Section lacks heading."},
+            {"type": "error", "message": "Stray end tag “div”."},
+            {"type": "info", "baseline": "resolved",
+             "message": "Resolved since baseline: Section lacks heading."},
+        ]),
+        ("/bar.html", [
+            {"type": "info", "baseline": "resolved",
+             "message": "Resolved since baseline: Stray doctype."},
+        ]),
+        ("/new.html", [
+            {"type": "error", "message": "Stray doctype."},
+        ]),
+    ])
+    assert baseline.counts == {"new": 3, "known": 2, "resolved": 2}
+
+
+def test_filter_all_known(tmp_path):
+    """
+    A path without new nor resolved messages should have no messages.
+    """
+    report = [
+        ("/foo.html", [{"type": "error", "message": "Stray doctype."}]),
+    ]
+    baseline = make_baseline(tmp_path, report)
+
+    assert baseline.filter(OrderedDict([
+        ("/foo.html", [{"type": "error", "message": "Stray doctype."}]),
+    ])) == OrderedDict([("/foo.html", None)])
+
+
+def test_filter_clean_path(tmp_path):
+    """
+    A path without any message in baseline should not have a resolved message
+    for the debug message exporters add.
+    """
+    baseline = make_baseline(tmp_path, [("/foo.html", None)])
+
+    assert baseline.paths == {}
+    assert baseline.filter(OrderedDict([
+        ("/foo.html", None),
+    ])) == OrderedDict([("/foo.html", None)])
+    assert baseline.counts == {"new": 0, "known": 0, "resolved": 0}
+
+
+@pytest.mark.parametrize("occurences, new, resolved", [
+    (2, 0, 0),
+    (4, 2, 0),
+    (1, 0, 1),
+    (0, 0, 2),
+])
+def test_filter_counted(tmp_path, occurences, new, resolved):
+    """
+    Each baseline message should only match a single message, so more
+    occurences are new and fewer occurences are resolved.
+    """
+    baseline = make_baseline(tmp_path, [
+        ("/foo.html", [
+            {"type": "error", "lastLine": 10, "lastColumn": 1,
+             "message": "Duplicate ID “a”."},
+            {"type": "error", "lastLine": 11, "lastColumn": 1,
+             "message": "Duplicate ID “b”."},
+        ]),
+    ])
+
+    registry = baseline.filter(OrderedDict([
+        ("/foo.html", [
+            {"type": "error", "lastLine": 10 + i, "lastColumn": 1,
+             "message": "Duplicate ID “c{}”.".format(i)}
+            for i in range(occurences)
+        ]),
+    ]))
+
+    rows = registry["/foo.html"] or []
+
+    assert len([item for item in rows if "baseline" not in item]) == new
+    assert len([item for item in rows if "baseline" in item]) == resolved
+    assert baseline.counts == {
+        "new": new,
+        "known": occurences - new,
+        "resolved": resolved,
+    }
+
+
+@pytest.mark.parametrize("line, known", [
+    (10, 1),
+    (13, 1),
+    (7, 1),
+    (16, 0),
+    (4, 0),
+])
+def test_filter_tolerance(tmp_path, line, known):
+    """
+    A known message should only be matched within tolerance lines.
+    """
+    baseline = make_baseline(tmp_path, [
+        ("/foo.html", [
+            {"type": "error", "lastLine": 10, "lastColumn": 1,
+             "message": "Stray doctype."},
+        ]),
+    ], tolerance=3)
+
+    baseline.filter(OrderedDict([
+        ("/foo.html", [
+            {"type": "error", "lastLine": line, "lastColumn": 1,
+             "message": "Stray doctype."},
+        ]),
+    ]))
+
+    assert baseline.counts["known"] == known
+
+
+def test_resolved_not_indexed(tmp_path):
+    """
+    Resolved messages from a previous baseline should not be indexed.
+    """
+    baseline = make_baseline(tmp_path, [
+        ("/foo.html", [
+            {"type": "info", "baseline": "resolved",
+             "message": "Resolved since baseline: Stray doctype."},
+        ]),
+    ])
+
+    assert baseline.paths == {}
+
+
+def test_invalid_files(tmp_path):
+    """
+    Missing or invalid baseline files should raise an error.
+    """
+    with pytest.raises(PathInvalidError):
+        Baseline(str(tmp_path / "nope.json"))
+
+    path = tmp_path / "invalid.json"
+    path.write_text("nope")
+    with pytest.raises(BaselineInvalidError):
+        Baseline(str(path))
+
+    path.write_text(json.dumps({"kind": "summary"}))
+    with pytest.raises(BaselineInvalidError) as excinfo:
+        Baseline(str(path))
+
+    assert str(excinfo.value).startswith(
+        "Baseline file is not a packed JSON audit:"
+    )
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from datetime import datetime
+
+import pytest
+
+from html_checker.exceptions import PathInvalidError, ReportError
+from html_checker.raw import RawWriter, read_raw, read_raw_metas
+
+
+def test_write_read(tmp_path):
+    """
+    Registries should be read back in batches and in the same order they
+    were written.
+    """
+    path = str(tmp_path / "raw.jsonl.gz")
+
+    writer = RawWriter(path)
+    writer.write(OrderedDict([
+        ("/foo.html", [{"type": "error", "message": "Foo “bar”."}]),
+        ("/bar.html", None),
+    ]))
+    writer.write(OrderedDict([
+        ("/ping.html", [{"type": "info", "message": ValueError("Nope")}]),
+    ]))
+    writer.close()
+
+    assert writer.count == 3
+
+    assert list(read_raw(path, batch_size=2)) == [
+        OrderedDict([
+            ("/foo.html", [{"type": "error", "message": "Foo “bar”."}]),
+            ("/bar.html", None),
+        ]),
+        OrderedDict([
+            ("/ping.html", [{"type": "info", "message": "Nope"}]),
+        ]),
+    ]
+
+
+def test_write_read_metas(tmp_path):
+    """
+    Metas should be written as a header which is only read from
+    ``read_raw_metas``.
+    """
+    path = str(tmp_path / "raw.jsonl.gz")
+    created = datetime(2024, 9, 9, 10, 30)
+
+    writer = RawWriter(path, metas={"created": created, "vnu": "20.6.30"})
+    writer.write(OrderedDict([("/foo.html", None)]))
+    writer.close()
+
+    assert writer.count == 1
+    assert read_raw_metas(path) == {"created": created, "vnu": "20.6.30"}
+    assert list(read_raw(path)) == [OrderedDict([("/foo.html", None)])]
+
+    # File without header
+    writer = RawWriter(path)
+    writer.write(OrderedDict([("/foo.html", None)]))
+    writer.close()
+
+    assert read_raw_metas(path) == {}
+
+
+def test_write_destination_missing(tmp_path):
+    """
+    Missing parent directories should be created on first write.
+    """
+    path = str(tmp_path / "out" / "raw" / "raw.jsonl.gz")
+
+    writer = RawWriter(path)
+    writer.write(OrderedDict([("/foo.html", None)]))
+    writer.close()
+
+    assert list(read_raw(path)) == [OrderedDict([("/foo.html", None)])]
+
+
+def test_read_invalid(tmp_path):
+    """
+    Missing or invalid raw results files should raise an error.
+    """
+    with pytest.raises(PathInvalidError):
+        list(read_raw(str(tmp_path / "nope.gz")))
+
+    path = tmp_path / "invalid.gz"
+    path.write_text("nope")
+
+    with pytest.raises(ReportError):
+        list(read_raw(str(path)))
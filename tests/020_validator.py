@@ -1,9 +1,13 @@
+import json
+import sys
 from collections import OrderedDict
 
 import pytest
 
-from html_checker.validator import ValidatorInterface
+from html_checker.bodies import BodyHasher
+from html_checker.validator import ValidatorInterface, ValidatorVersionQuery
 from html_checker.exceptions import ValidatorError
+from html_checker.rules import IgnoreRules
 
 
 @pytest.mark.parametrize("options, expected", [
@@ -149,6 +153,40 @@ def test_get_validator_command(settings, interpreter, validator,
     assert expected == cmd
 
 
+@pytest.mark.parametrize("ignore, tool_options, expected", [
+    (
+        None,
+        None,
+        None,
+    ),
+    (
+        IgnoreRules(patterns=["Foo.*"]),
+        None,
+        "(?:Foo.*)",
+    ),
+    (
+        IgnoreRules(patterns=["Foo.*"], native=False),
+        None,
+        None,
+    ),
+    (
+        IgnoreRules(patterns=["Foo.*"]),
+        OrderedDict([("--filterpattern", "Bar")]),
+        "Bar",
+    ),
+])
+def test_manage_options_ignore(ignore, tool_options, expected):
+    """
+    Native ignore rules should be compiled to validator filter option without
+    overriding an explicit one.
+    """
+    v = ValidatorInterface(ignore=ignore)
+
+    interpreter_options, tool_options = v.manage_options(None, tool_options)
+
+    assert tool_options.get("--filterpattern") == expected
+
+
 @pytest.mark.parametrize(
     "interpreter, validator, interpreter_options, tool_options, paths, expected",
     [
@@ -280,3 +318,180 @@ def test_validate_java_options(monkeypatch, caplog, settings):
     report = v.validate(paths)
 
     assert OrderedDict(expected) == report.registry
+
+
+def test_validate_dedup_bodies(monkeypatch, tmp_path):
+    """
+    Paths with identical body should be validated once and receive a copy of
+    messages with an info message about their origin.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith(str(tmp_path))]
+        validated.append(paths)
+        return json.dumps({
+            "messages": [
+                {"url": "file:" + item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    foo = tmp_path / "foo.html"
+    foo.write_text("<p>Foo</p>")
+    alias = tmp_path / "alias.html"
+    alias.write_text("<p>Foo</p>")
+
+    v = ValidatorInterface(hasher=BodyHasher())
+    report = v.validate([str(foo), str(alias)])
+
+    assert validated == [[str(foo)]]
+    assert report.registry[str(foo)] == [{"type": "error", "message": "Foo"}]
+    assert report.registry[str(alias)] == [
+        {"type": "error", "message": "Foo"},
+        {
+            "type": "info",
+            "message": "Same content than '{}', its validation is reused".format(
+                foo
+            ),
+            "duplicate": str(foo),
+        },
+    ]
+    assert report.deduplicated == {str(alias): str(foo)}
+
+
+def test_validate_dedup_bodies_across_calls(monkeypatch, tmp_path):
+    """
+    Paths with identical body should receive messages from a path validated
+    from a previous call.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith(str(tmp_path))]
+        validated.append(paths)
+        return json.dumps({
+            "messages": [
+                {"url": "file:" + item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    foo = tmp_path / "foo.html"
+    foo.write_text("<p>Foo</p>")
+    alias = tmp_path / "alias.html"
+    alias.write_text("<p>Foo</p>")
+
+    v = ValidatorInterface(hasher=BodyHasher())
+    first = v.validate([str(foo)])
+    # Exporters may alter registry, origin messages must not follow
+    first.registry[str(foo)].append({"type": "error", "message": "Bar"})
+    second = v.validate([str(alias)])
+
+    assert validated == [[str(foo)]]
+    assert second.registry[str(alias)] == [
+        {"type": "error", "message": "Foo"},
+        {
+            "type": "info",
+            "message": "Same content than '{}', its validation is reused".format(
+                foo
+            ),
+            "duplicate": str(foo),
+        },
+    ]
+    assert second.deduplicated == {str(alias): str(foo)}
+
+
+def test_validate_dedup_origins_storage(monkeypatch, tmp_path):
+    """
+    Origin messages should be kept as a JSON string and origins without any
+    message should not be kept at all.
+    """
+    def mock_validator_execute_validator(self, command):
+        return json.dumps({
+            "messages": [
+                {"url": "file:" + item, "type": "error", "message": "Foo"}
+                for item in command
+                if item.startswith(str(tmp_path)) and "foo" in item
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    foo = tmp_path / "foo.html"
+    foo.write_text("<p>Foo</p>")
+    clean = tmp_path / "clean.html"
+    clean.write_text("<p>Clean</p>")
+    alias = tmp_path / "alias.html"
+    alias.write_text("<p>Clean</p>")
+
+    v = ValidatorInterface(hasher=BodyHasher())
+    v.validate([str(foo), str(clean)])
+    report = v.validate([str(alias)])
+
+    assert v.origins == {
+        str(foo): json.dumps([{"type": "error", "message": "Foo"}]),
+    }
+    assert report.registry[str(alias)] == [
+        {
+            "type": "info",
+            "message": "Same content than '{}', its validation is reused".format(
+                clean
+            ),
+            "duplicate": str(clean),
+        },
+    ]
+
+
+def test_query_version():
+    """
+    Version query should execute validator with only version argument and
+    return its output as version.
+    """
+    v = ValidatorInterface()
+    v.INTERPRETER = sys.executable
+    v.VALIDATOR = None
+
+    query = v.query_version()
+
+    assert query.process.args == [sys.executable, "--version"]
+    assert query.get_version().startswith("Python ")
+    assert query.process is None
+
+    # Version is kept once process is done
+    assert query.get_version().startswith("Python ")
+
+
+def test_query_version_release():
+    """
+    Releasing a version query should kill its process if it is still running.
+    """
+    query = ValidatorVersionQuery([sys.executable, "-c", "import time; time.sleep(30)"])
+    process = query.process
+
+    query.release()
+
+    assert query.process is None
+    assert process.returncode is not None
+    assert query.get_version() is None
+
+
+def test_query_version_missing_interpreter():
+    """
+    A missing interpreter should not raise any error from version query.
+    """
+    v = ValidatorInterface()
+    v.INTERPRETER = "nietniet-interpreter"
+
+    query = v.query_version()
+
+    assert query.process is None
+    assert query.get_version() is None
+    query.release()
@@ -859,3 +859,99 @@ def test_release(pack, expected):
     results = exporter.release(pack=pack)
 
     assert results == expected
+
+
+def test_aggregate():
+    """
+    Messages should be aggregated by rule with their paths and positions, then
+    released in a rules document sorted on occurences. Placeholder row of a
+    clean path is not a rule.
+    """
+    exporter = ExporterRenderer(aggregate=True)
+
+    exporter.build(OrderedDict([
+        ("/html/foo.html", [
+            {
+                "type": "error",
+                "lastLine": 2,
+                "lastColumn": 5,
+                "message": "Duplicate ID “nav”.",
+            },
+            {
+                "type": "info",
+                "message": "Trailing slash on void elements.",
+            },
+            {
+                "type": "error",
+                "lastLine": 8,
+                "lastColumn": 3,
+                "message": "Duplicate ID “menu”.",
+            },
+        ]),
+        ("/html/bar.html", [
+            {
+                "type": "error",
+                "message": "Duplicate ID “nav”.",
+            },
+        ]),
+        ("/html/clean.html", None),
+    ]))
+
+    documents = exporter.release(pack=True)
+
+    assert [item["document"] for item in documents] == [
+        "audit.txt",
+        "rules.txt",
+    ]
+
+    rules = documents[1]["context"]["rules"]
+
+    assert [(item["template"], item["count"]) for item in rules] == [
+        ("Duplicate ID “…”.", 3),
+        ("Trailing slash on void elements.", 1),
+    ]
+    assert rules[0]["type"] == "error"
+    assert rules[0]["message"] == "Duplicate ID “nav”."
+    assert rules[0]["paths"] == [
+        {
+            "id": 1,
+            "name": "/html/foo.html",
+            "positions": [
+                {"line": 2, "column": 5},
+                {"line": 8, "column": 3},
+            ],
+        },
+        {
+            "id": 2,
+            "name": "/html/bar.html",
+            "positions": [],
+        },
+    ]
+
+
+def test_release_statistics():
+    """
+    Global statistics should come from statistics engine when it covers every
+    stored reports.
+    """
+    exporter = ExporterRenderer()
+
+    exporter.build(OrderedDict([
+        ("/html/foo.html", [{"type": "error", "message": "Foo."}]),
+        ("/html/bar.html", [{"type": "info", "message": "Bar."}]),
+    ]))
+
+    assert exporter.statistics.paths == 2
+
+    # Engine totals are used as is
+    exporter.statistics.totals["errors"] = 42
+
+    documents = exporter.release(pack=True)
+    assert documents[0]["context"]["statistics"]["errors"] == 42
+
+    # Once store does not match engine, statistics are computed from reports
+    exporter.store["reports"].pop()
+    exporter.store["reports"][0][1]["statistics"] = {"errors": 1}
+
+    documents = exporter.release(pack=True)
+    assert documents[0]["context"]["statistics"] == {"errors": 1}
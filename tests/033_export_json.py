@@ -1,7 +1,10 @@
 import json
+from collections import OrderedDict
+
 import pytest
 
 from html_checker.export.json import JsonExport
+from html_checker.utils.documents import iter_chunks
 
 
 def test_render():
@@ -33,6 +36,29 @@ def test_render():
     assert doc == expected
 
 
+def test_render_streamed():
+    """
+    Audit document should be rendered as an iterator of encoded chunks.
+    """
+    data = {
+        "document": "audit.json",
+        "context": {
+            "kind": "audit",
+            "paths": [{"name": "/html/foo.html"}],
+        },
+    }
+
+    exporter = JsonExport(indent=None)
+
+    doc = exporter.render(data)
+
+    assert "content" not in doc
+    assert doc["document"] == "audit.json"
+    assert "".join(doc["chunks"]) == (
+        "{\"kind\": \"audit\", \"paths\": [{\"name\": \"/html/foo.html\"}]}"
+    )
+
+
 @pytest.mark.parametrize("pack,expected", [
     (
         True,
@@ -259,4 +285,70 @@ def test_release(pack, expected):
     # serialized by JSON encoder)
     for i, item in enumerate(results, start=0):
         assert item["document"] == expected[i]["document"]
-        assert json.loads(item["content"]) == expected[i]["content"]
+        assert json.loads("".join(iter_chunks(item))) == expected[i]["content"]
+
+
+def test_stream_release(tmp_path):
+    """
+    In streaming mode, report documents should be written during build and
+    only statistics are kept so release only returns the summary document.
+    """
+    exporter = JsonExport(indent=None, stream_destination=str(tmp_path))
+
+    exporter.build(OrderedDict([
+        ("/html/foo.html", [
+            {
+                "type": "error",
+                "message": "This is an error.",
+            },
+        ]),
+        ("http://ping", None),
+    ]))
+
+    assert sorted([item.name for item in tmp_path.iterdir()]) == [
+        "path-1.json",
+        "path-2.json",
+    ]
+
+    report = json.loads((tmp_path / "path-1.json").read_text())
+    assert report["name"] == "/html/foo.html"
+    assert report["data"]["messages"] == [
+        {
+            "type": "error",
+            "message": "This is an error.",
+            "source": {},
+        },
+    ]
+
+    # Only path statistics are retained
+    assert exporter.store["reports"] == [
+        (
+            "/html/foo.html",
+            {
+                "statistics": {"debugs": 0, "errors": 1, "infos": 0, "warnings": 0},
+            },
+        ),
+        (
+            "http://ping",
+            {
+                "statistics": {"debugs": 1, "errors": 0, "infos": 0, "warnings": 0},
+            },
+        ),
+    ]
+
+    results = exporter.release(pack=False)
+
+    assert len(results) == 1
+    assert results[0]["document"] == "summary.json"
+
+    summary = json.loads(results[0]["content"])
+    assert summary["statistics"] == {
+        "debugs": 1,
+        "errors": 1,
+        "infos": 0,
+        "warnings": 0,
+    }
+    assert [item["path"] for item in summary["paths"]] == [
+        "path-1.json",
+        "path-2.json",
+    ]
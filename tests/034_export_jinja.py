@@ -1,9 +1,15 @@
+import copy
+import json
+import os
 from collections import OrderedDict
 
+import pytest
 from jinja2 import Environment, Template
 
+from html_checker.exceptions import ExportError
 from html_checker.export.jinja import JinjaExport
 from html_checker.reporter import ReportStore
+from html_checker.utils.paths import get_cache_dir, get_path_key
 
 
 # A dummy exporter store to inject during tests to avoid launching
@@ -156,3 +162,290 @@ def test_unpacked_release():
     assert results[3]["document"] == "path-4.html"
     assert results[4]["document"] == "index.html"
     assert results[5]["document"] == "main.css"
+
+
+def test_streamed_unpacked_release(tmp_path):
+    """
+    In streaming mode, report documents are directly written during build so
+    release only returns the 'summary' document and the CSS file.
+    """
+    exporter = JinjaExport(stream_destination=str(tmp_path))
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    assert sorted([item.name for item in tmp_path.iterdir()]) == [
+        "path-1.html",
+        "path-2.html",
+        "path-3.html",
+        "path-4.html",
+    ]
+
+    results = exporter.release(pack=False)
+
+    assert len(results) == 2
+    assert results[0]["document"] == "index.html"
+    assert results[1]["document"] == "main.css"
+
+
+def test_parallel_unpacked_release():
+    """
+    Report documents rendered from worker processes should be identical to
+    the ones rendered from current process.
+    """
+    exporter = JinjaExport()
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    parallel_exporter = JinjaExport(jobs=2)
+    parallel_exporter.store = copy.deepcopy(exporter.store)
+
+    expected = exporter.release(pack=False)
+    results = parallel_exporter.release(pack=False)
+
+    assert parallel_exporter.pool is None
+    assert results == expected
+
+
+def test_parallel_streamed_unpacked_release(tmp_path):
+    """
+    In streaming mode, report documents should be written from worker
+    processes.
+    """
+    exporter = JinjaExport(jobs=2, stream_destination=str(tmp_path))
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    results = exporter.release(pack=False)
+
+    assert sorted([item.name for item in tmp_path.iterdir()]) == [
+        "path-1.html",
+        "path-2.html",
+        "path-3.html",
+        "path-4.html",
+    ]
+    assert "/html/verybad.html" in (tmp_path / "path-4.html").read_text()
+
+    assert len(results) == 2
+    assert results[0]["document"] == "index.html"
+    assert results[1]["document"] == "main.css"
+
+
+def test_parallel_pool_spawn():
+    """
+    Worker processes should be spawned, not forked from a process which may
+    run threads.
+    """
+    exporter = JinjaExport(jobs=2)
+
+    pool = exporter.get_pool()
+
+    assert pool._mp_context.get_start_method() == "spawn"
+
+    pool.shutdown()
+
+
+def test_bytecode_cache(settings):
+    """
+    Compiled templates should be stored in a cache directory distinct for
+    each template directory.
+    """
+    exporter = JinjaExport()
+
+    assert exporter.cache_dir == get_cache_dir(
+        "jinja",
+        get_path_key(exporter.template_dir)
+    )
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+    exporter.release(pack=True)
+
+    assert len(os.listdir(exporter.cache_dir)) > 0
+
+    # Another template directory has its own cache
+    other = JinjaExport(template_dir=str(settings.tests_path))
+    assert other.cache_dir != exporter.cache_dir
+
+    # Disabled cache
+    exporter = JinjaExport(cache=False)
+    assert exporter.cache_dir is None
+    assert exporter.jinja_env.bytecode_cache is None
+
+
+def test_validate_optional_template(tmp_path, settings):
+    """
+    Optional templates are only required when their feature is enabled.
+    """
+    for name in ["audit.html", "report.html", "main.css", "summary.html"]:
+        (tmp_path / name).write_text("")
+
+    exporter = JinjaExport(template_dir=str(tmp_path))
+    assert exporter.validate() is False
+
+    exporter = JinjaExport(template_dir=str(tmp_path), paginate=True)
+    assert exporter.validate() == (
+        "Some required files are missing from template directory: paginated.html"
+    )
+
+
+def test_paginated_release(monkeypatch):
+    """
+    Paginated audit should create a shard for each path, index pages
+    with path statistics and finally the CSS file.
+    """
+    monkeypatch.setattr(JinjaExport, "PAGINATE_BY", 3)
+
+    exporter = JinjaExport(paginate=True)
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    results = exporter.release(pack=True)
+
+    assert [item["document"] for item in results] == [
+        "shards/path-1.js",
+        "shards/path-2.js",
+        "shards/path-3.js",
+        "shards/path-4.js",
+        "index.html",
+        "index-2.html",
+        "main.css",
+    ]
+
+    shard = results[1]["content"]
+    assert shard.startswith("htmlCheckerShard(2, ")
+    assert json.loads(shard[len("htmlCheckerShard(2, "):-len(");\n")]) == {
+        "name": "/html/foo.html",
+        "messages": [
+            {
+                "type": "info",
+                "message": "This is an info.",
+                "source": {},
+            },
+        ],
+    }
+
+    # Messages are not in index pages
+    assert "/html/verybad.html" not in results[4]["content"]
+    assert "/html/verybad.html" in results[5]["content"]
+    assert "3. This is a basic error." not in results[5]["content"]
+    assert 'href="./index-2.html"' in results[4]["content"]
+    assert 'href="./index.html"' in results[5]["content"]
+
+
+def test_paginated_streamed_release(tmp_path):
+    """
+    In streaming mode, shards of paginated audit should be written during build.
+    """
+    exporter = JinjaExport(paginate=True, stream_destination=str(tmp_path))
+
+    assert exporter.can_stream(True) is True
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    assert sorted([item.name for item in (tmp_path / "shards").iterdir()]) == [
+        "path-1.js",
+        "path-2.js",
+        "path-3.js",
+        "path-4.js",
+    ]
+
+    results = exporter.release(pack=True)
+
+    assert [item["document"] for item in results] == [
+        "index.html",
+        "main.css",
+    ]
+
+
+def test_paginated_unpacked_release(tmp_path):
+    """
+    Paginated audit can not be released unpacked since path messages have only
+    been written to shards.
+    """
+    exporter = JinjaExport(paginate=True, stream_destination=str(tmp_path))
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    with pytest.raises(ExportError) as excinfo:
+        exporter.release(pack=False)
+
+    assert str(excinfo.value) == (
+        "Paginated audit is only available for packed release."
+    )
+
+
+@pytest.mark.parametrize("options, pack, expected", [
+    (
+        {},
+        True,
+        ["index.html#path-1", "index.html#path-2", "index.html#path-3",
+         "index.html#path-4"],
+    ),
+    (
+        {},
+        False,
+        ["path-1.html", "path-2.html", "path-3.html", "path-4.html"],
+    ),
+    (
+        {"paginate": True},
+        True,
+        ["index.html#path-1", "index.html#path-2", "index.html#path-3",
+         "index-2.html#path-4"],
+    ),
+])
+def test_search_index_release(monkeypatch, options, pack, expected):
+    """
+    Search index should be released with a link to the path document and the
+    search box included in index document.
+    """
+    monkeypatch.setattr(JinjaExport, "PAGINATE_BY", 3)
+
+    exporter = JinjaExport(search_index=True, **options)
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    results = exporter.release(pack=pack)
+
+    assert [item["document"] for item in results[-2:]] == [
+        "search-index.js",
+        "main.css",
+    ]
+
+    script = results[-2]["content"]
+    payload = json.loads(script[len("htmlCheckerSearchIndex("):-len(");\n")])
+    assert [item[1] for item in payload["paths"]] == expected
+    assert payload["templates"]["This is an info."] == [2]
+
+    index = [item for item in results if item["document"] == "index.html"][0]
+    assert 'data-index="./search-index.js"' in index["content"]
+
+
+def test_search_index_disabled():
+    """
+    Without search index there is no index document nor search box.
+    """
+    exporter = JinjaExport()
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    results = exporter.release(pack=True)
+
+    assert [item["document"] for item in results] == ["index.html", "main.css"]
+    assert "search-index.js" not in results[0]["content"]
+
+
+def test_rules_release():
+    """
+    With aggregation, rules document should be rendered after other documents.
+    """
+    exporter = JinjaExport(aggregate=True)
+
+    exporter.build(OrderedDict(copy.deepcopy(SAMPLE_REPORT)))
+
+    results = exporter.release(pack=False)
+
+    assert [item["document"] for item in results[-3:]] == [
+        "index.html",
+        "rules.html",
+        "main.css",
+    ]
+    assert "#. This is an error." in results[-2]["content"]
+    assert "10:1" in results[-2]["content"]
@@ -0,0 +1,159 @@
+import io
+import json
+from collections import OrderedDict
+
+from html_checker.export.jsonl import JsonLinesExport
+
+
+SAMPLE_REPORT = [
+    ("http://nope", None),
+    ("/html/foo.html", [
+        {
+            "type": "info",
+            "message": "This is an info.",
+        },
+        {
+            "type": "error",
+            "firstLine": 10,
+            "lastLine": 20,
+            "firstColumn": 1,
+            "lastColumn": 2,
+            "message": "This is an error.",
+            "extract": "<some html>",
+        },
+    ]),
+]
+
+
+def test_build_release():
+    """
+    Every path should be written as a compact line during build then release
+    should write the summary line.
+    """
+    output = io.StringIO()
+    exporter = JsonLinesExport(output=output)
+
+    exporter.build(OrderedDict(SAMPLE_REPORT[:1]))
+    # Path line is written during build
+    assert len(output.getvalue().splitlines()) == 1
+
+    exporter.build(OrderedDict(SAMPLE_REPORT[1:]))
+
+    assert exporter.release(pack=True) == []
+
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 3
+
+    # Lines are compact
+    assert lines[0].startswith('{"kind":"report","name":"http://nope"')
+
+    lines = [json.loads(item) for item in lines]
+
+    assert lines[0] == {
+        "kind": "report",
+        "name": "http://nope",
+        "statistics": {"debugs": 1, "errors": 0, "infos": 0, "warnings": 0},
+        "messages": [
+            {
+                "type": "debug",
+                "message": "There was not any log report for this path.",
+            },
+        ],
+    }
+    assert lines[1] == {
+        "kind": "report",
+        "name": "/html/foo.html",
+        "statistics": {"debugs": 0, "errors": 1, "infos": 1, "warnings": 0},
+        "messages": [
+            {
+                "type": "info",
+                "message": "This is an info.",
+                "source": {},
+            },
+            {
+                "type": "error",
+                "message": "This is an error.",
+                "source": {
+                    "linestart": 10,
+                    "lineend": 20,
+                    "colstart": 1,
+                    "colend": 2,
+                    "extract": "<some html>",
+                },
+            },
+        ],
+    }
+
+    assert lines[2]["kind"] == "summary"
+    assert lines[2]["paths"] == 2
+    assert lines[2]["statistics"] == {
+        "debugs": 1,
+        "errors": 1,
+        "infos": 1,
+        "warnings": 0,
+    }
+
+    # Nothing is retained
+    assert exporter.store["reports"] == []
+
+
+def test_stream_destination(tmp_path):
+    """
+    With a stream destination, lines should be written to an audit file
+    whatever pack mode is.
+    """
+    exporter = JsonLinesExport(stream_destination=str(tmp_path))
+
+    assert exporter.can_stream(True) is True
+    assert exporter.can_stream(False) is True
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+    exporter.release(pack=True)
+
+    lines = (tmp_path / "audit.jsonl").read_text().splitlines()
+
+    assert [json.loads(item)["kind"] for item in lines] == [
+        "report",
+        "report",
+        "summary",
+    ]
+
+
+def test_stream_destination_missing(tmp_path):
+    """
+    Stream destination directory should be created if it does not exist yet.
+    """
+    destination = tmp_path / "new" / "sub"
+    exporter = JsonLinesExport(stream_destination=str(destination))
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+    exporter.release(pack=True)
+
+    assert (destination / "audit.jsonl").exists()
+
+
+def test_aggregate():
+    """
+    With aggregation, a line should be written for each rule before the
+    summary line, placeholder row of a clean path is not a rule.
+    """
+    output = io.StringIO()
+    exporter = JsonLinesExport(output=output, aggregate=True)
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+    exporter.release()
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert [item["kind"] for item in lines] == [
+        "report", "report", "rule", "rule", "summary",
+    ]
+    assert lines[2] == {
+        "kind": "rule",
+        "fingerprint": lines[2]["fingerprint"],
+        "type": "info",
+        "template": "This is an info.",
+        "message": "This is an info.",
+        "count": 1,
+        "paths": [{"id": 2, "name": "/html/foo.html", "positions": []}],
+    }
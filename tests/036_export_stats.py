@@ -0,0 +1,178 @@
+import json
+from collections import OrderedDict
+
+import pytest
+
+from html_checker.export.stats import StatsExport
+
+
+SAMPLE_REPORT = [
+    ("http://nope", None),
+    ("/html/foo.html", [
+        {
+            "type": "info",
+            "message": "This is an info.",
+        },
+        {
+            "type": "error",
+            "message": "Duplicate ID “foo”.",
+        },
+    ]),
+    ("/html/bar.html", [
+        {
+            "type": "error",
+            "message": "Duplicate ID “bar”.",
+        },
+        {
+            "type": "info",
+            "subType": "warning",
+            "message": "This is a warning.",
+        },
+    ]),
+]
+
+
+def test_build_release():
+    """
+    Paths should only be added to statistics and released as a text summary.
+    """
+    exporter = StatsExport()
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+
+    # Nothing is retained
+    assert exporter.store["reports"] == []
+    assert exporter.statistics.paths == 3
+
+    results = exporter.release(pack=True)
+
+    assert [item["document"] for item in results] == ["stats.txt"]
+    assert results[0]["content"].splitlines() == [
+        "Paths: 3",
+        "Errors: 2",
+        "Warnings: 1",
+        "Informations: 1",
+        "Debugs: 1",
+        "Messages per path: p50=2 p90=2 p99=2",
+        "Worst paths:",
+        "  /html/bar.html: 1 error(s), 1 warning(s)",
+        "  /html/foo.html: 1 error(s), 0 warning(s)",
+        "  http://nope: 0 error(s), 0 warning(s)",
+        "Most occuring rules:",
+        "  2 error: Duplicate ID “…”.",
+        "  1 info: This is an info.",
+        "  1 warning: This is a warning.",
+    ]
+    assert exporter.get_exit_code() == 0
+
+
+def test_release_ignored():
+    """
+    Counted ignored messages should be included in summary.
+    """
+    exporter = StatsExport()
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+    exporter.add_ignored(3)
+
+    lines = exporter.release(pack=True)[0]["content"].splitlines()
+
+    assert lines[4:6] == ["Debugs: 1", "Ignored: 3"]
+
+
+def test_release_json():
+    """
+    JSON summary should include every statistics.
+    """
+    exporter = StatsExport(output_format="json", rule_limit=1)
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+
+    results = exporter.release()
+
+    assert results[0]["document"] == "stats.json"
+
+    summary = json.loads(results[0]["content"])
+
+    assert summary["paths"] == 3
+    assert summary["statistics"]["errors"] == 2
+    assert summary["rules"] == [
+        {"type": "error", "template": "Duplicate ID “…”.", "count": 2},
+    ]
+    assert summary["thresholds"] == {
+        "limits": {"max_errors": None, "max_warnings": None},
+        "failures": [],
+    }
+
+
+@pytest.mark.parametrize("options, failures, last_line", [
+    (
+        {"max_errors": 2, "max_warnings": 1},
+        [],
+        "Thresholds: passed",
+    ),
+    (
+        {"max_errors": 1},
+        ["2 errors over maximum of 1"],
+        "Thresholds: failed, 2 errors over maximum of 1",
+    ),
+    (
+        {"max_errors": 0, "max_warnings": 0},
+        ["2 errors over maximum of 0", "1 warnings over maximum of 0"],
+        ("Thresholds: failed, 2 errors over maximum of 0, 1 warnings over "
+         "maximum of 0"),
+    ),
+])
+def test_thresholds(options, failures, last_line):
+    """
+    Exceeded thresholds should be reported and give a failure exit code.
+    """
+    exporter = StatsExport(**options)
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+
+    results = exporter.release()
+
+    assert exporter.get_failures() == failures
+    assert exporter.get_exit_code() == (1 if failures else 0)
+    assert results[0]["content"].splitlines()[-1] == last_line
+
+
+@pytest.mark.parametrize("options, failures", [
+    ({"max_errors": 2}, ["20 estimated errors over maximum of 2"]),
+    ({"max_errors": 20, "max_warnings": 10}, []),
+])
+def test_thresholds_estimates(options, failures):
+    """
+    Thresholds should apply to estimated totals when paths have been sampled.
+    """
+    exporter = StatsExport(**options)
+
+    exporter.build(OrderedDict(SAMPLE_REPORT))
+    exporter.add_estimates({
+        "paths": 30,
+        "sampled": 3,
+        "ratio": 0.1,
+        "errors": 20,
+        "warnings": 10,
+        "clusters": [],
+    })
+
+    lines = exporter.release()[0]["content"].splitlines()
+
+    assert exporter.get_failures() == failures
+    assert exporter.get_exit_code() == (1 if failures else 0)
+    assert lines[5] == (
+        "Estimated from sample of 3 path(s) over 30 (ratio 0.1): 20 "
+        "error(s), 10 warning(s)"
+    )
+
+
+def test_validate():
+    """
+    Only supported output formats are valid.
+    """
+    assert StatsExport().validate() is False
+    assert StatsExport(output_format="xml").validate() == (
+        "Statistics format 'xml' is not supported, use one of: json, text"
+    )
@@ -21,6 +21,8 @@ class DummyReport:
     """
     def __init__(self, *args, **kwargs):
         self.registry = []
+        self.ignored = {}
+        self.deduplicated = {}
 
     def add(self, content):
         self.registry.append(content)
@@ -53,7 +55,7 @@ def mock_export_logging_build(*args, **kwargs):
         cls.log.info(" ".join(k))
 
 
-def mock_sitemap_get_urls(*args, **kwargs):
+def mock_sitemap_iter_urls(*args, **kwargs):
     """
     Mock method to just return given url as argument so it can pass the dummy
     url to validator without to read it like a sitemap.
@@ -74,7 +76,7 @@ def test_interpreter_xss(monkeypatch, caplog, settings, command_name):
                         mock_validator_execute_validator)
     monkeypatch.setattr(ValidatorInterface, "REPORT_CLASS", DummyReport)
     monkeypatch.setattr(LoggingExport, "build", mock_export_logging_build)
-    monkeypatch.setattr(Sitemap, "get_urls", mock_sitemap_get_urls)
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
 
     sample = settings.fixtures_path / "html/valid.basic.html"
 
@@ -125,7 +127,7 @@ def test_interpreter_nostream(monkeypatch, caplog, settings, command_name):
                         mock_validator_execute_validator)
     monkeypatch.setattr(ValidatorInterface, "REPORT_CLASS", DummyReport)
     monkeypatch.setattr(LoggingExport, "build", mock_export_logging_build)
-    monkeypatch.setattr(Sitemap, "get_urls", mock_sitemap_get_urls)
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
 
     sample = settings.fixtures_path / "html/valid.basic.html"
 
@@ -176,7 +178,7 @@ def test_user_agent(monkeypatch, caplog, settings, command_name):
                         mock_validator_execute_validator)
     monkeypatch.setattr(ValidatorInterface, "REPORT_CLASS", DummyReport)
     monkeypatch.setattr(LoggingExport, "build", mock_export_logging_build)
-    monkeypatch.setattr(Sitemap, "get_urls", mock_sitemap_get_urls)
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
 
     sample = settings.fixtures_path / "html/valid.basic.html"
 
@@ -214,6 +216,74 @@ def test_user_agent(monkeypatch, caplog, settings, command_name):
         assert expected == caplog.record_tuples
 
 
+@pytest.mark.parametrize("command_name", [
+    "page",
+    "site",
+])
+def test_ignore(monkeypatch, caplog, settings, command_name):
+    """
+    Ignore rule options should be compiled to a validator filter option.
+    """
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+    monkeypatch.setattr(ValidatorInterface, "REPORT_CLASS", DummyReport)
+    monkeypatch.setattr(LoggingExport, "build", mock_export_logging_build)
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
+
+    sample = settings.fixtures_path / "html/valid.basic.html"
+
+    commandline = (
+        "java"
+        " -jar {APPLICATION}/vnujar/vnu.jar"
+        " --format json"
+        " --exit-zero-always"
+        " --user-agent {USER_AGENT}"
+        " --filterpattern (?:Foo.*)|(?:Duplicate ID .*)|(?:Bar\\.)"
+        " {source}"
+    )
+    extra = {"source": sample}
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            command_name,
+            "--ignore", "Foo.*",
+            "--ignore", "Duplicate ID .*",
+            "--ignore-message", "Bar.",
+            str(sample)
+        ])
+
+        assert result.exit_code == 0
+        assert caplog.record_tuples[-1] == (
+            "py-html-checker",
+            logging.INFO,
+            settings.format(commandline, extra=extra),
+        )
+
+
+@pytest.mark.parametrize("command_name", [
+    "page",
+    "site",
+])
+def test_ignore_invalid(monkeypatch, caplog, settings, command_name):
+    """
+    Invalid ignore rule should abort command.
+    """
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
+
+    sample = settings.fixtures_path / "html/valid.basic.html"
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            command_name, "--ignore", "Foo[", str(sample)
+        ])
+
+        assert result.exit_code == 1
+        assert caplog.record_tuples[-1][1] == logging.CRITICAL
+        assert caplog.record_tuples[-1][2].startswith("Invalid ignore rule 'Foo['")
+
+
 @pytest.mark.parametrize("command_name", [
     "page",
     # "site",
@@ -384,7 +454,7 @@ def test_site_split(monkeypatch, caplog, settings, split, paths):
     '--split' option should cause executing a new vnu validator instance on
     each path and only one for all path when option is disabled.
     """
-    def mock_sitemap_get_urls(*args, **kwargs):
+    def mock_sitemap_iter_urls(*args, **kwargs):
         """
         Mock method to just return harcoded dummy paths we expect from parsed
         sitemap
@@ -395,7 +465,7 @@ def test_site_split(monkeypatch, caplog, settings, split, paths):
                         mock_validator_execute_validator)
     monkeypatch.setattr(ValidatorInterface, "REPORT_CLASS", DummyReport)
     monkeypatch.setattr(LoggingExport, "build", mock_export_logging_build)
-    monkeypatch.setattr(Sitemap, "get_urls", mock_sitemap_get_urls)
+    monkeypatch.setattr(Sitemap, "iter_urls", mock_sitemap_iter_urls)
 
     commandline = settings.format((
         "java"
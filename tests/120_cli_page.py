@@ -2,12 +2,15 @@ import io
 import json
 import logging
 import os
+import sys
 
+import pytest
 from click.testing import CliRunner
 
 from html_checker.cli.entrypoint import cli_frontend
+from html_checker.export import render
 from html_checker.exceptions import HtmlCheckerBaseException
-from html_checker.validator import ValidatorInterface
+from html_checker.validator import ValidatorInterface, ValidatorVersionQuery
 
 
 EXCEPTION_PATH_TRIGGER = "http://localhost/trigger-exception"
@@ -213,3 +216,322 @@ def test_page_json_destination(monkeypatch, caplog, settings):
 
         assert result.exit_code == 0
         assert expected == caplog.record_tuples
+
+
+def test_page_jsonl(monkeypatch, caplog, settings):
+    """
+    JSON Lines exporter should print out a line for each path and a last line
+    for summary.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "jsonl", "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+
+        lines = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert [item["kind"] for item in lines] == ["report", "summary"]
+        assert lines[0]["name"] == "http://perdu.com"
+        assert lines[0]["messages"] == [
+            {"type": "error", "message": "Foo", "source": {}},
+        ]
+
+
+@pytest.mark.parametrize("options", [
+    ["--exporter", "jsonl", "--destination", "new/sub"],
+    ["--exporter", "jsonl:new/sub"],
+])
+def test_page_jsonl_destination(monkeypatch, caplog, settings, options):
+    """
+    JSON Lines exporter should create a destination which does not exist yet.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, ["page"] + options + [
+            "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+
+        with io.open("new/sub/audit.jsonl", "r") as fp:
+            lines = [json.loads(item) for item in fp.read().splitlines()]
+
+        assert [item["kind"] for item in lines] == ["report", "summary"]
+
+
+def test_page_version_query(monkeypatch, caplog, settings):
+    """
+    Validator version from version query should be used in export metas, so
+    exporters do not execute validator again to get it. It is only waited
+    for after the first validation.
+    """
+    calls = []
+    get_version = ValidatorVersionQuery.get_version
+
+    def mock_get_version(self):
+        calls.append("version")
+        return get_version(self)
+
+    def mock_validator_execute_validator(*args, **kwargs):
+        calls.append("validate")
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    def mock_fail(*args, **kwargs):
+        raise AssertionError("Validator version should come from version query")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+    # Version query executes "python --version"
+    monkeypatch.setattr(ValidatorInterface, "INTERPRETER", sys.executable)
+    monkeypatch.setattr(ValidatorInterface, "VALIDATOR", None)
+    monkeypatch.setattr(render, "get_vnu_version", mock_fail)
+    monkeypatch.setattr(ValidatorVersionQuery, "get_version",
+                        mock_get_version)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "jsonl", "--exporter", "stats",
+            "--stats-format", "json", "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+        assert calls[:2] == ["validate", "version"]
+
+        summary = json.loads(result.stdout.splitlines()[1])
+
+        assert summary["metas"]["vnu"].startswith("Python ")
+
+
+@pytest.mark.parametrize("options, exit_code", [
+    ([], 0),
+    (["--max-errors", "1"], 0),
+    (["--max-errors", "0"], 1),
+])
+def test_page_stats(monkeypatch, caplog, settings, options, exit_code):
+    """
+    Statistics exporter should print out summary and exit with an error code
+    when a threshold is exceeded.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "stats", "--stats-format", "json",
+        ] + options + ["http://perdu.com"])
+
+        assert result.exit_code == exit_code
+
+        summary = json.loads(result.stdout)
+
+        assert summary["paths"] == 1
+        assert summary["statistics"]["errors"] == 1
+
+
+@pytest.mark.parametrize("options, expected", [
+    (["--ignore", "Bar.*"], None),
+    (["--ignore", "Bar.*", "--count-ignored"], 1),
+])
+def test_page_stats_ignored(monkeypatch, caplog, settings, options,
+                            expected):
+    """
+    Messages ignored from report parsing should be counted in exported
+    statistics.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+                {"url": "http://perdu.com", "type": "error", "message": "Bar"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "stats", "--stats-format", "json",
+        ] + options + ["http://perdu.com"])
+
+        assert result.exit_code == 0
+
+        summary = json.loads(result.stdout)
+
+        assert summary["statistics"].get("ignored") == expected
+
+
+def test_page_baseline(monkeypatch, caplog, settings):
+    """
+    With a baseline, only new and resolved messages should be exported.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+                {"url": "http://perdu.com", "type": "error", "message": "Bar"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with io.open("audit.json", "w") as fp:
+            json.dump({
+                "kind": "audit",
+                "paths": [{
+                    "name": "http://perdu.com",
+                    "data": {
+                        "messages": [
+                            {"type": "error", "message": "Foo", "source": {}},
+                            {"type": "error", "message": "Ping", "source": {}},
+                        ],
+                    },
+                }],
+            }, fp)
+
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "jsonl", "--baseline", "audit.json",
+            "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+
+        lines = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert lines[0]["messages"] == [
+            {"type": "error", "message": "Bar", "source": {}},
+            {
+                "type": "info",
+                "message": "Resolved since baseline: Ping",
+                "baseline": "resolved",
+                "source": {},
+            },
+        ]
+        assert (
+            "py-html-checker",
+            logging.INFO,
+            ("Baseline: 1 new message(s), 1 resolved message(s), 1 known "
+             "message(s) skipped"),
+        ) in caplog.record_tuples
+
+
+def test_page_multiple_exporters(monkeypatch, caplog, settings):
+    """
+    Every given exporter should be fed from the same validation, each one to
+    its own destination if any.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "jsonl", "--exporter", "json:out", "--pack",
+            "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+
+        lines = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert lines[0]["messages"][0]["message"] == "Foo"
+
+        with io.open(os.path.join("out", "audit.json"), "r") as fp:
+            audit = json.load(fp)
+
+        assert audit["paths"][0]["name"] == "http://perdu.com"
+        assert audit["paths"][0]["data"]["messages"][0]["message"] == "Foo"
+
+
+def test_page_invalid_exporter(settings):
+    """
+    An unknown exporter name should be refused.
+    """
+    runner = CliRunner()
+    result = runner.invoke(cli_frontend, [
+        "page", "--exporter", "nope:out", "http://perdu.com"
+    ])
+
+    assert result.exit_code == 2
+    assert "'nope' is not one of" in result.output
+
+
+def test_page_canonicalize(monkeypatch, caplog, settings):
+    """
+    Urls should be turned into their canonical form before removing
+    duplicated ones.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        validated.append(paths)
+        return json.dumps({"messages": []}).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--canonicalize", "fragment", "--canonicalize", "tracking",
+            "--canonicalize", "strip-slash",
+            "http://perdu.com/a", "http://perdu.com/a/",
+            "http://perdu.com/a?utm_source=foo", "http://perdu.com/a#top",
+            "http://perdu.com/b?id=1&fbclid=2",
+        ])
+
+        assert result.exit_code == 0
+        assert validated == [["http://perdu.com/a", "http://perdu.com/b?id=1"]]
+        assert (
+            "py-html-checker",
+            logging.INFO,
+            "Launching validation for 2 paths (3 ignored duplications)",
+        ) in caplog.record_tuples
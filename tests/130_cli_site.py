@@ -1,11 +1,14 @@
+import io
+import json
 import logging
 import os
+import sys
 
 from click.testing import CliRunner
 
 from html_checker.cli.entrypoint import cli_frontend
 from html_checker.exceptions import HtmlCheckerBaseException
-from html_checker.validator import ValidatorInterface
+from html_checker.validator import ValidatorInterface, ValidatorVersionQuery
 
 
 def mock_validator_execute_validator_for_base_exception(*args, **kwargs):
@@ -130,3 +133,293 @@ def test_site_safe_exception(monkeypatch, caplog, settings):
 
         assert result.exit_code == 0
         assert expected == caplog.record_tuples
+
+
+def test_site_version_query_release(monkeypatch, caplog, settings):
+    """
+    Validator version query should be killed when command is aborted before its
+    version has been needed.
+    """
+    started = []
+
+    def mock_query_version(self, interpreter_options=None):
+        query = ValidatorVersionQuery([
+            sys.executable, "-c", "import time; time.sleep(30)"
+        ])
+        started.append((query, query.process))
+        return query
+
+    monkeypatch.setattr(ValidatorInterface, "query_version", mock_query_version)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, ["site", "nope.xml"])
+
+        assert result.exit_code == 1
+
+    query, process = started[0]
+
+    assert query.process is None
+    assert process.returncode is not None
+
+
+def test_site_version_query_wait(monkeypatch):
+    """
+    Version query should only be waited for once the first batch has been
+    validated, then its version be used in export metas.
+    """
+    calls = []
+
+    def mock_get_version(self):
+        calls.append("version")
+        return "1.2.3"
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        calls.append("validate")
+        return json.dumps({
+            "messages": [
+                {"url": item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorVersionQuery, "get_version",
+                        mock_get_version)
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        with io.open("sitemap.xml", "w") as fp:
+            fp.write("<urlset>\n{}</urlset>\n".format("".join([
+                "<url><loc>http://perdu.com/{}</loc></url>\n".format(i)
+                for i in [1, 2]
+            ])))
+
+        result = runner.invoke(cli_frontend, [
+            "site", "--exporter", "stats", "--stats-format", "json",
+            "--batch-size", "1", "sitemap.xml"
+        ])
+
+        assert result.exit_code == 0
+        assert calls == ["validate", "version", "validate"]
+
+        summary = json.loads(result.stdout)
+
+        assert summary["metas"]["vnu"] == "1.2.3"
+
+
+def test_site_since_last_run(monkeypatch, caplog, settings):
+    """
+    With '--since-last-run' only urls modified since the last recorded run
+    should be validated, other ones are carried over from history.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        validated.append(paths)
+        return json.dumps({
+            "messages": [
+                {"url": item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        with io.open("sitemap.xml", "w") as fp:
+            fp.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset>\n'
+                '<url><loc>http://perdu.com/old</loc>'
+                '<lastmod>2019-07-08</lastmod></url>\n'
+                '<url><loc>http://perdu.com/new</loc>'
+                '<lastmod>2999-01-01</lastmod></url>\n'
+                '</urlset>\n'
+            )
+
+        args = ["site", "--exporter", "jsonl", "--history", "history",
+                "--since-last-run", "sitemap.xml"]
+
+        # First run validates everything since there is no recorded run
+        result = runner.invoke(cli_frontend, args)
+
+        assert result.exit_code == 0
+        assert validated == [["http://perdu.com/old", "http://perdu.com/new"]]
+
+        # Second run only validates modified url
+        validated[:] = []
+        result = runner.invoke(cli_frontend, args)
+
+        assert result.exit_code == 0
+        assert validated == [["http://perdu.com/new"]]
+
+        lines = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert [item["name"] for item in lines[:2]] == [
+            "http://perdu.com/old",
+            "http://perdu.com/new",
+        ]
+        assert lines[0]["messages"][0]["message"] == "Foo"
+
+
+def test_site_batch_size(monkeypatch, caplog, settings):
+    """
+    With '--batch-size' urls should be validated by batches as they are parsed
+    from sitemap.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        validated.append(paths)
+        return json.dumps({
+            "messages": [
+                {"url": item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        with io.open("sitemap.xml", "w") as fp:
+            fp.write("<urlset>\n{}</urlset>\n".format("".join([
+                "<url><loc>http://perdu.com/{}</loc></url>\n".format(i)
+                for i in [1, 2, 3, 2, 4, 5]
+            ])))
+
+        result = runner.invoke(cli_frontend, [
+            "site", "--exporter", "jsonl", "--batch-size", "2", "sitemap.xml"
+        ])
+
+        assert result.exit_code == 0
+        assert validated == [
+            ["http://perdu.com/1", "http://perdu.com/2"],
+            ["http://perdu.com/3", "http://perdu.com/4"],
+            ["http://perdu.com/5"],
+        ]
+
+        lines = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert [item["name"] for item in lines[:5]] == [
+            "http://perdu.com/{}".format(i) for i in range(1, 6)
+        ]
+        assert (
+            "py-html-checker",
+            logging.INFO,
+            "Sitemap have 5 paths (plus 1 ignored duplications)",
+        ) in caplog.record_tuples
+
+
+def test_site_sample(monkeypatch, caplog, settings):
+    """
+    With '--sample' only representatives of each url pattern should be
+    validated and message counts estimated for every urls.
+    """
+    validated = []
+
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        validated.append(paths)
+        return json.dumps({
+            "messages": [
+                {"url": item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        with io.open("sitemap.xml", "w") as fp:
+            fp.write("<urlset>\n{}</urlset>\n".format("".join([
+                "<url><loc>http://perdu.com/products/item-{}</loc></url>\n"
+                .format(i)
+                for i in range(6)
+            ] + ["<url><loc>http://perdu.com/about</loc></url>\n"])))
+
+        result = runner.invoke(cli_frontend, [
+            "site", "--exporter", "jsonl", "--sample", "1", "sitemap.xml"
+        ])
+
+        assert result.exit_code == 0
+        assert validated == [[
+            "http://perdu.com/products/item-0",
+            "http://perdu.com/about",
+        ]]
+        assert (
+            "py-html-checker",
+            logging.INFO,
+            "Estimated from sample for 7 path(s): 7 error(s), 0 warning(s)",
+        ) in caplog.record_tuples
+
+
+def test_site_sample_thresholds(monkeypatch):
+    """
+    With '--sample' exported statistics and metas should include estimates
+    and thresholds should apply to estimated totals.
+    """
+    def mock_validator_execute_validator(self, command):
+        paths = [item for item in command if item.startswith("http://perdu")]
+        return json.dumps({
+            "messages": [
+                {"url": item, "type": "error", "message": "Foo"}
+                for item in paths
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+
+    with runner.isolated_filesystem():
+        with io.open("sitemap.xml", "w") as fp:
+            fp.write("<urlset>\n{}</urlset>\n".format("".join([
+                "<url><loc>http://perdu.com/products/item-{}</loc></url>\n"
+                .format(i)
+                for i in range(6)
+            ] + ["<url><loc>http://perdu.com/about</loc></url>\n"])))
+
+        result = runner.invoke(cli_frontend, [
+            "site", "--exporter", "stats", "--stats-format", "json",
+            "--sample", "1", "--max-errors", "5", "--destination", "dist",
+            "sitemap.xml"
+        ])
+
+        assert result.exit_code == 1
+
+        with io.open(os.path.join("dist", "stats.json")) as fp:
+            summary = json.load(fp)
+
+        # Only two representatives have been validated
+        assert summary["statistics"]["errors"] == 2
+        assert summary["statistics"]["estimates"] == {
+            "paths": 7,
+            "sampled": 2,
+            "ratio": 0.2857,
+            "errors": 7,
+            "warnings": 0,
+        }
+        assert summary["metas"]["sampling"] == {
+            "method": "pattern",
+            "paths": 7,
+            "sampled": 2,
+            "ratio": 0.2857,
+        }
+        assert summary["thresholds"]["failures"] == [
+            "7 estimated errors over maximum of 5",
+        ]
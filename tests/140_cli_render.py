@@ -0,0 +1,81 @@
+import json
+import logging
+
+from click.testing import CliRunner
+
+from html_checker.cli.entrypoint import cli_frontend
+from html_checker.export import render
+from html_checker.validator import ValidatorInterface
+
+
+def test_render_missing_source(caplog):
+    """
+    Raw results file is required.
+    """
+    runner = CliRunner()
+    result = runner.invoke(cli_frontend, ["render"])
+
+    assert result.exit_code == 2
+    assert "Missing option '--from'" in result.output
+
+
+def test_render_from_raw(monkeypatch, caplog, settings):
+    """
+    Export rendered from saved raw results should be the same as the one from
+    validation.
+    """
+    def mock_validator_execute_validator(*args, **kwargs):
+        return json.dumps({
+            "messages": [
+                {"url": "http://perdu.com", "type": "error", "message": "Foo"},
+            ]
+        }).encode("utf-8")
+
+    monkeypatch.setattr(ValidatorInterface, "execute_validator",
+                        mock_validator_execute_validator)
+
+    runner = CliRunner()
+    with runner.isolated_filesystem():
+        result = runner.invoke(cli_frontend, [
+            "page", "--exporter", "jsonl", "--save-raw", "raw.jsonl.gz",
+            "http://perdu.com"
+        ])
+
+        assert result.exit_code == 0
+        assert (
+            "py-html-checker",
+            logging.INFO,
+            "Saved raw results for 1 path(s) into: raw.jsonl.gz",
+        ) in caplog.record_tuples
+
+        validated = [json.loads(item) for item in result.stdout.splitlines()]
+
+        # Validator is never called again, not even for its version
+        def mock_fail(*args, **kwargs):
+            raise AssertionError("Validator should not be called")
+
+        monkeypatch.setattr(ValidatorInterface, "execute_validator", mock_fail)
+        monkeypatch.setattr(render, "get_vnu_version", mock_fail)
+
+        result = runner.invoke(cli_frontend, [
+            "render", "--from", "raw.jsonl.gz", "--exporter", "jsonl",
+        ])
+
+        assert result.exit_code == 0
+
+        rendered = [json.loads(item) for item in result.stdout.splitlines()]
+
+        assert [item["kind"] for item in rendered] == ["report", "summary"]
+        assert rendered[0] == validated[0]
+        assert rendered[1]["statistics"] == validated[1]["statistics"]
+        # Metas come from the original run
+        assert rendered[1]["metas"] == validated[1]["metas"]
+
+        # Another format from the same results
+        result = runner.invoke(cli_frontend, [
+            "render", "--from", "raw.jsonl.gz", "--exporter", "stats",
+            "--max-errors", "0",
+        ])
+
+        assert result.exit_code == 1
+        assert "Errors: 1" in result.stdout
@@ -55,6 +55,15 @@ class FixturesSettingsTestMixin(object):
         )
 
 
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch, tmp_path_factory):
+    """
+    Ensure application cache is never written in user cache directory during
+    tests.
+    """
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+
+
 @pytest.fixture(scope="session")
 def temp_builds_dir(tmpdir_factory):
     """Prepare a temporary build directory"""